@@ -1,11 +1,20 @@
-from flask import jsonify
+import time
+import random
+import functools
+import click
+import config
+from flask import jsonify,request,Response,stream_with_context,g
 from flask_pydantic import validate
 from flask_openapi3 import Info, Tag
 from flask_openapi3 import OpenAPI
 from controller.service_response import ServiceResponse as sr
 from controller.dataset_controller import DatasetController as dc
 from controller.convert_currency_controller import dataframe_convert_currency as dcc
-from model.model import TransactionPath,ConvertedTransactionResponse,SearchQueryModel,TransactionsBodyModel
+from controller.convert_currency_controller import prefetch_rate_store,conversion_cache
+from controller.metrics import registry,timed_stage,request_seconds
+from controller.profiler import SamplingProfiler
+from controller.os_threads import os_thread_id,current_greenlet
+from model.model import TransactionPath,ConvertedTransactionResponse,SearchQueryModel,TransactionsBodyModel,ConversionQueryModel,PageQueryModel,SummaryQueryModel,TransactionSummaryResponse,LookupBodyModel,TransactionLookupResponse
 
 info = Info(title='Currency Conversion Tracker API', version='1.0.0')
 app = OpenAPI(__name__, info=info)
@@ -13,17 +22,151 @@ app.json.sort_keys = False
 
 csv_transactions_tag =Tag(name='CSV Transactions',description='Endpoints related to read transactions from CSV')
 request_body_transactions_tag =Tag(name='Request Body Transactions',description='Endpoints related to read transactions from JSON Request Body')
+monitoring_tag =Tag(name='Monitoring',description='Endpoints related to monitor the application')
 
-def convert_transactions(df):
+def wants_stream():
+    """
+    Checks whether the current request opted in to the streaming NDJSON response mode.
+    Returns:
+        bool: True if the request has `stream=1` in its query string or prefers
+              `application/x-ndjson` over `application/json` in its Accept header.
+    """
+
+    if request.args.get('stream')=='1':
+        return True
+    return request.accept_mimetypes.best_match(['application/json','application/x-ndjson'])=='application/x-ndjson'
+
+def wants_profile():
+    """
+    Checks whether the current request is profiled.
+    Returns:
+        bool: False unless `PROFILING_ENABLED` is set. Otherwise True if the request has an `X-Profile: 1`
+              header or `profile=1` in its query string, or was drawn in the `PROFILE_SAMPLE_RATE` share of requests.
+    """
+
+    if not config.PROFILING_ENABLED:
+        return False
+    if request.headers.get('X-Profile')=='1' or request.args.get('profile')=='1':
+        return True
+    return random.random()<config.PROFILE_SAMPLE_RATE
+
+def profiled(handler):
+    """
+    Runs a route handler under the sampling profiler when `wants_profile` selects the request.
+    The collapsed stacks are written to `PROFILE_DIR` and their path is returned in the `X-Profile-Path`
+    response header; routes, parameters and response bodies are unchanged. Streamed responses are
+    profiled up to the moment their body starts streaming.
+    Args:
+        handler (callable): The route handler.
+    Returns:
+        callable: The handler wrapped with the profiling mode.
+    """
+
+    @functools.wraps(handler)
+    def profiled_handler(*args,**kwargs):
+        if not wants_profile():
+            return handler(*args,**kwargs)
+        profiler=SamplingProfiler(os_thread_id(),config.PROFILE_INTERVAL,current_greenlet())
+        profiler.start()
+        try:
+            response=app.make_response(handler(*args,**kwargs))
+        finally:
+            profiler.stop()
+        try:
+            response.headers['X-Profile-Path']=profiler.write(config.PROFILE_DIR,handler.__name__)
+        except OSError as e:
+            app.logger.error(e)
+        return response
+    return profiled_handler
+
+def stream_transactions(chunks,count,targets,convert=dcc):
+    """
+    Streams converted transactions as newline delimited JSON.
+    The first line is the `ServiceResponse` header record, followed by one line per converted transaction
+    and a trailer record reporting whether the whole result was converted. Each chunk is converted,
+    serialized and flushed before the next one is read, so memory is bounded by the chunk size.
+    Args:
+        chunks (iterable of pandas.DataFrame): The transaction data to be converted, in row chunks.
+        count (int or None): The total number of transactions reported in the header record,
+            or None if it is only known once the chunks are read.
+        targets (tuple of str): The target currency codes of the conversion.
+        convert (callable, optional): Converts a chunk to the target currencies. Defaults to `dcc`.
+    Returns:
+        flask.Response: A streamed `application/x-ndjson` response.
+    """
+
+    def generate():
+        yield app.json.dumps(sr.stream_header(count))+'\n'
+        streamed=0
+        try:
+            for chunk in chunks:
+                converted=convert(chunk,targets)
+                with timed_stage('serialize',len(converted)):
+                    lines=''.join(app.json.dumps(record)+'\n' for record in converted.to_dict(orient='records'))
+                yield lines
+                streamed+=len(converted)
+            app.logger.info("Successfully called conversion API to stream all transactions")
+            yield app.json.dumps(sr.stream_trailer(200,'Complete',f"{streamed} RECORD(S) STREAMED"))+'\n'
+        except Exception as e:
+            app.logger.error(e)
+            yield app.json.dumps(sr.stream_trailer(500,'ERROR',str(e)))+'\n'
+    return Response(stream_with_context(generate()),mimetype='application/x-ndjson')
+
+def convert_transaction_chunks(chunks,targets):
+    """
+    Converts transaction data read in chunks, for datasets too large to be held in memory.
+    Streaming requests get each converted chunk as NDJSON as soon as it is ready. Other requests get one
+    JSON document that is also streamed chunk by chunk: the "data" array is written first, one chunk of
+    records at a time, and the "response status" follows it once the number of records and the outcome
+    are known. Only one chunk is held in memory either way.
+    Args:
+        chunks (iterable of pandas.DataFrame): The transaction data to be converted, in row chunks.
+        targets (tuple of str): The target currency codes of the conversion.
+    Returns:
+        flask.Response: A streamed NDJSON response, or a streamed JSON response whose "response status" holds:
+            - A 202 code if every record was converted.
+            - A 404 code if there are no records to convert.
+            - A 500 code if an error occurs while reading or converting a chunk, after the records converted before it.
+    """
+
+    if wants_stream():
+        return stream_transactions(chunks,None,targets)
+
+    def generate():
+        yield '{"data":['
+        count=0
+        try:
+            for chunk in chunks:
+                converted=dcc(chunk,targets)
+                with timed_stage('serialize',len(converted)):
+                    records=','.join(app.json.dumps(record) for record in converted.to_dict(orient='records'))
+                if len(converted)>0:
+                    yield (',' if count>0 else '')+records
+                    count+=len(converted)
+            if count==0:
+                status=sr.response_status(404,'Not Found','No records to convert')
+            else:
+                app.logger.info("Successfully called conversion API to convert all transaction chunks")
+                status=sr.response_status(202,'Accepted',f"{count} RECORD(S) FOUND")
+        except Exception as e:
+            app.logger.error(e)
+            status=sr.response_status(500,'ERROR',str(e))
+        yield '],"response status":'+app.json.dumps(status)+'}'
+    return Response(stream_with_context(generate()),mimetype='application/json')
+
+def convert_transactions(df,targets=('bhd',),convert=dcc):
     """
     Converts transaction data in a DataFrame using an external conversion API.
     This function takes a DataFrame containing transaction data, attempts to 
     convert the transactions using the `dcc` (dataframe_convert_currency) function (by an API call), 
     and returns the converted data as a JSON response. If the DataFrame is empty, 
     or if an error occurs during the conversion process, appropriate error 
-    responses are returned.
+    responses are returned. Requests that opted in to streaming get the converted data
+    as NDJSON in chunks of `STREAM_CHUNK_SIZE` rows instead.
     Args:
         df (pandas.DataFrame): A DataFrame containing transaction data to be converted.
+        targets (tuple of str, optional): The target currency codes of the conversion. Defaults to ('bhd',).
+        convert (callable, optional): Converts the transactions to the target currencies. Defaults to `dcc`.
     Returns:
         flask.Response: A JSON response containing:
             - A 202 code response Converted transaction data if successful.
@@ -32,10 +175,14 @@ def convert_transactions(df):
     """
 
     if len(df)>0:
+        if wants_stream():
+            chunks=(df.iloc[start:start+config.STREAM_CHUNK_SIZE] for start in range(0,len(df),config.STREAM_CHUNK_SIZE))
+            return stream_transactions(chunks,len(df),targets,convert)
         try:
-            converted_df=dcc(df)
+            converted_df=convert(df,targets)
             app.logger.info("Successfully called conversion API to convert all transactions")
-            return jsonify(sr.response_process_data(converted_df.to_dict(orient='records')))
+            with timed_stage('serialize',len(converted_df)):
+                return jsonify(sr.response_process_data(converted_df.to_dict(orient='records')))
         except Exception as e:
             app.logger.error(e)
             return jsonify(sr.response(500,'ERROR',str(e)))
@@ -44,47 +191,140 @@ def convert_transactions(df):
         return jsonify(sr.response(404,'Not Found','No records to convert'))
     
 
+def convert_page(df,next_cursor,targets):
+    """
+    Converts one page of a paginated request. Only the rows of the page are converted and serialized,
+    and pages are bounded by `limit`, so they are never streamed.
+    Args:
+        df (pandas.DataFrame or None): The transactions of the page, None if no chunk was read.
+        next_cursor (str or None): The cursor of the next page, None after the last page.
+        targets (tuple of str): The target currency codes of the conversion.
+    Returns:
+        flask.Response: A JSON response containing:
+            - A 202 code response with the converted page and its "next cursor" if successful.
+            - A 404 code response if the page is empty.
+            - A 500 response if an error occurs during the conversion process.
+    """
+
+    if df is None or len(df)==0:
+        return jsonify(sr.response(404,'Not Found','No records to convert'))
+    try:
+        converted_df=dcc(df,targets)
+        app.logger.info("Successfully called conversion API to convert a page of transactions")
+        with timed_stage('serialize',len(converted_df)):
+            return jsonify(sr.response_page(converted_df.to_dict(orient='records'),next_cursor))
+    except Exception as e:
+        app.logger.error(e)
+        return jsonify(sr.response(500,'ERROR',str(e)))
+
+def convert_posted_transactions(df,targets):
+    """
+    Converts posted transactions and stores them for `/transactions/summary` from the same conversion,
+    so a posted batch is only converted once. BHD is added to the targets when it was not requested,
+    and its column is dropped from the result again, like the `latest_rate` flag the store needs. Failures to store the batch are logged and do not
+    fail its conversion.
+    Args:
+        df (pandas.DataFrame): The posted transactions DataFrame, or a chunk of it.
+        targets (tuple of str): The target currency codes of the conversion.
+    Returns:
+        pandas.DataFrame: The transactions converted by `dcc` to the target currencies.
+    """
+
+    converted=dcc(df,targets if 'bhd' in targets else targets+('bhd',),flag_latest=True)
+    try:
+        dc.add_posted_transactions(converted)
+    except Exception as e:
+        app.logger.error(e)
+    return converted.drop(columns=['latest_rate'] if 'bhd' in targets else ['latest_rate','converted_to_bhd'])
+
+@app.before_request
+def start_request_timer():
+    """
+    Records the time a request started, for the `http_request_seconds` histogram.
+    """
+
+    g.request_start=time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    """
+    Observes the time spent handling a request in the `http_request_seconds` histogram, labeled
+    by route pattern so the number of series stays bounded. Streamed responses are observed when
+    their headers are sent.
+    Args:
+        response (flask.Response): The response of the request.
+    Returns:
+        flask.Response: The response, unchanged.
+    """
+
+    start=g.get('request_start')
+    if start is not None:
+        route=request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        request_seconds.observe(time.perf_counter()-start,route=route,method=request.method,status=str(response.status_code))
+    return response
+
 @app.get('/transactions',
          tags=[csv_transactions_tag],
          summary='return all converted transactions in csv to BHD',
          description='return all converted transactions in the csv file to BHD after integration with currency conversion API',
          responses={200: ConvertedTransactionResponse})
-def all_trancations():
+@profiled
+def all_trancations(query: PageQueryModel):
     """
     Process and convert all transactions in the dataset to a unified currency format (BHD).
 
     This function retrieves the default dataset of transactions from a CSV file, applies currency 
     conversion to the entire dataset, and returns the converted data. It also handles 
     errors during dataset retrieval and logs relevant information for debugging.
+    With `limit`, only one page of transactions in id order is converted, starting after the
+    `after_id` cursor, and the response carries the cursor of the next page.
+
+    Args:
+        query (PageQueryModel): The target currencies of the conversion, BHD by default, and the optional page.
 
     Returns:
         Response: A JSON response containing the converted transactions if successful, 
                   or an error message with a 500 status code if an exception occurs.
     """
     
+    if query.limit is not None:
+        try:
+            if dc.is_default_dataset_large():
+                page=dc.page_dataset_chunks(dc.iter_default_dataset(),query.limit,query.cursor())
+            else:
+                page=dc.page_default_dataset(query.limit,query.cursor())
+        except Exception as e:
+            app.logger.error(e)
+            return jsonify(sr.response(500,'ERROR',str(e)))
+        return convert_page(*page,query.targets())
     try:
+        if dc.is_default_dataset_large():
+            app.logger.info("reading large dataset from csv file in chunks")
+            return convert_transaction_chunks(dc.iter_default_dataset(),query.targets())
         df = dc.get_default_dataset()
     except Exception as e:
         app.logger.error(e)
         return jsonify(sr.response(500,'ERROR',str(e)))
     app.logger.info("retrived dataset from csv file")
-    return convert_transactions(df)
+    return convert_transactions(df,query.targets())
 
 @app.get('/transactions/<int:id>',
          tags=[csv_transactions_tag],
          summary='Apply currency conversion on selected transaction by id to BHD',
          description='Apply currency conversion on selected transaction by id to BHD after integration with currency conversion API',
          responses={200: ConvertedTransactionResponse})
-def transactions_by_id(path: TransactionPath):
+def transactions_by_id(path: TransactionPath, query: ConversionQueryModel):
     """
     Retrieve and apply currency conversion to a specific transaction by its ID.
 
     This function validates the provided transaction ID, retrieves the transaction
-    data from the default dataset, prepares the data for integration, and applies
-    currency conversion to the filtered transaction.
+    data from the default dataset through the id index, and applies currency conversion
+    to the filtered transaction. The matching rows are materialized once, with their
+    already parsed dates.
 
     Args:
         path (TransactionPath): An object containing the integer transaction ID to be processed.
+        query (ConversionQueryModel): The target currencies of the conversion, BHD by default.
 
     Returns:
         Response: A JSON response containing the converted transaction data if successful,
@@ -98,16 +338,60 @@ def transactions_by_id(path: TransactionPath):
         int(path.transaction_id)
     except ValueError as ve:
         return jsonify(sr.response(400, 'ERROR', 'Entered ID is not a valid base 10 number'))
-    df = dc.get_default_dataset()
-    filtered_df = dc.search_by_id(df, path.transaction_id)
-    filtered_df = dc.prepare_df_for_integration(filtered_df)
-    return convert_transactions(filtered_df)
+    if dc.is_default_dataset_large():
+        return convert_transaction_chunks(dc.iter_search_default_dataset(id=path.transaction_id),query.targets())
+    filtered_df = dc.search_default_dataset_by_id(path.transaction_id)
+    return convert_transactions(filtered_df,query.targets())
+
+@app.post('/transactions/lookup',
+          tags=[csv_transactions_tag],
+          summary='Apply currency conversion on many transactions selected by id to BHD',
+          description='Look up a list of transaction ids in the csv file in one pass and convert the found transactions to BHD together, with a not found marker per missing id',
+          responses={200: TransactionLookupResponse})
+def lookup_transactions(body: LookupBodyModel, query: ConversionQueryModel):
+    """
+    Looks up many transaction ids of the default dataset in one request.
+
+    All ids are resolved in one pass over the id index of the dataset, or in one pass over the file
+    when it is read in chunks, and the found transactions are converted together, so rates shared by
+    several ids are looked up once.
+
+    Args:
+        body (LookupBodyModel): The transaction ids to look up.
+        query (ConversionQueryModel): The target currencies of the conversion, BHD by default.
+
+    Returns:
+        Response: A JSON response with one result per distinct id, in request order, holding its
+                  converted transactions and whether it was found, or an error message with a 500
+                  status code if an exception occurs.
+    """
+
+    ids=list(dict.fromkeys(body.ids))
+    try:
+        if dc.is_default_dataset_large():
+            df=dc.lookup_dataset_chunks(dc.iter_default_dataset(),ids)
+        else:
+            df=dc.lookup_default_dataset(ids)
+        records={id:[] for id in ids}
+        if df is not None and len(df)>0:
+            converted_df=dcc(df,query.targets())
+            with timed_stage('serialize',len(converted_df)):
+                for record in converted_df.to_dict(orient='records'):
+                    records[record['id']].append(record)
+    except Exception as e:
+        app.logger.error(e)
+        return jsonify(sr.response(500,'ERROR',str(e)))
+    results=[{'id':id,'found':len(transactions)>0,'transactions':transactions} for id,transactions in records.items()]
+    app.logger.info("Successfully called conversion API to convert looked up transactions")
+    with timed_stage('serialize'):
+        return jsonify(sr.response_lookup(results))
 
 @app.get('/transactions/search',
          tags=[csv_transactions_tag],
          summary='Apply currency conversion on selected transaction to BHD based on applied search criteria',
          description='Apply currency conversion on selected transaction to BHD based on applied search criteria by integration with currency conversion API',
          responses={200: ConvertedTransactionResponse})
+@profiled
 @validate()
 def transactions_search(query:SearchQueryModel):
     """
@@ -121,6 +405,9 @@ def transactions_search(query:SearchQueryModel):
             - below (float, optional): Filter transactions with amounts less than this value.
             - matching (str, optional): Filter transactions containing this term in their description or metadata.
             - currency (str, optional): Filter transactions by the specified currency.
+            - to (str, optional): The target currencies of the conversion, BHD by default.
+            - limit (int, optional): Return one page of at most this many transactions, in id order.
+            - after_id (str, optional): The cursor of the page, returned as "next cursor" by the previous page.
 
     Returns:
         DataFrame: A DataFrame containing the filtered and currency-converted transactions.
@@ -128,35 +415,64 @@ def transactions_search(query:SearchQueryModel):
     Notes:
         - If both `after` and `before` are provided, transactions within the date range are returned.
         - If both `exceed` and `below` are provided, transactions within the amount range are returned.
-        - The function applies multiple filters sequentially based on the provided query parameters.
-    """
-    df = dc.get_default_dataset()
-    filtered_df=df
-    if query.after is not None and query.before is not None:
-        filtered_df=dc.search_date_interval(filtered_df,query.after,query.before)
-    elif query.after is not None:
-        filtered_df=dc.search_after(filtered_df,query.after)
-    elif query.before is not None:
-        filtered_df=dc.search_before(filtered_df,query.before)
-    if query.exceed is not None and query.below is not None:
-        filtered_df=dc.search_between_amount(filtered_df,query.below,query.exceed)
-    elif query.exceed is not None:
-        filtered_df=dc.search_more_than(filtered_df,query.exceed)
-    elif query.below is not None:
-        filtered_df=dc.search_less_than(filtered_df,query.below)
-    if query.matching is not None:
-        filtered_df=dc.search_by_term(filtered_df,query.matching)
-    if query.currency is not None:
-        filtered_df=dc.search_by_currency(filtered_df,query.currency)
-    return convert_transactions(filtered_df)
-    
+        - All filters are resolved together through the prebuilt index of the default dataset,
+          or chunk by chunk when the dataset is too large to be cached in memory.
+    """
+    if query.limit is not None:
+        try:
+            if dc.is_default_dataset_large():
+                chunks=dc.iter_search_default_dataset(query.after,query.before,query.exceed,query.below,query.matching,query.currency)
+                page=dc.page_dataset_chunks(chunks,query.limit,query.cursor())
+            else:
+                page=dc.page_default_dataset(query.limit,query.cursor(),query.after,query.before,query.exceed,query.below,query.matching,query.currency)
+        except Exception as e:
+            app.logger.error(e)
+            return jsonify(sr.response(500,'ERROR',str(e)))
+        return convert_page(*page,query.targets())
+    if dc.is_default_dataset_large():
+        return convert_transaction_chunks(dc.iter_search_default_dataset(query.after,query.before,query.exceed,query.below,query.matching,query.currency),query.targets())
+    filtered_df=dc.search_default_dataset(query.after,query.before,query.exceed,query.below,query.matching,query.currency)
+    return convert_transactions(filtered_df,query.targets())
+
+@app.get('/transactions/summary',
+         tags=[csv_transactions_tag],
+         summary='return daily aggregates of transactions converted to BHD',
+         description='return the count, sum, min and max of transactions converted to BHD grouped by date and/or currency, served from incrementally maintained daily rollups',
+         responses={200: TransactionSummaryResponse})
+def transactions_summary(query: SummaryQueryModel):
+    """
+    Summarizes converted-to-BHD transactions per day and/or currency.
+    The summary is read from the daily rollups of `DatasetController.summarize_transactions`, which only
+    convert transactions the first time they are seen, instead of converting the whole dataset per request.
+    Args:
+        query (SummaryQueryModel): An object containing the summary criteria, which includes:
+            - group_by (str): The grouping columns, date and/or currency.
+            - after (datetime, optional): Keep days after this date.
+            - before (datetime, optional): Keep days before this date.
+            - currency (str, optional): Keep this currency.
+            - source (str): dataset, posted or all transactions.
+    Returns:
+        Response: A JSON response containing one record per group if successful,
+                  a 404 response if there are no transactions to summarize,
+                  or an error message with a 500 status code if an exception occurs.
+    """
+
+    try:
+        summary=dc.summarize_transactions(query.source,query.group_columns(),query.after,query.before,query.currency)
+    except Exception as e:
+        app.logger.error(e)
+        return jsonify(sr.response(500,'ERROR',str(e)))
+    if len(summary)==0:
+        return jsonify(sr.response(404,'Not Found','No records to summarize'))
+    return jsonify(sr.response_process_data(summary.to_dict(orient='records')))
 
 @app.post('/transactions',
           tags=[request_body_transactions_tag],
           summary='convert external transaction to BHD',
           description='Take posted external transaction to payload and then convert them to BHD using currency conversion API',
           responses={200: ConvertedTransactionResponse})
-def process_external_transactions(body: TransactionsBodyModel):
+@profiled
+def process_external_transactions(body: TransactionsBodyModel, query: ConversionQueryModel):
     """
     Processes external transactions by converting the provided transaction data.
     This function takes a TransactionsBodyModel object, converts its data into a 
@@ -164,6 +480,7 @@ def process_external_transactions(body: TransactionsBodyModel):
     Args:
         body (TransactionsBodyModel): The input data model containing transaction 
         details. It must not be None.
+        query (ConversionQueryModel): The target currencies of the conversion, BHD by default.
     Returns:
         DataFrame: A DataFrame containing the converted transaction data.
     Raises:
@@ -172,7 +489,44 @@ def process_external_transactions(body: TransactionsBodyModel):
 
     if body is not None:
         df=dc.get_json_dataset(body.model_dump_json())
-        return convert_transactions(df)
+        return convert_transactions(df,query.targets(),convert_posted_transactions)
+
+@app.post('/transactions/bulk',
+          tags=[request_body_transactions_tag],
+          summary='convert a large batch of external transactions to BHD',
+          description='Take a raw JSON batch of transactions, either {"transactions": [rows]} or columnar {"id": [...], "description": [...], "amount": [...], "currency": [...], "date": [...]}, validate it column by column and convert it to BHD using currency conversion API',
+          responses={200: ConvertedTransactionResponse})
+def process_bulk_transactions(query: ConversionQueryModel):
+    """
+    Processes a large batch of external transactions straight from the raw request body.
+    The body is parsed and validated by `get_bulk_dataset` without building one Pydantic model
+    per transaction, then converted like the other endpoints.
+    Args:
+        query (ConversionQueryModel): The target currencies of the conversion, BHD by default.
+    Returns:
+        Response: A JSON response containing the converted transactions if successful,
+                  or an error message with a 422 status code if the batch is invalid.
+    """
+
+    try:
+        df=dc.get_bulk_dataset(request.get_data())
+    except ValueError as e:
+        app.logger.error(e)
+        return jsonify(sr.response(422,'ERROR',str(e)))
+    return convert_transactions(df,query.targets(),convert_posted_transactions)
+
+@app.get('/metrics',
+         tags=[monitoring_tag],
+         summary='return the application metrics in the Prometheus text format',
+         description='return per stage latency histograms, rows processed, currency API fetches, cache hit ratios and circuit breaker state of this worker process in the Prometheus text exposition format')
+def metrics():
+    """
+    Exposes the metrics of the worker process for Prometheus.
+    Returns:
+        Response: The metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+
+    return Response(registry.render(),content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.errorhandler(404)  
 def not_found(e):
@@ -205,5 +559,32 @@ def not_found(e):
     """
     return jsonify(sr.response(500,'ERROR',str(e)))
 
+@app.cli.command('prefetch-rates')
+@click.argument('start_date',type=click.DateTime(formats=['%Y-%m-%d']))
+@click.argument('end_date',type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--base',default='bhd',show_default=True,help='Base currency of the prefetched rate tables.')
+@click.option('--fixtures',default=None,type=click.Path(exists=True,file_okay=False),help='Read rate tables from <fixtures>/<YYYY-MM-DD>/<base>.json instead of the currency API.')
+def prefetch_rates(start_date,end_date,base,fixtures):
+    """
+    Prefetches historical rate tables between START_DATE and END_DATE (YYYY-MM-DD, inclusive)
+    into the offline rate store used by the conversion endpoints.
+    """
+
+    written,stored=prefetch_rate_store(base,start_date.date(),end_date.date(),fixtures)
+    click.echo(f'Prefetched {written} {base.lower()} rate table(s), the offline rate store now holds {stored} date(s)')
+
+@app.cli.command('purge-conversion-cache')
+@click.option('--expired',is_flag=True,help='Only delete the entries converted with the @latest fallback whose time to live elapsed.')
+def purge_conversion_cache(expired):
+    """
+    Deletes the converted amounts cached in the conversion result cache.
+    """
+
+    if conversion_cache is None:
+        click.echo('The conversion result cache is disabled (CONVERSION_CACHE_PATH is empty)')
+        return
+    deleted=conversion_cache.purge(expired)
+    click.echo(f'Deleted {deleted} cached conversion(s)')
+
 if __name__ == '__main__':
     app.run()
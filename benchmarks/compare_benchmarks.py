@@ -0,0 +1,68 @@
+"""
+Compares two `run_benchmarks.py` result files and fails when the current run regressed.
+
+For every scenario present in both files, throughput (requests per second) may not drop and the p50,
+p99 latencies and peak RSS may not grow by more than their tolerance relative to the baseline. The
+script prints one line per metric and exits with status 1 if any metric regressed, so it can gate CI.
+Results are only comparable when both runs used the same dataset, settings and machine.
+
+Usage:
+    python benchmarks/compare_benchmarks.py baseline.json results.json --tolerance 0.1
+"""
+
+import sys
+import json
+import argparse
+
+# (metric, True if a higher value is better) of every compared metric.
+METRICS=(('throughput_rps',True),('p50_ms',False),('p99_ms',False),('peak_rss_bytes',False))
+
+def compare_results(baseline,current,tolerance,memory_tolerance):
+    """
+    Compares the scenarios of two result files.
+    Args:
+        baseline (dict): The baseline results.
+        current (dict): The current results.
+        tolerance (float): Largest accepted relative regression of throughput and latencies.
+        memory_tolerance (float): Largest accepted relative growth of the peak RSS.
+    Returns:
+        list of dict: One row per scenario and metric with the 'scenario', 'metric', 'baseline', 'current',
+            relative 'change' (positive when the metric got worse) and whether it 'regressed'.
+    """
+
+    rows=[]
+    for scenario,current_result in current['scenarios'].items():
+        baseline_result=baseline['scenarios'].get(scenario)
+        if baseline_result is None:
+            continue
+        for metric,higher_is_better in METRICS:
+            before,after=baseline_result.get(metric),current_result.get(metric)
+            if before is None or after is None or before==0:
+                continue
+            change=(before-after)/before if higher_is_better else (after-before)/before
+            limit=memory_tolerance if metric=='peak_rss_bytes' else tolerance
+            rows.append({'scenario':scenario,'metric':metric,'baseline':before,'current':after,
+                         'change':change,'regressed':change>limit})
+    return rows
+
+def main():
+    parser=argparse.ArgumentParser(description='Fail when a benchmark run regressed against a baseline run.')
+    parser.add_argument('baseline',help='Result file of the baseline run.')
+    parser.add_argument('current',help='Result file of the current run.')
+    parser.add_argument('--tolerance',type=float,default=0.1,help='Largest accepted relative regression of throughput and latencies.')
+    parser.add_argument('--memory-tolerance',type=float,default=0.1,help='Largest accepted relative growth of the peak RSS.')
+    args=parser.parse_args()
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        baseline,current=json.load(baseline_file),json.load(current_file)
+    if baseline.get('dataset',{}).get('rows')!=current.get('dataset',{}).get('rows'):
+        print('warning: the runs used datasets of different sizes',file=sys.stderr)
+    rows=compare_results(baseline,current,args.tolerance,args.memory_tolerance)
+    for row in rows:
+        print(f"{row['scenario']:8} {row['metric']:16} {row['baseline']:16.2f} -> {row['current']:16.2f}  "
+              f"{row['change']*100:+8.1f}% worse{'  REGRESSED' if row['regressed'] else ''}")
+    regressions=sum(row['regressed'] for row in rows)
+    print(f"{regressions} regression(s) over {len(rows)} compared metric(s)")
+    sys.exit(1 if regressions>0 else 0)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Generates synthetic transactions CSV files for the benchmarks.
+
+Every generated row passes the TransactionModel rules: ids are unique integers, currencies are codes
+of the currency registry and dates are after 2024-04-01. The distributions follow real card traffic:
+    - currencies: a few major currencies carry most of the rows, followed by a long tail of minor
+      fiat currencies and crypto assets.
+    - dates: spread over `--days` days from 2024-04-02, with less traffic on weekends.
+    - amounts: log-normal, rounded to two decimals and scaled for currencies with small units (JPY, KRW...).
+Rows are generated and written in chunks, so 10M row files do not have to fit in memory.
+
+Usage:
+    python benchmarks/generate_dataset.py --rows 1m --output data/transactions_1m.csv
+"""
+
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+
+# (currency, share of the rows, amount scale) of the generated transactions.
+CURRENCY_MIX=(
+    ('usd',0.34,1),('eur',0.20,1),('gbp',0.09,1),('bhd',0.06,0.4),('sar',0.05,3.75),('aed',0.04,3.67),
+    ('jpy',0.04,150),('inr',0.03,83),('cad',0.02,1.4),('aud',0.02,1.5),('chf',0.015,0.9),('cny',0.015,7.2),
+    ('kwd',0.01,0.3),('omr',0.01,0.4),('qar',0.01,3.6),('egp',0.01,48),('try',0.01,32),('krw',0.01,1350),
+    ('sgd',0.01,1.35),('btc',0.005,0.000015),('eth',0.005,0.0003),('usdt',0.005,1),('sek',0.005,10.5),
+    ('nok',0.005,10.7))
+
+DESCRIPTION_VERBS=('enhance','expedite','optimize','transition','streamline','integrate','leverage','monetize',
+                   'deploy','synergize','aggregate','orchestrate')
+DESCRIPTION_ADJECTIVES=('B2B','cross-platform','back-end','dynamic','scalable','real-time','seamless','global',
+                        'mission-critical','turnkey','cloud-native','end-to-end')
+DESCRIPTION_NOUNS=('paradigms','solutions','functionalities','systems','markets','channels','platforms','services',
+                   'partnerships','infrastructures','deliverables','supply-chains')
+
+# Relative traffic of Monday to Sunday.
+WEEKDAY_WEIGHTS=(1.0,1.0,1.0,1.05,1.2,0.7,0.55)
+
+# Number of rows generated and written at once.
+CHUNK_SIZE=1_000_000
+
+def parse_rows(value):
+    """
+    Parses a row count such as '10000', '10k', '1m' or '10M'.
+    Args:
+        value (str): The row count.
+    Returns:
+        int: The number of rows.
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive row count.
+    """
+
+    multipliers={'k':1_000,'m':1_000_000}
+    suffix=value[-1:].lower()
+    try:
+        rows=int(value[:-1])*multipliers[suffix] if suffix in multipliers else int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not a row count such as 10000, 10k or 1m")
+    if rows<=0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive row count")
+    return rows
+
+def generate_chunk(rng,first_id,rows,days):
+    """
+    Generates a chunk of transactions.
+    Args:
+        rng (numpy.random.Generator): The random generator.
+        first_id (int): The id of the first transaction of the chunk.
+        rows (int): The number of transactions.
+        days (int): The number of days the dates are spread over.
+    Returns:
+        pandas.DataFrame: Transactions with the 'id', 'description', 'amount', 'currency' and 'date' columns.
+    """
+
+    codes=np.array([code for code,_,_ in CURRENCY_MIX])
+    shares=np.array([share for _,share,_ in CURRENCY_MIX])
+    scales=np.array([scale for _,_,scale in CURRENCY_MIX])
+    currency_positions=rng.choice(len(codes),size=rows,p=shares/shares.sum())
+
+    dates=np.datetime64('2024-04-02')+np.arange(days)
+    weekdays=(dates.astype('int64')+3)%7
+    day_weights=np.asarray(WEEKDAY_WEIGHTS)[weekdays]
+    date_positions=rng.choice(days,size=rows,p=day_weights/day_weights.sum())
+
+    amounts=np.round(rng.lognormal(mean=4.5,sigma=1.2,size=rows)*scales[currency_positions],2)
+    amounts=np.maximum(amounts,0.01)
+
+    descriptions=np.array([' '.join(words) for words in itertools.product(DESCRIPTION_VERBS,DESCRIPTION_ADJECTIVES,DESCRIPTION_NOUNS)])
+    description_positions=rng.integers(0,len(descriptions),size=rows)
+
+    return pd.DataFrame({'id':np.arange(first_id,first_id+rows),
+                         'description':descriptions[description_positions],
+                         'amount':amounts,
+                         'currency':codes[currency_positions],
+                         'date':np.datetime_as_string(dates[date_positions],unit='D')})
+
+def generate_dataset(output,rows,days=365,seed=0):
+    """
+    Writes a synthetic transactions CSV file.
+    Args:
+        output (str): The path of the CSV file.
+        rows (int): The number of transactions.
+        days (int, optional): The number of days the dates are spread over. Defaults to 365.
+        seed (int, optional): The seed of the random generator, the same seed writes the same file. Defaults to 0.
+    """
+
+    directory=os.path.dirname(output)
+    if directory!='':
+        os.makedirs(directory,exist_ok=True)
+    rng=np.random.default_rng(seed)
+    with open(output,'w',newline='') as output_file:
+        for start in range(0,rows,CHUNK_SIZE):
+            chunk=generate_chunk(rng,start+1,min(CHUNK_SIZE,rows-start),days)
+            chunk.to_csv(output_file,header=start==0,index=False,float_format='%.2f')
+
+def main():
+    parser=argparse.ArgumentParser(description='Generate a synthetic transactions CSV file.')
+    parser.add_argument('--rows',type=parse_rows,default=parse_rows('10k'),help='Number of transactions, such as 10k, 1m or 10m.')
+    parser.add_argument('--output',default=None,help='Path of the CSV file. Defaults to data/transactions_<rows>.csv.')
+    parser.add_argument('--days',type=int,default=365,help='Number of days from 2024-04-02 the dates are spread over.')
+    parser.add_argument('--seed',type=int,default=0,help='Seed of the random generator.')
+    args=parser.parse_args()
+    if args.output is None:
+        args.output=f'data/transactions_{args.rows}.csv'
+    generate_dataset(args.output,args.rows,args.days,args.seed)
+    print(f"{args.rows} transactions written to {args.output}")
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Measures the peak memory allocated by the request path of the /transactions endpoints with tracemalloc.
+
+Every scenario runs twice over the default dataset:
+    - 'legacy': the former pipeline, one DataFrame.query copy per filter, a copy and a date re-parse
+      before the conversion and a copy inside the conversion.
+    - 'planned': the current pipeline, all filters resolved to one set of row positions by the
+      DatasetIndex, the result frame taken once and the conversion columns added to a shallow copy.
+The legacy filters are kept in this module as the reference the planned pipeline is measured against.
+
+Rate tables are seeded into the rate table cache, so the benchmark measures the dataset pipeline
+and the conversion arithmetic without calling the currency API.
+
+Usage:
+    python benchmarks/memory_benchmark.py --dataset data/transactions.csv --output memory.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed_rate_tables(ccc,dates):
+    """
+    Puts a synthetic BHD rate table for every date in the rate table cache.
+    Args:
+        ccc (module): The convert_currency_controller module.
+        dates (iterable of pandas.Timestamp): The dates to seed.
+    """
+
+    from model.currency_registry import CURRENCY_CODES
+    rate_table={code:1.0+position/1000 for position,code in enumerate(CURRENCY_CODES)}
+    rate_table['bhd']=1.0
+    for rate_date in dates:
+        ccc.rate_table_cache.put((rate_date.strftime('%Y-%m-%d'),'bhd'),(rate_table,False),float('inf'))
+
+def legacy_search_by_id(df,id):
+    """
+    Filters transactions the legacy way, with one DataFrame.query copy, keeping the rows of an id.
+    Args:
+        df (pandas.DataFrame): The transactions to filter.
+        id (int): The transaction id to keep.
+    Returns:
+        pandas.DataFrame: A filtered copy of the transactions.
+    """
+
+    return df.query('`id` == @id')
+
+def legacy_search_after(df,date):
+    """
+    Filters transactions the legacy way, with one DataFrame.query copy, keeping the rows after a date.
+    Args:
+        df (pandas.DataFrame): The transactions to filter.
+        date (datetime-like): The exclusive lower bound of the 'date' column.
+    Returns:
+        pandas.DataFrame: A filtered copy of the transactions.
+    """
+
+    return df.query('`date` > @date')
+
+def legacy_search_before(df,date):
+    """
+    Filters transactions the legacy way, with one DataFrame.query copy, keeping the rows before a date.
+    Args:
+        df (pandas.DataFrame): The transactions to filter.
+        date (datetime-like): The exclusive upper bound of the 'date' column.
+    Returns:
+        pandas.DataFrame: A filtered copy of the transactions.
+    """
+
+    return df.query('`date` < @date')
+
+def legacy_search_more_than(df,amount):
+    """
+    Filters transactions the legacy way, with one DataFrame.query copy, keeping the rows above an amount.
+    Args:
+        df (pandas.DataFrame): The transactions to filter.
+        amount (float): The exclusive lower bound of the 'amount' column.
+    Returns:
+        pandas.DataFrame: A filtered copy of the transactions.
+    """
+
+    return df.query('`amount` > @amount')
+
+def legacy_search_by_currency(df,currency):
+    """
+    Filters transactions the legacy way, with one DataFrame.query copy, keeping the rows of a currency.
+    Args:
+        df (pandas.DataFrame): The transactions to filter.
+        currency (str): The currency to keep, matched case-insensitively.
+    Returns:
+        pandas.DataFrame: A filtered copy of the transactions.
+    """
+
+    currency_lower=currency.lower()
+    return df.query('`currency`==@currency_lower')
+
+def measure(function):
+    """
+    Runs a function and returns the peak memory it allocated.
+    Args:
+        function (callable): The function to measure, taking no argument.
+    Returns:
+        int: The peak number of bytes allocated while the function ran.
+    """
+
+    tracemalloc.reset_peak()
+    baseline=tracemalloc.get_traced_memory()[0]
+    result=function()
+    peak=tracemalloc.get_traced_memory()[1]-baseline
+    del result
+    return peak
+
+def main():
+    parser=argparse.ArgumentParser(description='Peak memory of the /transactions request path, legacy versus planned pipeline.')
+    parser.add_argument('--dataset',default='data/transactions.csv',help='CSV file used as the default dataset.')
+    parser.add_argument('--output',default=None,help='Write the results as JSON to this file.')
+    args=parser.parse_args()
+    os.environ['DEFAULT_DATASET_PATH']=args.dataset
+    os.environ['CONVERSION_CACHE_PATH']=''
+    os.environ['RATE_CACHE_MAX_ENTRIES']=str(1<<20)
+
+    import pandas as pd
+    import controller.convert_currency_controller as ccc
+    from controller.dataset_controller import DatasetController as dc
+
+    df,index=dc.get_default_snapshot()
+    seed_rate_tables(ccc,df['date'].unique())
+    dcc=ccc.dataframe_convert_currency
+    transaction_id=int(df['id'].iloc[len(df)//2])
+    after,before=df['date'].quantile(0.25),df['date'].quantile(0.75)
+    exceed=float(df['amount'].median())
+    currency=str(df['currency'].mode().iloc[0])
+
+    def legacy_prepare(frame):
+        frame=frame.copy()
+        frame['date']=pd.to_datetime(frame['date'],format='%Y-%m-%d',errors='coerce')
+        return dcc(frame.copy())
+
+    def legacy_search():
+        frame=dc.get_default_dataset()
+        frame=legacy_search_after(frame,after)
+        frame=legacy_search_before(frame,before)
+        frame=legacy_search_more_than(frame,exceed)
+        frame=legacy_search_by_currency(frame,currency)
+        return dcc(frame.copy())
+
+    scenarios={
+        'by_id':(lambda: legacy_prepare(legacy_search_by_id(dc.get_default_dataset(),transaction_id)),
+                 lambda: dcc(dc.search_default_dataset_by_id(transaction_id))),
+        'search':(legacy_search,
+                  lambda: dcc(dc.search_default_dataset(after,before,exceed,None,None,currency))),
+        'all':(lambda: dcc(dc.get_default_dataset().copy()),
+               lambda: dcc(dc.get_default_dataset())),
+    }
+    tracemalloc.start()
+    results={'dataset':args.dataset,'rows':len(df),'scenarios':{}}
+    for name,(legacy,planned) in scenarios.items():
+        legacy()
+        planned()
+        results['scenarios'][name]={'legacy_peak_bytes':measure(legacy),'planned_peak_bytes':measure(planned)}
+    tracemalloc.stop()
+    for name,result in results['scenarios'].items():
+        print(f"{name:8} legacy {result['legacy_peak_bytes']/2**20:10.2f} MiB   planned {result['planned_peak_bytes']/2**20:10.2f} MiB")
+    if args.output is not None:
+        with open(args.output,'w') as output_file:
+            json.dump(results,output_file,indent=2)
+
+if __name__=='__main__':
+    main()
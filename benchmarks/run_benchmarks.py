@@ -0,0 +1,232 @@
+"""
+Measures throughput, latency percentiles and peak RSS of the /transactions endpoints and of
+dataframe_convert_currency, and writes the results as JSON for `compare_benchmarks.py`.
+
+Scenarios:
+    - 'all': GET /transactions
+    - 'search': GET /transactions/search with `--search` as query string
+    - 'by_id': GET /transactions/<id>, a random id of the dataset per request
+    - 'post': POST /transactions with the first `--post-rows` rows of the dataset
+    - 'dcc': dataframe_convert_currency called directly on the default dataset
+
+Every scenario runs in a fresh process, so its peak RSS and its caches do not carry over from another
+scenario. The application is driven through the Flask test client, without a server in between. The
+first request fetches the rate tables and is reported as `cold_ms`; the `--requests` timed requests
+that follow run with warm rate tables, `--concurrency` at a time. Unless `--api-url` is given, rate tables
+are served by `stub_currency_api.py` started with `--stub-latency` and `--stub-error-rate`. The
+conversion result cache is disabled unless `--conversion-cache` is given, so conversions are measured.
+
+Usage:
+    python benchmarks/generate_dataset.py --rows 1m --output data/transactions_1m.csv
+    python benchmarks/run_benchmarks.py --dataset data/transactions_1m.csv --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import random
+import argparse
+import platform
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor,ThreadPoolExecutor
+try:
+    import resource
+except ImportError:
+    resource=None
+
+BENCHMARKS_DIR=os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.dirname(BENCHMARKS_DIR))
+
+SCENARIOS=('all','search','by_id','post','dcc')
+
+def peak_rss():
+    """
+    Returns the peak resident set size of the current process.
+    Returns:
+        int or None: The peak RSS in bytes, or None on platforms without the resource module.
+    """
+
+    if resource is None:
+        return None
+    peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform=='darwin' else peak*1024
+
+def percentile(timings,share):
+    """
+    Returns a percentile of timings with the nearest rank method.
+    Args:
+        timings (list of float): The timings, in seconds.
+        share (float): The percentile, between 0 and 100.
+    Returns:
+        float: The percentile in milliseconds, or None if there is no timing.
+    """
+
+    if len(timings)==0:
+        return None
+    ordered=sorted(timings)
+    rank=max(int(-(-share*len(ordered)//100)),1)
+    return ordered[rank-1]*1000
+
+def start_stub(port,latency,error_rate):
+    """
+    Starts the currency API stub in a subprocess and waits until it accepts connections.
+    Args:
+        port (int): The port of the stub.
+        latency (float): Seconds every stub response waits.
+        error_rate (float): Share of the stub requests answered with 503.
+    Returns:
+        subprocess.Popen: The stub process.
+    Raises:
+        RuntimeError: If the stub does not accept connections within 10 seconds.
+    """
+
+    stub=subprocess.Popen([sys.executable,os.path.join(BENCHMARKS_DIR,'stub_currency_api.py'),'--port',str(port),
+                           '--latency',str(latency),'--error-rate',str(error_rate)],stdout=subprocess.DEVNULL)
+    deadline=time.monotonic()+10
+    while time.monotonic()<deadline:
+        try:
+            socket.create_connection(('127.0.0.1',port),timeout=1).close()
+            return stub
+        except OSError:
+            if stub.poll() is not None:
+                break
+            time.sleep(0.05)
+    stub.kill()
+    raise RuntimeError(f'The currency API stub did not start on port {port}')
+
+def run_scenario(name,settings):
+    """
+    Runs one scenario. Called in a fresh process, before the application is imported.
+    Args:
+        name (str): The scenario name, one of SCENARIOS.
+        settings (dict): The dataset path, API URL, conversion cache path, request count, concurrency,
+            search query string, sampled ids and posted rows of the run.
+    Returns:
+        dict: The 'requests', 'errors', converted 'rows', 'cold_ms', 'elapsed_seconds', 'throughput_rps',
+            'rows_per_second', 'p50_ms', 'p99_ms' and 'peak_rss_bytes' of the scenario.
+    """
+
+    os.environ['DEFAULT_DATASET_PATH']=settings['dataset']
+    os.environ['CURRENCY_API_URL']=settings['api_url']
+    os.environ['CONVERSION_CACHE_PATH']=settings['conversion_cache']
+    os.environ['RATE_CACHE_MAX_ENTRIES']=str(1<<20)
+
+    from app import app
+    from controller.dataset_controller import DatasetController as dc
+    from controller.convert_currency_controller import dataframe_convert_currency as dcc
+
+    clients=threading.local()
+    ids=iter(settings['ids'])
+    ids_lock=threading.Lock()
+
+    def client():
+        if not hasattr(clients,'client'):
+            clients.client=app.test_client()
+        return clients.client
+
+    def call_route(response):
+        body=response.get_json(silent=True) or {}
+        code=body.get('response status',{}).get('code',response.status_code)
+        return code<400 and response.status_code<400,len(body.get('data') or [])
+
+    def next_id():
+        with ids_lock:
+            return next(ids)
+
+    calls={
+        'all':lambda: call_route(client().get('/transactions')),
+        'search':lambda: call_route(client().get(f"/transactions/search?{settings['search']}")),
+        'by_id':lambda: call_route(client().get(f'/transactions/{next_id()}')),
+        'post':lambda: call_route(client().post('/transactions',json={'transactions':settings['post_rows']})),
+        'dcc':lambda: (True,len(dcc(dc.get_default_dataset()))),
+    }
+    call=calls[name]
+
+    def timed_call(_):
+        start=time.perf_counter()
+        try:
+            ok,rows=call()
+        except Exception:
+            ok,rows=False,0
+        return time.perf_counter()-start,ok,rows
+
+    cold_seconds,cold_ok,_=timed_call(None)
+    start=time.perf_counter()
+    with ThreadPoolExecutor(settings['concurrency']) as pool:
+        results=list(pool.map(timed_call,range(settings['requests'])))
+    elapsed=time.perf_counter()-start
+    timings=[seconds for seconds,_,_ in results]
+    rows=sum(result_rows for _,_,result_rows in results)
+    return {'requests':len(results),
+            'errors':sum(not ok for _,ok,_ in results)+(not cold_ok),
+            'rows':rows,
+            'cold_ms':cold_seconds*1000,
+            'elapsed_seconds':elapsed,
+            'throughput_rps':len(results)/elapsed if elapsed>0 else None,
+            'rows_per_second':rows/elapsed if elapsed>0 else None,
+            'p50_ms':percentile(timings,50),
+            'p99_ms':percentile(timings,99),
+            'peak_rss_bytes':peak_rss()}
+
+def main():
+    parser=argparse.ArgumentParser(description='Benchmark the /transactions endpoints and dataframe_convert_currency.')
+    parser.add_argument('--dataset',default='data/transactions.csv',help='CSV file used as the default dataset.')
+    parser.add_argument('--output',default=None,help='Write the results as JSON to this file.')
+    parser.add_argument('--scenarios',default=','.join(SCENARIOS),help=f"Comma separated scenarios among {', '.join(SCENARIOS)}.")
+    parser.add_argument('--requests',type=int,default=20,help='Number of timed requests per scenario, after the cold one.')
+    parser.add_argument('--concurrency',type=int,default=1,help='Number of requests in flight at once.')
+    parser.add_argument('--search',default='after=2024-06-01&before=2024-09-01&exceed=100&currency=usd',help='Query string of the search scenario.')
+    parser.add_argument('--post-rows',type=int,default=1000,help='Number of dataset rows posted by the post scenario.')
+    parser.add_argument('--api-url',default=None,help='Currency API URL. Defaults to a stub started for the run.')
+    parser.add_argument('--stub-port',type=int,default=8765,help='Port of the currency API stub.')
+    parser.add_argument('--stub-latency',type=float,default=0.05,help='Seconds every stub response waits.')
+    parser.add_argument('--stub-error-rate',type=float,default=0.0,help='Share of the stub requests answered with 503.')
+    parser.add_argument('--conversion-cache',default='',help='SQLite file of the conversion result cache, disabled by default.')
+    parser.add_argument('--seed',type=int,default=0,help='Seed of the sampled ids.')
+    args=parser.parse_args()
+    scenarios=[name.strip() for name in args.scenarios.split(',') if name.strip()!='']
+    unknown=set(scenarios)-set(SCENARIOS)
+    if len(unknown)>0:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    import pandas as pd
+    ids=pd.read_csv(args.dataset,usecols=['id'])['id']
+    posted=pd.read_csv(args.dataset,nrows=args.post_rows)
+    rows=len(ids)
+    settings={'dataset':args.dataset,
+              'api_url':args.api_url or f'http://127.0.0.1:{args.stub_port}/npm/@fawazahmed0/currency-api',
+              'conversion_cache':args.conversion_cache,
+              'requests':args.requests,
+              'concurrency':args.concurrency,
+              'search':args.search,
+              'ids':[int(transaction_id) for transaction_id in random.Random(args.seed).choices(ids.tolist(),k=args.requests+1)],
+              'post_rows':posted.to_dict(orient='records')}
+    del ids,posted
+
+    stub=start_stub(args.stub_port,args.stub_latency,args.stub_error_rate) if args.api_url is None else None
+    results={'environment':{'python':platform.python_version(),'platform':platform.platform(),'cpus':os.cpu_count()},
+             'settings':{key:value for key,value in vars(args).items() if key!='output'},
+             'dataset':{'path':args.dataset,'bytes':os.path.getsize(args.dataset),'rows':rows},
+             'scenarios':{}}
+    try:
+        for name in scenarios:
+            with ProcessPoolExecutor(max_workers=1,mp_context=multiprocessing.get_context('spawn')) as pool:
+                results['scenarios'][name]=pool.submit(run_scenario,name,settings).result()
+            result=results['scenarios'][name]
+            print(f"{name:8} {result['throughput_rps']:10.2f} req/s {result['rows_per_second']:14.0f} rows/s   "
+                  f"p50 {result['p50_ms']:10.2f} ms   p99 {result['p99_ms']:10.2f} ms   "
+                  f"peak RSS {(result['peak_rss_bytes'] or 0)/2**20:9.1f} MiB   errors {result['errors']}")
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+    if args.output is not None:
+        with open(args.output,'w') as output_file:
+            json.dump(results,output_file,indent=2)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Serves a local stand-in for the jsDelivr currency API, so benchmarks do not depend on the network.
+
+The stub answers the two routes used by the application:
+    - `/npm/@fawazahmed0/currency-api@<date>/v1/currencies.json`
+    - `/npm/@fawazahmed0/currency-api@<date>/v1/currencies/<base>.json`
+with a rate table over every code of the currency registry. Rates are derived from a hash of
+(date, currency), so they are stable across runs. Every response waits `--latency` seconds plus a
+random jitter, a share `--error-rate` of the requests fails with 503, and dates after `--last-date`
+answer 404 like dates the API has not published yet, which makes the application fall back to `@latest`.
+
+Usage:
+    python benchmarks/stub_currency_api.py --port 8765 --latency 0.05 --error-rate 0.01
+    CURRENCY_API_URL=http://127.0.0.1:8765/npm/@fawazahmed0/currency-api gunicorn app:app
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import functools
+from datetime import date
+from http.server import ThreadingHTTPServer,BaseHTTPRequestHandler
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.currency_registry import CURRENCY_CODES
+
+API_PREFIX='/npm/@fawazahmed0/currency-api@'
+
+def stub_rate(rate_date,currency):
+    """
+    Returns the stable value of a currency on a date, in an arbitrary common unit.
+    Args:
+        rate_date (str): The date as YYYY-MM-DD.
+        currency (str): The currency code.
+    Returns:
+        float: A value between 0.5 and 3.
+    """
+
+    return 0.5+zlib.crc32(f'{rate_date}:{currency}'.encode())%100000/40000
+
+@functools.lru_cache(maxsize=4096)
+def rate_table_body(rate_date,base_currency):
+    """
+    Builds the JSON body of a rate table, as served by the currency API.
+    Args:
+        rate_date (str): The date of the table as YYYY-MM-DD.
+        base_currency (str): The base currency code.
+    Returns:
+        bytes: The JSON body.
+    """
+
+    base_rate=stub_rate(rate_date,base_currency)
+    table={code:(1.0 if code==base_currency else stub_rate(rate_date,code)/base_rate) for code in CURRENCY_CODES}
+    return json.dumps({'date':rate_date,base_currency:table}).encode()
+
+def make_handler(latency,jitter,error_rate,last_date):
+    """
+    Builds the request handler class of the stub.
+    Args:
+        latency (float): Seconds every response waits.
+        jitter (float): Upper bound in seconds of a random wait added to the latency.
+        error_rate (float): Share of the requests answered with 503.
+        last_date (str): Latest published date as YYYY-MM-DD, later dates answer 404.
+    Returns:
+        type: A BaseHTTPRequestHandler subclass.
+    """
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version='HTTP/1.1'
+
+        def log_message(self,format,*args):
+            pass
+
+        def send_body(self,code,body=b''):
+            self.send_response(code)
+            self.send_header('Content-Type','application/json')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(latency+random.uniform(0,jitter))
+            if not self.path.startswith(API_PREFIX):
+                return self.send_body(404)
+            if random.random()<error_rate:
+                return self.send_body(503)
+            rate_date,_,route=self.path[len(API_PREFIX):].partition('/v1/')
+            if rate_date=='latest':
+                rate_date=last_date
+            elif rate_date>last_date:
+                return self.send_body(404)
+            if route=='currencies.json':
+                return self.send_body(200,json.dumps({code:code.upper() for code in CURRENCY_CODES}).encode())
+            base_currency=route.removeprefix('currencies/').removesuffix('.json')
+            if base_currency not in CURRENCY_CODES:
+                return self.send_body(404)
+            self.send_body(200,rate_table_body(rate_date,base_currency))
+
+    return StubHandler
+
+def make_server(port,latency=0.0,jitter=0.0,error_rate=0.0,last_date=None):
+    """
+    Builds the stub server, serving one thread per connection.
+    Args:
+        port (int): The port to listen on, on 127.0.0.1.
+        latency (float, optional): Seconds every response waits. Defaults to 0.
+        jitter (float, optional): Upper bound in seconds of a random wait added to the latency. Defaults to 0.
+        error_rate (float, optional): Share of the requests answered with 503. Defaults to 0.
+        last_date (str, optional): Latest published date as YYYY-MM-DD. Defaults to today.
+    Returns:
+        http.server.ThreadingHTTPServer: The server, to be run with `serve_forever`.
+    """
+
+    if last_date is None:
+        last_date=date.today().isoformat()
+    return ThreadingHTTPServer(('127.0.0.1',port),make_handler(latency,jitter,error_rate,last_date))
+
+def main():
+    parser=argparse.ArgumentParser(description='Serve a local stand-in for the jsDelivr currency API.')
+    parser.add_argument('--port',type=int,default=8765,help='Port to listen on, on 127.0.0.1.')
+    parser.add_argument('--latency',type=float,default=0.0,help='Seconds every response waits.')
+    parser.add_argument('--jitter',type=float,default=0.0,help='Upper bound in seconds of a random wait added to the latency.')
+    parser.add_argument('--error-rate',type=float,default=0.0,help='Share of the requests answered with 503.')
+    parser.add_argument('--last-date',default=None,help='Latest published date (YYYY-MM-DD), later dates answer 404. Defaults to today.')
+    args=parser.parse_args()
+    server=make_server(args.port,args.latency,args.jitter,args.error_rate,args.last_date)
+    print(f"Serving the currency API stub on http://127.0.0.1:{args.port}{API_PREFIX.removesuffix('@')}",flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__=='__main__':
+    main()
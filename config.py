@@ -0,0 +1,91 @@
+import os
+
+# Dataset
+# CSV file served by the /transactions endpoints.
+DEFAULT_DATASET_PATH=os.environ.get('DEFAULT_DATASET_PATH','data/transactions.csv')
+# Datasets larger than this many bytes are read in chunks on every request instead of being cached in memory.
+DATASET_CHUNKED_THRESHOLD_BYTES=int(os.environ.get('DATASET_CHUNKED_THRESHOLD_BYTES',512*1024*1024))
+# Number of rows read, validated and converted per chunk when the dataset is read in chunks.
+INGEST_CHUNK_SIZE=int(os.environ.get('INGEST_CHUNK_SIZE',100000))
+# Number of rows converted and serialized per chunk by streamed NDJSON responses.
+STREAM_CHUNK_SIZE=int(os.environ.get('STREAM_CHUNK_SIZE',10000))
+# Directory where the default dataset and its index are written once as memory-mapped column files shared by
+# all worker processes, empty to keep a private copy in every worker. Must be a local directory (POSIX only).
+DATASET_STORE_DIR=os.environ.get('DATASET_STORE_DIR','')
+# Maximum number of transaction ids resolved by one POST /transactions/lookup request.
+LOOKUP_MAX_IDS=int(os.environ.get('LOOKUP_MAX_IDS',10000))
+
+# Currency API
+# Base URL of the currency API, override it to point the application at a mirror or a local stand-in server.
+CURRENCY_API_URL=os.environ.get('CURRENCY_API_URL','https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api')
+# Maximum number of rate tables fetched at the same time, also used as the size of the HTTP connection pool.
+RATE_FETCH_CONCURRENCY=int(os.environ.get('RATE_FETCH_CONCURRENCY',8))
+# Seconds to wait for a connection to the currency API to be established.
+RATE_FETCH_CONNECT_TIMEOUT=float(os.environ.get('RATE_FETCH_CONNECT_TIMEOUT',3.05))
+# Seconds to wait for the currency API to send a response once connected.
+RATE_FETCH_READ_TIMEOUT=float(os.environ.get('RATE_FETCH_READ_TIMEOUT',10))
+
+# Rate table cache (controller/rate_table_cache.py)
+# Maximum number of (date, base currency) rate tables kept in memory before the least recently used one is evicted.
+RATE_CACHE_MAX_ENTRIES=int(os.environ.get('RATE_CACHE_MAX_ENTRIES',1024))
+# Seconds a rate table fetched for an explicit historical date stays valid.
+RATE_CACHE_HISTORICAL_TTL=float(os.environ.get('RATE_CACHE_HISTORICAL_TTL',24*60*60))
+# Seconds a rate table served from the @latest fallback stays valid.
+RATE_CACHE_LATEST_TTL=float(os.environ.get('RATE_CACHE_LATEST_TTL',5*60))
+
+# Offline rate store (controller/rate_store.py)
+# Directory of the memory-mapped rate matrices written by the prefetch-rates command.
+RATE_STORE_DIR=os.environ.get('RATE_STORE_DIR','data/rates')
+
+# Conversion result cache (controller/conversion_cache.py)
+# SQLite file of the converted amounts cached per transaction content, of the summary rollups and of the posted transactions,
+# disabled by default; set it to a path outside the source tree, e.g. /var/lib/currency-converter/cache.sqlite3, to enable them.
+CONVERSION_CACHE_PATH=os.environ.get('CONVERSION_CACHE_PATH','')
+# Seconds a SQLite statement blocks the worker waiting for a lock held by another worker; the cache then counts a miss or skips the store.
+SQLITE_BUSY_TIMEOUT=float(os.environ.get('SQLITE_BUSY_TIMEOUT',0.05))
+# Seconds a rollup write keeps retrying, with sleeps that yield to other requests, to take the write lock held by another worker.
+ROLLUP_LOCK_WAIT=float(os.environ.get('ROLLUP_LOCK_WAIT',10))
+# Seconds a converted amount computed with the @latest fallback rate table stays valid, historical ones never expire.
+CONVERSION_CACHE_LATEST_TTL=float(os.environ.get('CONVERSION_CACHE_LATEST_TTL',5*60))
+# Version of the exchange rate source, part of every cache key; change it to invalidate every cached conversion.
+RATE_SOURCE_VERSION=os.environ.get('RATE_SOURCE_VERSION','1')
+
+# Rate fetch coalescing (controller/single_flight.py)
+# Directory shared by the worker processes to coalesce rate table fetches across processes through lock
+# files and spooled tables, set it to an empty string to only coalesce fetches within each process.
+RATE_FETCH_SPOOL_DIR=os.environ.get('RATE_FETCH_SPOOL_DIR','')
+
+# Rate fetch resilience
+# Number of times a rate fetch failing with a connection error, a timeout or a 5xx response is retried.
+RATE_FETCH_RETRIES=int(os.environ.get('RATE_FETCH_RETRIES',2))
+# Seconds of the first retry backoff, doubled on every retry; the actual delay is drawn at random below it.
+RATE_FETCH_BACKOFF_BASE=float(os.environ.get('RATE_FETCH_BACKOFF_BASE',0.2))
+# Upper bound in seconds of a retry backoff.
+RATE_FETCH_BACKOFF_MAX=float(os.environ.get('RATE_FETCH_BACKOFF_MAX',2))
+# Number of consecutive failed rate fetches that opens the circuit breaker of the currency API.
+RATE_BREAKER_FAILURE_THRESHOLD=int(os.environ.get('RATE_BREAKER_FAILURE_THRESHOLD',5))
+# Seconds the circuit breaker stays open before a trial fetch is let through.
+RATE_BREAKER_RESET_TIMEOUT=float(os.environ.get('RATE_BREAKER_RESET_TIMEOUT',30))
+# Seconds a request waits for the refresh of an expired rate table before the last good table is served stale.
+RATE_REVALIDATE_DEADLINE=float(os.environ.get('RATE_REVALIDATE_DEADLINE',2))
+# Minimum seconds between two conversions of the summary rows converted with a stale or @latest fallback rate table.
+ROLLUP_REFRESH_INTERVAL=float(os.environ.get('ROLLUP_REFRESH_INTERVAL',60))
+
+# Serving (gunicorn.conf.py)
+# 'sync' serves one request at a time per worker process, 'gevent' serves up to WORKER_CONNECTIONS requests per
+# worker as greenlets, so requests waiting on the currency API no longer pin a worker.
+SERVING_MODE=os.environ.get('SERVING_MODE','sync')
+# Number of gunicorn worker processes.
+WORKERS=int(os.environ.get('WORKERS',1))
+# Maximum number of concurrent requests per worker in gevent mode.
+WORKER_CONNECTIONS=int(os.environ.get('WORKER_CONNECTIONS',1000))
+
+# Profiling
+# Allows requests to be profiled with the sampling profiler, '1' to enable.
+PROFILING_ENABLED=os.environ.get('PROFILING_ENABLED','0')=='1'
+# Share of the requests profiled without asking, between 0 and 1, on top of those sending `X-Profile: 1` or `?profile=1`.
+PROFILE_SAMPLE_RATE=float(os.environ.get('PROFILE_SAMPLE_RATE',0))
+# Seconds between two stack samples of a profiled request.
+PROFILE_INTERVAL=float(os.environ.get('PROFILE_INTERVAL',0.005))
+# Directory the collapsed stack profiles are written to.
+PROFILE_DIR=os.environ.get('PROFILE_DIR','data/profiles')
@@ -0,0 +1,123 @@
+import threading
+import time
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when a call is refused because its circuit breaker is open.
+    """
+
+class CircuitBreaker():
+    """
+    CircuitBreaker stops calling a failing dependency until it had time to recover.
+    The breaker is closed while calls succeed. After failure_threshold consecutive failures it opens
+    and refuses calls for reset_timeout seconds, then lets a single trial call through (half-open):
+    a successful trial closes the breaker again and a failed one reopens it.
+    Attributes:
+        failure_threshold (int): Number of consecutive failures that opens the breaker.
+        reset_timeout (float): Seconds the breaker stays open before a trial call is allowed.
+        state (str): 'closed', 'open' or 'half-open'.
+        failures (int): Number of consecutive failures.
+        opens (int): Number of times the breaker opened.
+        rejections (int): Number of calls refused while the breaker was open.
+    """
+
+    def __init__(self,failure_threshold,reset_timeout):
+        self.failure_threshold=failure_threshold
+        self.reset_timeout=reset_timeout
+        self.state='closed'
+        self.failures=0
+        self.opens=0
+        self.rejections=0
+        self._opened_at=0.0
+        self._trial_in_flight=False
+        self._lock=threading.Lock()
+
+    def allow(self):
+        """
+        Checks whether a call may be made now, moving an open breaker to half-open once reset_timeout elapsed.
+        Returns:
+            bool: True if the call may be made, False if it must be refused.
+        """
+
+        with self._lock:
+            if self.state=='open' and time.monotonic()-self._opened_at>=self.reset_timeout:
+                self.state='half-open'
+                self._trial_in_flight=False
+            if self.state=='closed':
+                return True
+            if self.state=='half-open' and not self._trial_in_flight:
+                self._trial_in_flight=True
+                return True
+            self.rejections+=1
+            return False
+
+    def record_success(self):
+        """
+        Records a successful call, closing the breaker.
+        """
+
+        with self._lock:
+            self.state='closed'
+            self.failures=0
+            self._trial_in_flight=False
+
+    def record_failure(self):
+        """
+        Records a failed call, opening the breaker after failure_threshold consecutive failures
+        or after a failed trial call.
+        """
+
+        with self._lock:
+            self.failures+=1
+            if self.state=='half-open' or self.failures>=self.failure_threshold:
+                if self.state!='open':
+                    self.opens+=1
+                self.state='open'
+                self._opened_at=time.monotonic()
+                self._trial_in_flight=False
+
+    def abandon(self):
+        """
+        Records a call interrupted before its outcome was known, such as a request killed by a worker
+        timeout, so the next call can be the trial of a half-open breaker.
+        """
+
+        with self._lock:
+            self._trial_in_flight=False
+
+    def call(self,function):
+        """
+        Calls a function through the breaker.
+        Args:
+            function (callable): The call, taking no argument.
+        Returns:
+            Any: The result of the call.
+        Raises:
+            CircuitOpenError: If the breaker refuses the call.
+            Exception: The exception raised by the call, which is recorded as a failure.
+            BaseException: An interruption of the call, such as GreenletExit or KeyboardInterrupt, which is
+                recorded with `abandon`.
+        """
+
+        if not self.allow():
+            raise CircuitOpenError('The circuit breaker is open, calls are refused until the dependency recovers')
+        try:
+            result=function()
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.abandon()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        """
+        Returns the state and counters of the breaker.
+        Returns:
+            dict: The 'state', consecutive 'failures', 'opens' and 'rejections' of the breaker.
+        """
+
+        with self._lock:
+            return {'state':self.state,'failures':self.failures,'opens':self.opens,'rejections':self.rejections}
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+from controller.sqlite_database import SQLiteDatabase,is_locked
+
+# Number of keys looked up per SELECT, kept under the SQLite host parameter limit.
+LOOKUP_BATCH_SIZE=500
+# Seconds between two counts of the cache entries, which scan the whole table.
+ENTRIES_REFRESH_INTERVAL=300
+# Number of entries written per transaction, so a large store does not hold the write lock for long.
+STORE_BATCH_SIZE=5000
+# Seconds a purge, run from the command line, keeps retrying to take the write lock held by the workers.
+PURGE_LOCK_WAIT=30
+# Statements creating the table of the cache.
+CACHE_SCHEMA=('CREATE TABLE IF NOT EXISTS conversions (key INTEGER PRIMARY KEY, value REAL NOT NULL, expires_at REAL)',)
+
+def conversion_keys(df,target_currency,source_version):
+    """
+    Hashes the content of transactions into conversion cache keys.
+    Each key is a 64 bit hash of (currency, date, amount, target currency, rate source version),
+    so a row keeps its key as long as the values it is converted from do not change.
+    Args:
+        df (pandas.DataFrame): Transactions with 'currency', 'date' and 'amount' columns.
+        target_currency (str): The target currency code of the conversion.
+        source_version (str): The version of the exchange rate source.
+    Returns:
+        numpy.ndarray: int64 keys, one per row.
+    """
+
+    content=pd.DataFrame({'currency':df['currency'].astype('string').str.lower().to_numpy(),
+                          'date':df['date'].to_numpy(dtype='datetime64[ns]'),
+                          'amount':df['amount'].to_numpy(dtype='float64'),
+                          'target':target_currency,
+                          'version':source_version})
+    return pd.util.hash_pandas_object(content,index=False).to_numpy().view('int64')
+
+class ConversionCache():
+    """
+    ConversionCache is a persistent SQLite cache of converted amounts keyed by transaction content hash.
+    Entries converted with historical rate tables never expire, entries converted with the `@latest`
+    fallback expire after a time to live. The database runs in WAL mode so several worker processes
+    can read and write it at the same time; every OS thread uses its own `SQLiteDatabase` connection,
+    shared by the greenlets of the thread in the gevent serving mode.
+    The cache never waits on another worker longer than the busy timeout: a lookup that cannot read
+    the database counts as a miss and a store that cannot take the write lock is skipped.
+    Attributes:
+        database (SQLiteDatabase): The database of the cache.
+        latest_ttl (float): Seconds an entry converted with the latest fallback stays valid.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that found no entry or an expired entry.
+    The number of entries reported by `stats` is counted at most every `ENTRIES_REFRESH_INTERVAL`
+    seconds and moved by the writes of this process in between, so it is approximate.
+    """
+
+    def __init__(self,path,latest_ttl,timeout):
+        self.database=SQLiteDatabase(path,CACHE_SCHEMA,timeout)
+        self.latest_ttl=latest_ttl
+        self.hits=0
+        self.misses=0
+        self._entries=None
+        self._entries_counted_at=0.0
+        self._lock=threading.Lock()
+
+    def get_many(self,keys):
+        """
+        Looks up converted amounts.
+        Args:
+            keys (numpy.ndarray): int64 conversion cache keys.
+        Returns:
+            tuple: A tuple containing, in the order of the keys:
+                - numpy.ndarray: The float64 converted amounts, NaN for missing or expired entries.
+                - numpy.ndarray: True for the amounts converted with the latest fallback.
+        """
+
+        values=np.full(len(keys),np.nan)
+        is_latest=np.zeros(len(keys),dtype=bool)
+        if len(keys)==0:
+            return values,is_latest
+        distinct=np.unique(keys)
+        now=time.time()
+        found={}
+        try:
+            with self.database.connection() as connection:
+                for start in range(0,len(distinct),LOOKUP_BATCH_SIZE):
+                    batch=distinct[start:start+LOOKUP_BATCH_SIZE].tolist()
+                    rows=connection.execute(f"SELECT key,value,expires_at IS NOT NULL FROM conversions WHERE key IN ({','.join('?'*len(batch))}) AND (expires_at IS NULL OR expires_at>?)",batch+[now])
+                    found.update((key,(value,latest)) for key,value,latest in rows)
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            found={}
+        if len(found)>0:
+            hit_keys=np.fromiter(found.keys(),dtype='int64',count=len(found))
+            hit_values=np.array([value for value,_ in found.values()],dtype='float64')
+            hit_latest=np.array([latest for _,latest in found.values()],dtype=bool)
+            positions=pd.Index(hit_keys).get_indexer(keys)
+            values=np.where(positions>=0,hit_values[positions],np.nan)
+            is_latest=(positions>=0)&hit_latest[positions]
+        hits=int(np.count_nonzero(~np.isnan(values)))
+        with self._lock:
+            self.hits+=hits
+            self.misses+=len(keys)-hits
+        return values,is_latest
+
+    def put_many(self,keys,values,is_latest):
+        """
+        Stores converted amounts, in transactions of `STORE_BATCH_SIZE` entries.
+        The entries of a transaction that cannot take the write lock within the busy timeout are not stored.
+        Args:
+            keys (numpy.ndarray): int64 conversion cache keys.
+            values (numpy.ndarray): The converted amounts.
+            is_latest (numpy.ndarray): True for the amounts converted with the latest fallback,
+                which expire after `latest_ttl` seconds.
+        """
+
+        if len(keys)==0:
+            return
+        expires_at=np.where(is_latest,time.time()+self.latest_ttl,np.nan)
+        rows=[(key,value,None if np.isnan(expiry) else expiry) for key,value,expiry in zip(keys.tolist(),values.tolist(),expires_at.tolist())]
+        stored=0
+        for start in range(0,len(rows),STORE_BATCH_SIZE):
+            try:
+                with self.database.transaction() as connection:
+                    connection.executemany('INSERT OR REPLACE INTO conversions (key,value,expires_at) VALUES (?,?,?)',rows[start:start+STORE_BATCH_SIZE])
+            except sqlite3.OperationalError as e:
+                if not is_locked(e):
+                    raise
+                continue
+            stored+=len(rows[start:start+STORE_BATCH_SIZE])
+        with self._lock:
+            if self._entries is not None:
+                self._entries+=stored
+
+    def purge(self,expired_only=False):
+        """
+        Deletes cache entries, then reclaims their space unless another connection is using the database.
+        Args:
+            expired_only (bool, optional): Only delete the entries whose time to live elapsed. Defaults to False.
+        Returns:
+            int: The number of deleted entries.
+        """
+
+        with self.database.transaction(PURGE_LOCK_WAIT) as connection:
+            if expired_only:
+                deleted=connection.execute('DELETE FROM conversions WHERE expires_at IS NOT NULL AND expires_at<=?',(time.time(),)).rowcount
+            else:
+                deleted=connection.execute('DELETE FROM conversions').rowcount
+        try:
+            with self.database.connection() as connection:
+                connection.execute('VACUUM')
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+        with self._lock:
+            self._entries=None
+        return deleted
+
+    def stats(self):
+        """
+        Returns the counters of the cache.
+        Returns:
+            dict: The approximate number of 'entries' stored in the database, the 'hits' and 'misses'
+                  of this process and their 'hit_ratio' (0 before the first lookup).
+        """
+
+        now=time.monotonic()
+        with self._lock:
+            stale=self._entries is None or now-self._entries_counted_at>=ENTRIES_REFRESH_INTERVAL
+        if stale:
+            try:
+                with self.database.connection() as connection:
+                    entries=connection.execute('SELECT COUNT(*) FROM conversions').fetchone()[0]
+            except sqlite3.OperationalError as e:
+                if not is_locked(e):
+                    raise
+            else:
+                with self._lock:
+                    self._entries=entries
+                    self._entries_counted_at=now
+        with self._lock:
+            lookups=self.hits+self.misses
+            return {'entries':self._entries,'hits':self.hits,'misses':self.misses,'hit_ratio':self.hits/lookups if lookups>0 else 0.0}
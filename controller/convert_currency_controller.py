@@ -1,5 +1,52 @@
 import requests
 import json
+import numpy as np
+import pandas as pd
+import os
+import time
+import random
+import threading
+import config
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from controller.rate_table_cache import RateTableCache
+from controller.rate_store import RateStore,write_rate_store
+from controller.conversion_cache import ConversionCache,conversion_keys
+from controller.single_flight import SingleFlight,FileSingleFlight
+from controller.circuit_breaker import CircuitBreaker
+from controller.metrics import registry,timed_stage,rate_fetch_seconds,rate_fetches
+from model.currency_registry import CURRENCY_CODES,is_supported_currency,currency_id,encode_currencies
+
+CURRENCY_API_URL=config.CURRENCY_API_URL
+RATE_FETCH_TIMEOUT=(config.RATE_FETCH_CONNECT_TIMEOUT,config.RATE_FETCH_READ_TIMEOUT)
+rate_table_cache=RateTableCache(config.RATE_CACHE_MAX_ENTRIES)
+last_good_rate_tables=RateTableCache(config.RATE_CACHE_MAX_ENTRIES)
+rate_store=RateStore(config.RATE_STORE_DIR)
+conversion_cache=ConversionCache(config.CONVERSION_CACHE_PATH,config.CONVERSION_CACHE_LATEST_TTL,config.SQLITE_BUSY_TIMEOUT) if config.CONVERSION_CACHE_PATH else None
+RATE_SOURCE_VERSION=f'{config.RATE_SOURCE_VERSION}:{CURRENCY_API_URL}'
+
+def create_session():
+    """
+    Creates a requests session with a keep-alive connection pool sized for concurrent rate fetches.
+    Returns:
+        requests.Session: A session whose HTTP and HTTPS adapters keep up to
+                          `RATE_FETCH_CONCURRENCY` connections open per host.
+    """
+
+    session=requests.Session()
+    adapter=HTTPAdapter(pool_connections=config.RATE_FETCH_CONCURRENCY,pool_maxsize=config.RATE_FETCH_CONCURRENCY)
+    session.mount('https://',adapter)
+    session.mount('http://',adapter)
+    return session
+
+session=create_session()
+fetch_executor=ThreadPoolExecutor(max_workers=config.RATE_FETCH_CONCURRENCY,thread_name_prefix='rate-fetch')
+rate_fetch_flight=SingleFlight()
+rate_fetch_spool=FileSingleFlight(config.RATE_FETCH_SPOOL_DIR,config.RATE_FETCH_READ_TIMEOUT*(config.RATE_FETCH_RETRIES+1)) if config.RATE_FETCH_SPOOL_DIR else None
+rate_fetch_breaker=CircuitBreaker(config.RATE_BREAKER_FAILURE_THRESHOLD,config.RATE_BREAKER_RESET_TIMEOUT)
+revalidate_executor=ThreadPoolExecutor(max_workers=config.RATE_FETCH_CONCURRENCY,thread_name_prefix='rate-revalidate')
+revalidating={}
+revalidating_lock=threading.Lock()
 
 def get_api_currencies():
     """
@@ -14,14 +61,14 @@ def get_api_currencies():
                                        or returns an unsuccessful status code.
     """
     
-    currencies_request=requests.get('https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies.json')
+    currencies_request=session.get(f'{CURRENCY_API_URL}@latest/v1/currencies.json',timeout=RATE_FETCH_TIMEOUT)
     currencies_request.raise_for_status()
     return currencies_request.json()
 def not_valid_currency(currency):
     """
     Checks if a given currency is not valid.
     This function determines whether the provided currency code is not part of 
-    a predefined list of valid currency codes. The comparison is case-insensitive.
+    the currency registry, with a constant time set lookup. The comparison is case-insensitive.
     Args:
         currency (str): The currency code to validate.
     Returns:
@@ -29,29 +76,235 @@ def not_valid_currency(currency):
               False otherwise.
     """
     
-    return currency.lower() not in [
-        "1inch", "aave", "ada", "aed", "afn", "agix", "akt", "algo", "all", "amd", "amp", "ang", "aoa", "ape", "apt", "ar", 
-        "arb", "ars", "atom", "ats", "aud", "avax", "awg", "axs", "azm", "azn", "bake", "bam", "bat", "bbd", "bch", "bdt",
-        "bef", "bgn", "bhd", "bif", "bmd", "bnb", "bnd", "bob", "brl", "bsd", "bsv", "bsw", "btc", "btcb", "btg", "btn", 
-        "btt", "busd", "bwp", "byn", "byr", "bzd", "cad", "cake", "cdf", "celo", "cfx", "chf", "chz", "clp", "cnh", "cny", 
-        "comp", "cop", "crc", "cro", "crv", "cspr", "cuc", "cup", "cve", "cvx", "cyp", "czk", "dai", "dash", "dcr", "dem", 
-        "dfi", "djf", "dkk", "doge", "dop", "dot", "dydx", "dzd", "eek", "egld", "egp", "enj", "eos", "ern", "esp", "etb", 
-        "etc", "eth", "eur", "fei", "fil", "fim", "fjd", "fkp", "flow", "flr", "frax", "frf", "ftt", "fxs", "gala", "gbp", 
-        "gel", "ggp", "ghc", "ghs", "gip", "gmd", "gmx", "gnf", "gno", "grd", "grt", "gt", "gtq", "gusd", "gyd", "hbar", 
-        "hkd", "hnl", "hnt", "hot", "hrk", "ht", "htg", "huf", "icp", "idr", "iep", "ils", "imp", "imx", "inj", "inr", 
-        "iqd", "irr", "isk", "itl", "jep", "jmd", "jod", "jpy", "kas", "kava", "kcs", "kda", "kes", "kgs", "khr", "klay",
-        "kmf", "knc", "kpw", "krw", "ksm", "kwd", "kyd", "kzt", "lak", "lbp", "ldo", "leo", "link", "lkr", "lrc", "lrd",
-        "lsl", "ltc", "ltl", "luf", "luna", "lunc", "lvl", "lyd", "mad", "mana", "mbx", "mdl", "mga", "mgf", "mina",
-        "mkd", "mkr", "mmk", "mnt", "mop", "mro", "mru", "mtl", "mur", "mvr", "mwk", "mxn", "mxv", "myr", "mzm", "mzn", 
-        "nad", "near", "neo", "nexo", "nft", "ngn", "nio", "nlg", "nok", "npr", "nzd", "okb", "omr", "one", "op", "ordi",
-        "pab", "paxg", "pen", "pepe", "pgk", "php", "pkr", "pln", "pte", "pyg", "qar", "qnt", "qtum", "rol", "ron", "rpl",
-        "rsd", "rub", "rune", "rvn", "rwf", "sand", "sar", "sbd", "scr", "sdd", "sdg", "sek", "sgd", "shib", "shp", "sit",
-        "skk", "sle", "sll", "snx", "sol", "sos", "spl", "srd", "srg", "std", "stn", "stx", "sui", "svc", "syp", "szl",
-        "thb", "theta", "tjs", "tmm", "tmt", "tnd", "ton", "top", "trl", "trx", "try", "ttd", "tusd", "tvd", "twd", "twt",
-        "tzs", "uah", "ugx", "uni", "usd", "usdc", "usdd", "usdp", "usdt", "uyu", "uzs", "val", "veb", "ved", "vef", "ves",
-        "vet", "vnd", "vuv", "waves", "wemix", "woo", "wst", "xaf", "xag", "xau", "xaut", "xbt", "xcd", "xcg", "xch", "xdc", 
-        "xdr", "xec", "xem", "xlm", "xmr", "xof", "xpd", "xpf", "xpt", "xrp", "xtz", "yer", "zar", "zec", "zil", "zmk", "zmw", 
-        "zwd", "zwg", "zwl"]
+    return not is_supported_currency(currency.lower())
+
+def record_rate_fetch(start,outcome):
+    """
+    Records a currency API request in the `rate_fetch_seconds` histogram and the `rate_fetches` counter.
+    Args:
+        start (float): The `time.perf_counter` value taken when the request was sent.
+        outcome (str): The status class of the response ('2xx', '4xx', '5xx'), 'timeout' or 'connection_error'.
+    """
+
+    rate_fetch_seconds.observe(time.perf_counter()-start,outcome=outcome)
+    rate_fetches.inc(outcome=outcome)
+
+def get_with_retries(url):
+    """
+    Sends a GET request to the currency API, retrying connection errors, timeouts and 5xx responses.
+    Every request is bounded by `RATE_FETCH_TIMEOUT`, and at most `RATE_FETCH_RETRIES` retries are made,
+    each one after a random delay between 0 and `RATE_FETCH_BACKOFF_BASE` * 2**attempt seconds, capped
+    at `RATE_FETCH_BACKOFF_MAX` (full jitter), so failing fetches cannot hold a worker indefinitely.
+    Args:
+        url (str): The URL to fetch.
+    Returns:
+        requests.Response: The first response that is not a 5xx, or the last response.
+    Raises:
+        requests.exceptions.ConnectionError: If the last attempt could not connect.
+        requests.exceptions.Timeout: If the last attempt timed out.
+    """
+
+    for attempt in range(config.RATE_FETCH_RETRIES+1):
+        start=time.perf_counter()
+        try:
+            response=session.get(url,timeout=RATE_FETCH_TIMEOUT)
+            record_rate_fetch(start,f'{response.status_code//100}xx')
+            if response.status_code<500 or attempt==config.RATE_FETCH_RETRIES:
+                return response
+        except (requests.exceptions.ConnectionError,requests.exceptions.Timeout) as e:
+            record_rate_fetch(start,'timeout' if isinstance(e,requests.exceptions.Timeout) else 'connection_error')
+            if attempt==config.RATE_FETCH_RETRIES:
+                raise
+        time.sleep(random.uniform(0,min(config.RATE_FETCH_BACKOFF_MAX,config.RATE_FETCH_BACKOFF_BASE*2**attempt)))
+
+def fetch_rate_table(base_currency,rate_date):
+    """
+    Fetches the exchange rate table of a base currency for a given date from the currency API.
+    If the API has no table for the given date, the latest table is fetched instead.
+    Requests are retried with backoff by `get_with_retries`.
+    Args:
+        base_currency (str): The base currency code in small letters (e.g., 'bhd', 'usd').
+        rate_date (str): The date of the requested exchange rates in YYYY-MM-DD format.
+    Returns:
+        tuple: A tuple containing:
+            - dict: A dictionary where keys are currency codes and values are the number of
+                    units of that currency equal to one unit of the base currency.
+            - bool: True if the table came from the latest fallback instead of the requested date.
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request for the exchange rates 
+            fails with a status code other than 404.
+        requests.exceptions.Timeout: If the API does not answer within `RATE_FETCH_TIMEOUT`.
+    """
+
+    is_latest=False
+    convert_request=get_with_retries(f"{CURRENCY_API_URL}@{rate_date}/v1/currencies/{base_currency}.json")
+    if convert_request.status_code==404:
+        is_latest=True
+        convert_request=get_with_retries(f"{CURRENCY_API_URL}@latest/v1/currencies/{base_currency}.json")
+    convert_request.raise_for_status()
+    return convert_request.json()[base_currency],is_latest
+
+def get_rate_entry(base_currency,transaction_date):
+    """
+    Returns the exchange rate table of a base currency for a given date, and where it came from.
+    The offline `rate_store` is consulted first. Other dates are served from the process wide
+    `rate_table_cache` keyed by (date, base currency), so every distinct date costs at most one
+    API call until its entry expires or is evicted. Tables served from the latest fallback are
+    cached with the shorter `RATE_CACHE_LATEST_TTL`. Concurrent misses of the same key are
+    coalesced by `rate_fetch_flight` into one `load_rate_entry` call.
+    Once a cached table expired or was evicted, it is refreshed and the request waits for the fresh
+    table up to `RATE_REVALIDATE_DEADLINE` seconds. The last good table of the key is only served stale
+    when the refresh fails, is refused by the open circuit breaker or misses the deadline, so a slow or
+    failing API does not delay the request; a late refresh still fills the cache in the background.
+    Args:
+        base_currency (str): The base currency code (e.g., 'bhd', 'usd').
+        transaction_date (datetime.date): The date of the requested exchange rates.
+    Returns:
+        tuple: A tuple containing:
+            - dict: A dictionary where keys are currency codes and values are the number of
+                    units of that currency equal to one unit of the base currency.
+            - bool: True if the table came from the latest fallback instead of the requested date.
+            - bool: True if the table is a stale last good table.
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request for the exchange rates 
+            fails with a status code other than 404.
+        requests.exceptions.Timeout: If the API does not answer within `RATE_FETCH_TIMEOUT`.
+        CircuitOpenError: If the circuit breaker of the API is open and there is no last good table.
+    """
+
+    base_currency=base_currency.lower()
+    rate_date=transaction_date.strftime('%Y-%m-%d')
+    rate_table=rate_store.get_rate_table(base_currency,rate_date)
+    if rate_table is not None:
+        return rate_table,False,False
+    cache_key=(rate_date,base_currency)
+    rate_entry=rate_table_cache.get(cache_key)
+    if rate_entry is not None:
+        return rate_entry+(False,)
+    rate_entry=last_good_rate_tables.get(cache_key)
+    if rate_entry is not None:
+        try:
+            return revalidate_rate_entry(base_currency,rate_date).result(timeout=config.RATE_REVALIDATE_DEADLINE)+(False,)
+        except Exception:
+            return rate_entry+(True,)
+    return rate_fetch_flight.do(cache_key,lambda: load_rate_entry(base_currency,rate_date))+(False,)
+
+def revalidate_rate_entry(base_currency,rate_date):
+    """
+    Refreshes a rate table on `revalidate_executor`, unless it is already being refreshed.
+    Args:
+        base_currency (str): The base currency code in small letters (e.g., 'bhd', 'usd').
+        rate_date (str): The date of the rate table in YYYY-MM-DD format.
+    Returns:
+        concurrent.futures.Future: The refresh in flight for the key, resolving to the fresh rate entry,
+            or to the error of the fetch, which is left to the circuit breaker.
+    """
+
+    cache_key=(rate_date,base_currency)
+    with revalidating_lock:
+        future=revalidating.get(cache_key)
+        if future is not None:
+            return future
+        future=revalidate_executor.submit(rate_fetch_flight.do,cache_key,lambda: load_rate_entry(base_currency,rate_date))
+        revalidating[cache_key]=future
+    def forget(done):
+        with revalidating_lock:
+            if revalidating.get(cache_key) is done:
+                del revalidating[cache_key]
+    future.add_done_callback(forget)
+    return future
+
+def rate_entry_ttl(is_latest):
+    """
+    Returns the number of seconds a rate table can be reused.
+    Args:
+        is_latest (bool): True if the table came from the latest fallback.
+    Returns:
+        float: `RATE_CACHE_LATEST_TTL` for latest fallback tables, `RATE_CACHE_HISTORICAL_TTL` otherwise.
+    """
+
+    return config.RATE_CACHE_LATEST_TTL if is_latest else config.RATE_CACHE_HISTORICAL_TTL
+
+def load_rate_entry(base_currency,rate_date):
+    """
+    Fetches the exchange rate table of a base currency for a given date and caches it in `rate_table_cache`
+    and `last_good_rate_tables`. Fetches go through `rate_fetch_breaker`, which refuses them while the
+    API keeps failing. Only one caller per (date, base currency) runs this function at a time within a process. When
+    `RATE_FETCH_SPOOL_DIR` is set, the fetch is also coalesced across worker processes by
+    `rate_fetch_spool`: the worker holding the lock file of the key fetches the table and the others
+    reuse the table it spooled.
+    Args:
+        base_currency (str): The base currency code in small letters (e.g., 'bhd', 'usd').
+        rate_date (str): The date of the requested exchange rates in YYYY-MM-DD format.
+    Returns:
+        tuple: The rate table and True if it came from the latest fallback.
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request for the exchange rates 
+            fails with a status code other than 404.
+        requests.exceptions.Timeout: If the API does not answer within `RATE_FETCH_TIMEOUT`.
+        CircuitOpenError: If the circuit breaker of the API is open.
+    """
+
+    if rate_fetch_spool is None:
+        rate_entry=rate_fetch_breaker.call(lambda: fetch_rate_table(base_currency,rate_date))
+    else:
+        rate_table,is_latest=rate_fetch_breaker.call(lambda: rate_fetch_spool.do(f'{base_currency}-{rate_date}',lambda: fetch_rate_table(base_currency,rate_date),lambda entry: rate_entry_ttl(entry[1])))
+        rate_entry=(rate_table,is_latest)
+    rate_table_cache.put((rate_date,base_currency),rate_entry,rate_entry_ttl(rate_entry[1]))
+    last_good_rate_tables.put((rate_date,base_currency),rate_entry,float('inf'))
+    return rate_entry
+
+def get_rate_table(base_currency,transaction_date):
+    """
+    Returns the exchange rate table of a base currency for a given date through `get_rate_entry`.
+    Args:
+        base_currency (str): The base currency code (e.g., 'bhd', 'usd').
+        transaction_date (datetime.date): The date of the requested exchange rates.
+    Returns:
+        dict: A dictionary where keys are currency codes and values are the number of
+              units of that currency equal to one unit of the base currency.
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request for the exchange rates 
+            fails with a status code other than 404.
+        requests.exceptions.Timeout: If the API does not answer within `RATE_FETCH_TIMEOUT`.
+    """
+
+    return get_rate_entry(base_currency,transaction_date)[0]
+
+def prefetch_rate_store(base_currency,start_date,end_date,fixtures_dir=None):
+    """
+    Prefetches the rate tables of a base currency for every date of a range into the offline `rate_store`.
+    Tables are fetched concurrently from the currency API, or read from a fixtures directory laid out as
+    '<fixtures_dir>/<YYYY-MM-DD>/<base>.json' in the API response format when there is no network.
+    Dates the API only answers through the latest fallback are skipped.
+    Args:
+        base_currency (str): The base currency code (e.g., 'bhd').
+        start_date (datetime.date): The first date of the range (inclusive).
+        end_date (datetime.date): The last date of the range (inclusive).
+        fixtures_dir (str, optional): A directory to read rate tables from instead of the API.
+    Returns:
+        tuple: The number of dates written by this call and the number of dates held by the store.
+    Raises:
+        requests.exceptions.HTTPError: If fetching a rate table fails.
+    """
+
+    base_currency=base_currency.lower()
+    dates=[rate_date.strftime('%Y-%m-%d') for rate_date in pd.date_range(start_date,end_date)]
+    rate_tables={}
+    if fixtures_dir is not None:
+        for rate_date in dates:
+            fixture_path=os.path.join(fixtures_dir,rate_date,f'{base_currency}.json')
+            if os.path.exists(fixture_path):
+                with open(fixture_path) as fixture_file:
+                    rate_tables[rate_date]=json.load(fixture_file)[base_currency]
+    else:
+        fetched=fetch_executor.map(lambda rate_date: fetch_rate_table(base_currency,rate_date),dates)
+        for rate_date,(rate_table,is_latest) in zip(dates,fetched):
+            if not is_latest:
+                rate_tables[rate_date]=rate_table
+    stored_dates=write_rate_store(config.RATE_STORE_DIR,base_currency,rate_tables)
+    rate_store.reload()
+    return len(rate_tables),stored_dates
 
 def convert_currency(to_currency,from_currency,transaction_date,amount):
     """
@@ -77,36 +330,213 @@ def convert_currency(to_currency,from_currency,transaction_date,amount):
         - Currency codes are case-insensitive.
         - If the exchange rate for the specified transaction date is unavailable, 
             the function attempts to use the latest available exchange rate.
+        - Rates are read from the offline `rate_store` first, then from rate tables
+            cached per (date, currency) by `get_rate_table`.
     """
     
     converted_amount=amount
     if from_currency.lower()!=to_currency:
-        request_url=f"https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@{transaction_date.strftime('%Y-%m-%d')}/v1/currencies/{to_currency.lower()}.json"
-        convert_request=requests.get(request_url)
-        if convert_request.status_code==404:
-            request_url=f"https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies/{to_currency.lower()}.json"
-            convert_request=requests.get(request_url)
-        convert_request.raise_for_status()
-        exchange_rate=convert_request.json()[to_currency][from_currency.lower()]
+        exchange_rate=rate_store.get_rate(to_currency.lower(),transaction_date.strftime('%Y-%m-%d'),from_currency.lower())
+        if exchange_rate is None:
+            exchange_rate=get_rate_table(to_currency,transaction_date)[from_currency.lower()]
         converted_amount/=exchange_rate
     return round(converted_amount,3)
 
-def dataframe_convert_currency(df):
+def get_rate_entries(base_currency,dates):
+    """
+    Returns the exchange rate tables of a base currency for several dates, with `get_rate_entry`.
+    Dates are fetched concurrently on `fetch_executor`, which runs at most
+    `RATE_FETCH_CONCURRENCY` requests at a time over the pooled `session`.
+    Args:
+        base_currency (str): The base currency code (e.g., 'bhd').
+        dates (list of datetime-like): The distinct dates to fetch rate tables for.
+    Returns:
+        list of tuple: The (rate table, latest fallback flag, stale flag) entries in the same order as `dates`.
+    Raises:
+        requests.exceptions.HTTPError: If fetching any of the rate tables fails.
+    """
+
+    if len(dates)<=1:
+        return [get_rate_entry(base_currency,rate_date) for rate_date in dates]
+    return list(fetch_executor.map(lambda rate_date: get_rate_entry(base_currency,rate_date),dates))
+
+def get_rates_frame(base_currency,dates):
+    """
+    Builds a long-form exchange rates DataFrame for a base currency over a set of dates.
+    Dates held by the offline `rate_store` are read from it, and one rate table is fetched
+    per remaining distinct date through `get_rate_entries`.
+    Args:
+        base_currency (str): The base currency code (e.g., 'bhd').
+        dates (iterable of datetime-like): The distinct dates to fetch rate tables for.
+    Returns:
+        pandas.DataFrame: A DataFrame with the following columns:
+            - 'date' (datetime64): The date of the exchange rate.
+            - 'currency' (string): The quoted currency code.
+            - 'rate' (float64): Units of the quoted currency equal to one unit of the base currency.
+            - 'is_latest' (bool): True if the rate comes from the latest fallback instead of its date.
+            - 'is_stale' (bool): True if the rate comes from a stale last good table.
+    """
+
+    dates=[pd.Timestamp(rate_date) for rate_date in dates]
+    stored_rates,dates=rate_store.get_rates_frame(base_currency.lower(),dates)
+    frames=[] if stored_rates is None else [stored_rates.assign(is_latest=False,is_stale=False)]
+    for rate_date,(rate_table,is_latest,is_stale) in zip(dates,get_rate_entries(base_currency,dates)):
+        frames.append(pd.DataFrame({'date':rate_date,'currency':list(rate_table.keys()),'rate':list(rate_table.values()),
+                                    'is_latest':is_latest,'is_stale':is_stale}))
+    if len(frames)==0:
+        return pd.DataFrame({'date':pd.Series(dtype='datetime64[ns]'),'currency':pd.Series(dtype='string'),'rate':pd.Series(dtype='float64'),
+                             'is_latest':pd.Series(dtype='bool'),'is_stale':pd.Series(dtype='bool')})
+    rates=pd.concat(frames,ignore_index=True)
+    rates['currency']=rates['currency'].astype('string')
+    rates['rate']=rates['rate'].astype('float64')
+    return rates
+
+def compute_conversions(df,targets):
+    """
+    Converts the amounts of a DataFrame to one or more target currencies.
+    Only Bahraini Dinar (BHD) rate tables are fetched, once per distinct `date` that has amounts to
+    convert, whatever the number of targets. The tables are laid out as a [date, currency registry id]
+    matrix so the rates of every row are gathered by position, and each target is derived through the
+    cross rate amount * rate[target] / rate[currency] in one vectorized pass.
+    Args:
+        df (pandas.DataFrame): A DataFrame with 'currency', 'date' and 'amount' columns.
+        targets (sequence of str): The lowercase target currency codes.
+    Returns:
+        tuple: A tuple containing:
+            - dict: Maps each target currency to its converted amounts (float64 array) rounded to three decimal places.
+            - numpy.ndarray: True for the rows converted with a rate table of the latest fallback.
+            - numpy.ndarray: True for the rows converted with a stale last good rate table.
+    Raises:
+        requests.exceptions.HTTPError: If fetching a rate table fails.
+        KeyError: If a currency or a target currency is missing from the rate table of its date.
+    """
+
+    base_currency='bhd'
+    currency_ids=encode_currencies(df['currency'])
+    date_positions,dates=pd.factorize(df['date'].to_numpy(dtype='datetime64[ns]'))
+    dates=pd.DatetimeIndex(dates)
+    target_ids=[currency_id(target) for target in targets]
+    to_convert=np.zeros(len(df),dtype=bool)
+    for target_id in target_ids:
+        to_convert|=currency_ids!=target_id
+    with timed_stage('rate_lookup',len(df)):
+        rates=get_rates_frame(base_currency,dates[np.unique(date_positions[to_convert])])
+    with timed_stage('convert',len(df)):
+        rates['currency']=encode_currencies(rates['currency'])
+        rates=rates[rates['currency']>=0]
+        rate_positions=dates.get_indexer(rates['date'])
+        rate_matrix=np.full((len(dates),len(CURRENCY_CODES)),np.nan)
+        rate_matrix[rate_positions,rates['currency'].to_numpy()]=rates['rate'].to_numpy()
+        rate_matrix[:,currency_id(base_currency)]=1.0
+        latest_dates=np.zeros(len(dates),dtype=bool)
+        latest_dates[rate_positions[rates['is_latest'].to_numpy(dtype=bool)]]=True
+        stale_dates=np.zeros(len(dates),dtype=bool)
+        stale_dates[rate_positions[rates['is_stale'].to_numpy(dtype=bool)]]=True
+        is_latest=to_convert&latest_dates[date_positions]
+        is_stale=to_convert&stale_dates[date_positions]
+        source_rate=rate_matrix[date_positions,currency_ids]
+        amounts=df['amount'].to_numpy(dtype='float64')
+        converted={}
+        for target,target_id in zip(targets,target_ids):
+            converting=currency_ids!=target_id
+            target_rate=rate_matrix[date_positions,target_id]
+            if (converting&np.isnan(target_rate)).any():
+                raise KeyError(target)
+            missing=converting&np.isnan(source_rate)
+            if missing.any():
+                raise KeyError(str(df['currency'].iloc[np.flatnonzero(missing)[0]]).lower())
+            exchange_rate=np.where(converting,source_rate,1.0)
+            target_rate=np.where(converting,target_rate,1.0)
+            converted[target]=np.round(amounts*target_rate/exchange_rate,3)
+    return converted,is_latest,is_stale
+
+def dataframe_convert_currency(df,targets=('bhd',),flag_latest=False):
     """
-    Converts the currency of amounts in a DataFrame to Bahraini Dinar (BHD).
-    This function adds a new column `converted_to_bhd` to the given DataFrame.
-    The new column contains the amounts converted to BHD using the `convert_currency` function.
-    The conversion is performed row-wise based on the `currency`, `date`, and `amount` columns.
+    Converts the currency of amounts in a DataFrame to one or more target currencies.
+    This function adds one `converted_to_<code>` column per target currency to the given DataFrame,
+    and a `stale_rate` column flagging the rows converted with a stale last good rate table. On request
+    a `latest_rate` column flags the rows converted with the rate table of the `@latest` fallback.
+    Converted amounts are looked up first in the persistent `conversion_cache` by a hash of
+    (currency, date, amount, target, rate source version); only the rows missing from it are
+    converted with `compute_conversions` and then stored, so repeated requests over unchanged rows
+    fetch no rate table at all. Rows converted with stale rates are not stored.
+    The result is a shallow copy of the input frame with the new columns, sharing the columns of the input frame instead of copying them.
     Args:
         df (pandas.DataFrame): A DataFrame containing the following columns:
             - 'currency' (str): The currency code of the amount.
-            - 'date' (str or datetime): The date of the conversion rate.
+            - 'date' (datetime): The date of the conversion rate.
             - 'amount' (float): The amount to be converted.
+        targets (sequence of str, optional): The lowercase target currency codes. Defaults to ('bhd',).
+        flag_latest (bool, optional): Add the `latest_rate` column. Defaults to False.
     Returns:
-        pandas.DataFrame: The input DataFrame with an additional column `converted_to_bhd` 
-        containing the converted amounts in BHD.
+        pandas.DataFrame: The input DataFrame with an additional `converted_to_<code>` column per target
+        containing the converted amounts rounded to three decimal places, the `stale_rate` column and,
+        with `flag_latest`, the `latest_rate` column.
+    Raises:
+        requests.exceptions.HTTPError: If fetching a rate table fails.
+        CircuitOpenError: If the circuit breaker of the API is open and a date has no last good table.
+        KeyError: If a currency or a target currency is missing from the rate table of its date.
     """
     
-    new_df = df.copy()
-    new_df['converted_to_bhd'] = df.apply(lambda row: convert_currency('bhd', row['currency'], row['date'], row['amount']), axis=1)
-    return new_df
\ No newline at end of file
+    stale=np.zeros(len(df),dtype=bool)
+    latest=np.zeros(len(df),dtype=bool)
+    if conversion_cache is None:
+        converted,latest,stale=compute_conversions(df,targets)
+    else:
+        with timed_stage('cache_lookup',len(df)):
+            cache_keys={target:conversion_keys(df,target,RATE_SOURCE_VERSION) for target in targets}
+            converted={}
+            for target in targets:
+                converted[target],cached_latest=conversion_cache.get_many(cache_keys[target])
+                latest|=cached_latest
+        missing=np.zeros(len(df),dtype=bool)
+        for target in targets:
+            missing|=np.isnan(converted[target])
+        if missing.any():
+            computed,is_latest,is_stale=compute_conversions(df.iloc[np.flatnonzero(missing)],targets)
+            stale[missing]=is_stale
+            latest[missing]=is_latest
+            with timed_stage('cache_store',int(np.count_nonzero(~is_stale))):
+                for target in targets:
+                    converted[target][missing]=computed[target]
+                    conversion_cache.put_many(cache_keys[target][missing][~is_stale],computed[target][~is_stale],is_latest[~is_stale])
+    columns={f'converted_to_{target}':converted[target] for target in targets}
+    columns['stale_rate']=stale
+    if flag_latest:
+        columns['latest_rate']=latest
+    converted_df=df.copy(deep=False)
+    for name,values in columns.items():
+        converted_df[name]=values
+    return converted_df
+
+def collect_rate_metrics():
+    """
+    Reports the counters of the rate table caches, the conversion result cache, the circuit breaker
+    and the fetch coalescing to the metrics `registry` when `/metrics` is rendered.
+    Returns:
+        list of tuple: The (name, type, documentation, samples) of every reported metric.
+    """
+
+    cache_stats=[({'cache':'rate_table'},rate_table_cache.stats()),({'cache':'last_good_rate_table'},last_good_rate_tables.stats())]
+    metrics=[(f'rate_cache_{counter}_total','counter',f'Rate table cache {counter}.',[(labels,stats[counter]) for labels,stats in cache_stats])
+             for counter in ('hits','misses','evictions','expirations')]
+    metrics.append(('rate_cache_entries','gauge','Rate tables held by the cache.',[(labels,stats['size']) for labels,stats in cache_stats]))
+    if conversion_cache is not None:
+        stats=conversion_cache.stats()
+        metrics+=[('conversion_cache_hits_total','counter','Conversions answered from the conversion result cache.',[({},stats['hits'])]),
+                  ('conversion_cache_misses_total','counter','Conversions missing from the conversion result cache.',[({},stats['misses'])]),
+                  ('conversion_cache_hit_ratio','gauge','Share of the conversions answered from the conversion result cache.',[({},stats['hit_ratio'])]),
+                  ('conversion_cache_entries','gauge','Approximate number of conversions stored in the conversion result cache.',[({},stats['entries'])])]
+    stats=rate_fetch_breaker.stats()
+    metrics+=[('rate_breaker_state','gauge','1 for the current state of the currency API circuit breaker.',
+               [({'state':state},int(stats['state']==state)) for state in ('closed','open','half-open')]),
+              ('rate_breaker_opens_total','counter','Times the currency API circuit breaker opened.',[({},stats['opens'])]),
+              ('rate_breaker_rejections_total','counter','Rate fetches refused by the open circuit breaker.',[({},stats['rejections'])]),
+              ('rate_fetch_coalesced_calls_total','counter','Rate table loads run by a single flight leader.',[({},rate_fetch_flight.calls)]),
+              ('rate_fetch_coalesced_shared_total','counter','Rate table loads answered with the result of a load already in flight.',
+               [({'scope':'process'},rate_fetch_flight.shared)]+([({'scope':'spool'},rate_fetch_spool.shared)] if rate_fetch_spool is not None else []))]
+    if rate_fetch_spool is not None:
+        metrics.append(('rate_fetch_spool_lock_timeouts_total','counter','Rate table loads run without the spool lock after waiting for another worker.',[({},rate_fetch_spool.lock_timeouts)]))
+    return metrics
+
+registry.register_collector(collect_rate_metrics)
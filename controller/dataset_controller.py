@@ -1,190 +1,508 @@
+import os
+import threading
 import pandas as pd
 import json
-from pandantic import Pandantic
+import orjson
+import config
+import numpy as np
+from pydantic import ValidationError
 from model.model import TransactionModel
+from model.currency_registry import CURRENCY_DTYPE
+from controller.frame_validator import FrameValidator
+from controller.dataset_index import DatasetIndex,encode_cursor
+from controller.dataset_store import DatasetStore,dataset_columns,dataset_frame
+from controller.rollup_store import ROLLUP_SCHEMA,RollupStore,merge_rollups,summarize_rollup
+from controller.posted_store import POSTED_SCHEMA,PostedTransactionStore
+from controller.sqlite_database import SQLiteDatabase
+from controller.convert_currency_controller import dataframe_convert_currency
+from controller.metrics import timed_stage,stage_rows
 
 class DatasetController():
-    def get_default_dataset():
+    _default_dataset=None
+    _default_dataset_signature=None
+    _default_index=None
+    _default_dataset_lock=threading.Lock()
+    _rollup_database=SQLiteDatabase(config.CONVERSION_CACHE_PATH,ROLLUP_SCHEMA+POSTED_SCHEMA,config.SQLITE_BUSY_TIMEOUT,config.ROLLUP_LOCK_WAIT)
+    _default_rollup=RollupStore(_rollup_database,config.ROLLUP_REFRESH_INTERVAL)
+    _posted_store=PostedTransactionStore(_rollup_database,config.ROLLUP_REFRESH_INTERVAL) if config.CONVERSION_CACHE_PATH else None
+    _dataset_store=DatasetStore(config.DATASET_STORE_DIR) if config.DATASET_STORE_DIR else None
+    csv_dtype={'id': 'int64','description': 'string','amount': 'float64','currency':'string','date':'string'}
+
+    def get_dataset_signature(path):
+        """
+        Returns the version signature of a dataset file.
+        Args:
+            path (str): The path of the dataset file.
+        Returns:
+            tuple: The modification time in nanoseconds and the size in bytes of the file.
+        """
+
+        stat=os.stat(path)
+        return (stat.st_mtime_ns,stat.st_size)
+
+    def load_default_dataset():
         """
         Reads a CSV file containing transaction data, validates it against a schema, 
         and processes the data for further use.
         Returns:
             pandas.DataFrame: Transactions DataFrame containing the processed transaction data.
         Steps:
-            1. Reads the 'data/transactions.csv' file into a DataFrame with specified data types.
-            2. Validates the DataFrame against the TransactionModel schema using Pandantic.
-            3. Converts the 'currency' column values to lowercase.
-            4. Converts the 'date' column to datetime format.
+            1. Reads the `DEFAULT_DATASET_PATH` file into a DataFrame with specified data types.
+            2. Validates the DataFrame against the TransactionModel schema using the vectorized FrameValidator.
+            3. Converts the 'currency' column values to lowercase and the 'date' column to datetime format.
         Raises:
             ValidationError: If the DataFrame does not conform to the TransactionModel schema.
         """
 
-        validator = Pandantic(schema=TransactionModel)
-        dtype={'id': 'int64','description': 'string','amount': 'float64','currency':'string','date':'string'}
-        df=pd.read_csv('data/transactions.csv',dtype=dtype)
-        validator.validate(dataframe=df, errors="raise")
-        df['currency'].apply(lambda x: x.lower())
-        df['date'] = pd.to_datetime(df['date'])
+        with timed_stage('read_csv'):
+            df=pd.read_csv(config.DEFAULT_DATASET_PATH,dtype=DatasetController.csv_dtype)
+        stage_rows.inc(len(df),stage='read_csv')
+        with timed_stage('validate',len(df)):
+            FrameValidator.validate(df, errors="raise")
+        return DatasetController.normalize_dataset(df)
+
+    def normalize_dataset(df):
+        """
+        Converts the 'currency' column values of a validated transactions DataFrame to lowercase
+        categorical codes of the currency registry and the 'date' column to datetime format.
+        Args:
+            df (pandas.DataFrame): Validated transactions DataFrame with string 'currency' and 'date' columns.
+        Returns:
+            pandas.DataFrame: The transactions DataFrame ready for searching and conversion.
+        """
+
+        with timed_stage('normalize',len(df)):
+            df['currency'] = df['currency'].str.lower().astype(CURRENCY_DTYPE)
+            df['date'] = pd.to_datetime(df['date'])
         return df
-    
-    def get_json_dataset(json_data):
+
+    def is_default_dataset_large():
         """
-        Converts a JSON string containing transaction data into a pandas DataFrame.
+        Checks whether the default dataset is too large to be cached in memory.
+        Returns:
+            bool: True if `DEFAULT_DATASET_PATH` is larger than `DATASET_CHUNKED_THRESHOLD_BYTES`,
+                  in which case the endpoints read it in chunks through `iter_default_dataset`.
+        """
+
+        return os.path.getsize(config.DEFAULT_DATASET_PATH)>config.DATASET_CHUNKED_THRESHOLD_BYTES
+
+    def validate_chunk(df,chunk_number):
+        """
+        Validates a chunk of the default dataset against the TransactionModel schema.
         Args:
-            json_data (str): A JSON-formatted string containing transaction data. 
-                             The JSON object is expected to have a 'transactions' key 
-                             which maps to a list of transaction records.
+            df (pandas.DataFrame): The chunk to validate, indexed by row offset within the file.
+            chunk_number (int): The position of the chunk within the file, starting at 0.
         Returns:
-            pandas.DataFrame: Transactions DataFrame containing the transaction data with the following columns:
-                - 'description' (string): Description of the transaction.
-                - 'amount' (float64): Amount of the transaction.
-                - 'currency' (string): Currency of the transaction in small letters.
-                - 'date' (datetime64): Date of the transaction.
+            pandas.DataFrame: The validated chunk.
         Raises:
-            KeyError: If the 'transactions' key is missing in the JSON data.
-            ValueError: If the 'date' column cannot be converted to datetime format.
+            ValueError: If any row does not conform to the schema. The message names the chunk,
+                        the offsets of the failing data rows (0 based, header excluded) and the
+                        validation error of the first failing row.
         """
 
-        data = json.loads(json_data)
-        transactions = data['transactions']
-        df=pd.DataFrame(transactions)
-        df['description'] = df['description'].astype("string")
-        df['amount'] = df['amount'].astype("float64")
-        df['currency'] = df['currency'].astype("string")
-        df['date'] = pd.to_datetime(df['date'])
-        return df
+        with timed_stage('validate',len(df)):
+            invalid_rows=FrameValidator.invalid_rows(df)
+        if len(invalid_rows)==0:
+            return df
+        try:
+            TransactionModel.model_validate(df.loc[invalid_rows[0]].to_dict())
+            error=''
+        except ValidationError as e:
+            error=str(e)
+        raise ValueError(f"Chunk {chunk_number} failed validation at row offset(s) {', '.join(str(row) for row in invalid_rows[:10])}"
+                         f"{' ...' if len(invalid_rows)>10 else ''}: {error}")
 
-    
-    def search_by_id(df,id):
+    def iter_default_dataset(chunksize=None):
+        """
+        Reads the default dataset in chunks so files larger than memory can be processed.
+        Each chunk is validated against the TransactionModel schema and normalized before it is yielded,
+        so only one chunk of the file is held in memory at a time.
+        Args:
+            chunksize (int, optional): Number of rows per chunk. Defaults to `INGEST_CHUNK_SIZE`.
+        Yields:
+            pandas.DataFrame: Validated transactions chunks, indexed by row offset within the file.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
+        """
+
+        reader=pd.read_csv(config.DEFAULT_DATASET_PATH,dtype=DatasetController.csv_dtype,chunksize=chunksize or config.INGEST_CHUNK_SIZE)
+        with reader:
+            chunk_number=0
+            while True:
+                with timed_stage('read_csv'):
+                    chunk=next(reader,None)
+                if chunk is None:
+                    return
+                stage_rows.inc(len(chunk),stage='read_csv')
+                yield DatasetController.normalize_dataset(DatasetController.validate_chunk(chunk,chunk_number))
+                chunk_number+=1
+
+    def search_dataset(df,after=None,before=None,exceed=None,below=None,matching=None,currency=None,id=None):
         """
-        Search for rows in a DataFrame where the 'id' column matches the given value.
+        Filters a transactions DataFrame on all given criteria with one combined boolean mask.
         Args:
-            df (pandas.DataFrame): The DataFrame to search within.
-            id (int or str): The value to match in the 'id' column.
+            df (pandas.DataFrame): Transactions DataFrame to filter.
+            after (datetime-like, optional): Keep transactions dated after this date.
+            before (datetime-like, optional): Keep transactions dated before this date.
+            exceed (float, optional): Keep transactions with an amount greater than this value.
+            below (float, optional): Keep transactions with an amount less than this value.
+            matching (str, optional): Keep transactions whose description contains this term, ignoring case.
+            currency (str, optional): Keep transactions with this currency.
+            id (int, optional): Keep transactions with this id.
         Returns:
-            pandas.DataFrame: A DataFrame containing rows where the 'id' column matches the given value.
+            pandas.DataFrame: Transactions DataFrame containing the rows matching every given criterion.
         """
 
-        return df.query('`id` == @id')
-    
-    def search_before(df,date):
+        with timed_stage('filter',len(df)):
+            mask=np.ones(len(df),dtype=bool)
+            if after is not None:
+                mask&=(df['date']>pd.Timestamp(after)).to_numpy()
+            if before is not None:
+                mask&=(df['date']<pd.Timestamp(before)).to_numpy()
+            if exceed is not None:
+                mask&=(df['amount']>exceed).to_numpy()
+            if below is not None:
+                mask&=(df['amount']<below).to_numpy()
+            if currency is not None:
+                mask&=(df['currency']==currency.lower()).to_numpy(dtype=bool,na_value=False)
+            if id is not None:
+                mask&=(df['id']==id).to_numpy()
+            if matching is not None:
+                mask&=df['description'].str.contains(matching,case=False).to_numpy(dtype=bool,na_value=False)
+            return df[mask]
+
+    def iter_search_default_dataset(after=None,before=None,exceed=None,below=None,matching=None,currency=None,id=None,chunksize=None):
         """
-        Filters a DataFrame to return rows where the 'date' column is earlier than the specified date.
+        Searches the default dataset chunk by chunk, for files too large to be cached in memory.
         Args:
-            df (pandas.DataFrame): The DataFrame to filter. Must contain a 'date' column.
-            date (datetime-like): The date to compare against. Rows with 'date' values earlier than this will be returned.
+            after, before, exceed, below, matching, currency, id: The search criteria of `search_dataset`.
+            chunksize (int, optional): Number of rows read per chunk. Defaults to `INGEST_CHUNK_SIZE`.
+        Yields:
+            pandas.DataFrame: The non empty filtered chunks.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
+        """
+
+        for chunk in DatasetController.iter_default_dataset(chunksize):
+            filtered=DatasetController.search_dataset(chunk,after,before,exceed,below,matching,currency,id)
+            if len(filtered)>0:
+                yield filtered
+
+    def get_default_snapshot():
+        """
+        Returns the cached default dataset and its index, reloading both only when the file changed.
+        The parsed and validated DataFrame and its DatasetIndex are cached in-process together with
+        the modification time and size of `DEFAULT_DATASET_PATH`, so validation and index building
+        run once per file version instead of once per request. When rows were only appended to the
+        file, the description term index of the previous version is extended instead of rebuilt.
+        When `DATASET_STORE_DIR` is set, the frame and the index are memory-mapped from the shared
+        `DatasetStore` instead, so every worker process maps the same pages of one copy.
         Returns:
-            pandas.DataFrame: A filtered DataFrame containing rows where the 'date' column is earlier than the specified date.
+            tuple: The cached transactions DataFrame and the DatasetIndex built over it.
+        Raises:
+            ValidationError: If the DataFrame does not conform to the TransactionModel schema.
         """
 
-        return df.query('`date` < @date')
+        signature=DatasetController.get_dataset_signature(config.DEFAULT_DATASET_PATH)
+        with DatasetController._default_dataset_lock:
+            if DatasetController._default_dataset_signature!=signature:
+                if DatasetController._dataset_store is None:
+                    df,index=DatasetController.build_default_snapshot()
+                else:
+                    df,index=DatasetController._dataset_store.open(signature,DatasetController.build_default_snapshot)
+                DatasetController._default_index=index
+                DatasetController._default_dataset=df
+                DatasetController._default_dataset_signature=signature
+            return DatasetController._default_dataset,DatasetController._default_index
 
-    def search_after(df,date):
+    def freeze_dataset(df):
         """
-        Filters transactions DataFrame to include only rows where the 'date' column is greater than the specified date.
+        Rebuilds a DataFrame to cache over read only arrays, so a caller writing into a view of the cache
+        gets an error instead of changing the data of every request. The frame takes the layout of the
+        `DatasetStore` frames, whose arrays are mapped read only: descriptions are dictionary encoded, since
+        pandas writes into the buffer of a string column when slicing it.
         Args:
-            df (pandas.DataFrame): Transactions DataFrame to filter. It must contain a column named 'date'.
-             date (datetime or str): The date to compare against. Rows with a 'date' value greater than this will be included.
+            df (pandas.DataFrame): The normalized transactions DataFrame.
         Returns:
-            pandas.DataFrame: A filtered DataFrame containing rows where the 'date' column is greater than the specified date.
+            pandas.DataFrame: The transactions DataFrame over read only views of its arrays.
         """
 
-        return df.query('`date` > @date')
+        columns,descriptions=dataset_columns(df)
+        for array in columns.values():
+            array.flags.writeable=False
+        return dataset_frame(columns,descriptions)
 
-    def search_date_interval(df,after,before):
+    def build_default_snapshot():
+        """
+        Loads the default dataset and builds its index, extending the term index of the previous version when possible.
+        Returns:
+            tuple: The transactions DataFrame and its DatasetIndex.
+        Raises:
+            ValidationError: If the DataFrame does not conform to the TransactionModel schema.
         """
-        Filters transactions DataFrame to include only rows where the 'date' column falls 
-        within the specified interval (exclusive).
+
+        df=DatasetController.freeze_dataset(DatasetController.load_default_dataset())
+        with timed_stage('index',len(df)):
+            return df,DatasetIndex(df,DatasetController._default_index)
+
+    def get_default_dataset():
+        """
+        Returns the validated default transactions dataset, loading it only when the file changed.
+        Callers receive a shallow view of the cached frame: columns they add or replace only change
+        their view, and the arrays of the cached columns are read only.
+        Returns:
+            pandas.DataFrame: Transactions DataFrame containing the processed transaction data.
+        Raises:
+            ValidationError: If the DataFrame does not conform to the TransactionModel schema.
+        """
+
+        df,_=DatasetController.get_default_snapshot()
+        return df.copy(deep=False)
+
+    def search_default_dataset(after=None,before=None,exceed=None,below=None,matching=None,currency=None):
+        """
+        Searches the default dataset through its prebuilt DatasetIndex.
+        All criteria are combined into one set of row positions and the result frame is built once.
         Args:
-            df (pandas.DataFrame): Transaction DataFrame to filter. Must contain a 'date' column.
-            after (datetime-like): The lower bound of the date interval (exclusive).
-            before (datetime-like): The upper bound of the date interval (exclusive).
+            after (datetime-like, optional): Keep transactions dated after this date.
+            before (datetime-like, optional): Keep transactions dated before this date.
+            exceed (float, optional): Keep transactions with an amount greater than this value.
+            below (float, optional): Keep transactions with an amount less than this value.
+            matching (str, optional): Keep transactions whose description contains this term, ignoring case.
+            currency (str, optional): Keep transactions with this currency.
+        Returns:
+            pandas.DataFrame: Transactions DataFrame containing the rows matching every given criterion.
+        """
 
+        df,index=DatasetController.get_default_snapshot()
+        with timed_stage('filter',len(df)):
+            return df.take(index.search(after,before,exceed,below,matching,currency))
+
+    def search_default_dataset_by_id(id):
+        """
+        Looks up a transaction id in the default dataset through the sorted id index.
+        Args:
+            id (int): The transaction id to look up.
         Returns:
-            pandas.DataFrame: Filtered transactions DataFrame containing rows where the 'date' 
-            column is greater than `after` and less than `before`.
+            pandas.DataFrame: Transactions DataFrame containing the rows with the given id.
         """
-        
-        return df.query('@after < `date` < @before')
 
-    def search_by_term(df,search_term):
+        df,index=DatasetController.get_default_snapshot()
+        with timed_stage('filter',len(df)):
+            return df.take(index.positions_by_id(id))
+
+    def lookup_default_dataset(ids):
         """
-        Filters transactions DataFrame to return rows where the 'description' column contains the specified search term, 
-        ignoring case.
+        Looks up many transaction ids in the default dataset in one pass over the sorted id index.
         Args:
-            df (pandas.DataFrame): Transactions DataFrame to search within. It must have a column description 'description'.
-            search_term (str): The term to search for within the 'description' column.
+            ids (sequence of int): The transaction ids to look up.
         Returns:
-            pandas.DataFrame: Filtered transactions DataFrame containing rows where the 'description' column matches 
-            the search term.
+            pandas.DataFrame: Transactions DataFrame containing the rows of every found id, grouped by id in the order of `ids`.
         """
-        
-        return df.query('description.str.contains(@search_term,case=False)')
 
-    def search_more_than(df,amount):
+        df,index=DatasetController.get_default_snapshot()
+        with timed_stage('filter',len(df)):
+            return df.take(index.positions_by_ids(ids))
+
+    def lookup_dataset_chunks(chunks,ids):
         """
-        Filters a DataFrame to return rows where the 'amount' column has values greater than the specified amount.
+        Looks up many transaction ids in transactions read in chunks, for datasets too large to be cached in memory.
         Args:
-            df (pandas.DataFrame): Transactions to filter. It must contain a column named 'amount'.
-            amount (float or int): The threshold value to filter rows.
+            chunks (iterable of pandas.DataFrame): The transactions chunks.
+            ids (sequence of int): The transaction ids to look up.
         Returns:
-            pandas.DataFrame: Filtered transactions DataFrame containing rows where the 'amount' column is greater than the specified value.
+            pandas.DataFrame or None: Transactions DataFrame containing the rows of every found id, in file order,
+                or None if no chunk was read.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
         """
 
-        return df.query('`amount` > @amount')
+        matches=[]
+        for chunk in chunks:
+            with timed_stage('filter',len(chunk)):
+                matches.append(chunk[chunk['id'].isin(ids).to_numpy()])
+        return pd.concat(matches) if len(matches)>0 else None
 
-    def search_less_than(df,amount):
+    def page_default_dataset(limit,cursor=None,after=None,before=None,exceed=None,below=None,matching=None,currency=None):
         """
-        Filters transactions DataFrame to return rows where the 'amount' column is less than the specified value.
+        Returns one page of the default dataset in id order, optionally searched, through its prebuilt DatasetIndex.
+        Pages are ordered by (id, row position) and start after the keyset of the cursor, so they stay
+        stable while rows are appended to the file. Only the rows of the page are taken from the frame.
         Args:
-            df (pandas.DataFrame): Transactions DataFrame to filter. It must contain a column named 'amount'.
-            amount (float or int): The threshold value to filter rows.
+            limit (int): The maximum number of rows of the page.
+            cursor (tuple, optional): The (id, position) keyset decoded from the cursor of the previous page.
+            after, before, exceed, below, matching, currency: The search criteria of `search_default_dataset`.
         Returns:
-            pandas.DataFrame: Filtered transactions DataFrame containing rows where the 'amount' column is less than the specified value.
+            tuple: The transactions DataFrame of the page, and the cursor of the next page or None after the last page.
         """
-        
-        return df.query('`amount` < @amount')
-    
-    def search_between_amount(df,max,min):
+
+        df,index=DatasetController.get_default_snapshot()
+        with timed_stage('filter',len(df)):
+            positions=None
+            if any(criterion is not None for criterion in (after,before,exceed,below,matching,currency)):
+                positions=index.search(after,before,exceed,below,matching,currency)
+            page,more=index.page(limit,cursor,positions)
+            next_cursor=encode_cursor(int(index.ids[page[-1]]),int(page[-1])) if more else None
+            return df.take(page),next_cursor
+
+    def page_dataset_chunks(chunks,limit,cursor=None):
         """
-        Filters transactions DataFrame to return rows where the 'amount' column values 
-        are between the specified maximum and minimum values.
+        Returns one page in id order of transactions read in chunks, for datasets too large to be cached in memory.
+        Only the `limit` smallest keysets seen so far are kept between chunks, so memory is bounded by
+        the chunk size plus the page size.
         Args:
-            df (pandas.DataFrame): Transactions DataFrame to filter. Must contain a column named 'amount'.
-            max (float): The upper bound for the 'amount' column values.
-            min (float): The lower bound for the 'amount' column values.
+            chunks (iterable of pandas.DataFrame): The transactions chunks, indexed by row offset within the file.
+            limit (int): The maximum number of rows of the page.
+            cursor (tuple, optional): The (id, position) keyset decoded from the cursor of the previous page.
         Returns:
-            pandas.DataFrame: Filtered transactions DataFrame containing rows where the 'amount' 
-            column values are greater than 'min' and less than 'max'.
+            tuple: The transactions DataFrame of the page, and the cursor of the next page or None after the last page.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
         """
 
-        return df.query('@max > `amount` > @min')
+        kept=None
+        for chunk in chunks:
+            if cursor is not None:
+                ids,positions=chunk['id'].to_numpy(),chunk.index.to_numpy()
+                chunk=chunk[(ids>cursor[0])|((ids==cursor[0])&(positions>cursor[1]))]
+            kept=chunk if kept is None else pd.concat([kept,chunk])
+            kept=kept.iloc[np.lexsort((kept.index.to_numpy(),kept['id'].to_numpy()))[:limit+1]]
+        if kept is None or len(kept)<=limit:
+            return kept,None
+        page=kept.iloc[:limit]
+        return page,encode_cursor(int(page['id'].iloc[-1]),int(page.index[-1]))
 
-    def search_by_currency(df,currency):
+    def add_posted_transactions(converted):
         """
-        Filters transaction DataFrame to return rows where the 'currency' column matches the specified currency.
+        Stores a posted batch of converted transactions for the summaries of posted transactions.
+        Nothing is stored when `CONVERSION_CACHE_PATH` is empty.
         Args:
-            df (pandas.DataFrame): Transactions DataFrame to search within. It must contain a column named 'currency'.
-            currency (str): The currency value to search for. The search is case-insensitive.
+            converted (pandas.DataFrame): The posted transactions as returned by `dataframe_convert_currency`
+                with `flag_latest`, with the 'converted_to_bhd', 'stale_rate' and 'latest_rate' columns.
+        """
+
+        if DatasetController._posted_store is not None:
+            DatasetController._posted_store.add(converted)
+
+    def summarize_transactions(source='dataset',group_by=('date','currency'),after=None,before=None,currency=None):
+        """
+        Summarizes converted-to-BHD transactions from the daily rollups, kept in the `CONVERSION_CACHE_PATH`
+        database shared by the workers, or in the memory of the process when it is empty.
+        The rollup of the default dataset is brought up to date first: it is left as is while the file is
+        unchanged and only the appended rows are converted when rows were appended to the file. Large
+        files are read in chunks, so the rollup never needs the whole file in memory. In both rollups the
+        transactions converted with a stale or `@latest` fallback rate table are then converted again,
+        at most every `ROLLUP_REFRESH_INTERVAL` seconds.
+        Args:
+            source (str, optional): 'dataset' for the CSV transactions, 'posted' for the posted transactions
+                or 'all' for both. Defaults to 'dataset'.
+            group_by (sequence of str, optional): The grouping columns, 'date' and/or 'currency'.
+            after (datetime-like, optional): Keep days after this date.
+            before (datetime-like, optional): Keep days before this date.
+            currency (str, optional): Keep this currency.
         Returns:
-            pandas.DataFrame: Transactions DataFrame containing rows where the 'currency' column matches the specified currency.
+            pandas.DataFrame: One row per group with the 'count', 'total_bhd', 'min_bhd' and 'max_bhd' columns.
+        Raises:
+            ValueError: If a chunk of a large dataset does not conform to the TransactionModel schema,
+                or if posted transactions are requested while `CONVERSION_CACHE_PATH` is empty.
+            ValidationError: If the cached dataset does not conform to the TransactionModel schema.
         """
 
-        currency_lower=currency.lower()
-        return df.query('`currency`==@currency_lower')
+        if source!='dataset' and DatasetController._posted_store is None:
+            raise ValueError('Summaries of posted transactions require CONVERSION_CACHE_PATH')
+        if source!='posted':
+            if DatasetController.is_default_dataset_large():
+                read_chunks=DatasetController.iter_default_dataset
+            else:
+                read_chunks=lambda: [DatasetController.get_default_snapshot()[0]]
+            DatasetController._default_rollup.update(DatasetController.get_dataset_signature(config.DEFAULT_DATASET_PATH),read_chunks)
+            DatasetController._default_rollup.refresh(read_chunks)
+        if source=='dataset':
+            return DatasetController._default_rollup.summarize(group_by,after,before,currency)
+        DatasetController._posted_store.refresh(dataframe_convert_currency)
+        rollup=DatasetController._posted_store.rollup()
+        if source=='all':
+            rollup=merge_rollups(DatasetController._default_rollup.rollup(),rollup)
+        return summarize_rollup(rollup,group_by,after,before,currency)
     
-    def prepare_df_for_integration(df):
+    def get_json_dataset(json_data):
+        """
+        Converts a JSON string containing transaction data into a pandas DataFrame.
+        Args:
+            json_data (str): A JSON-formatted string containing transaction data. 
+                             The JSON object is expected to have a 'transactions' key 
+                             which maps to a list of transaction records.
+        Returns:
+            pandas.DataFrame: Transactions DataFrame containing the transaction data with the following columns:
+                - 'description' (string): Description of the transaction.
+                - 'amount' (float64): Amount of the transaction.
+                - 'currency' (category): Currency of the transaction in small letters, coded by the currency registry.
+                - 'date' (datetime64): Date of the transaction.
+        Raises:
+            KeyError: If the 'transactions' key is missing in the JSON data.
+            ValueError: If the 'date' column cannot be converted to datetime format.
         """
-        Prepares transactions DataFrame for integration by converting the 'date' column 
-        to a datetime object.
+
+        with timed_stage('parse_body'):
+            data = json.loads(json_data)
+            transactions = data['transactions']
+            df=pd.DataFrame(transactions)
+            df['description'] = df['description'].astype("string")
+            df['amount'] = df['amount'].astype("float64")
+            df['currency'] = df['currency'].astype(CURRENCY_DTYPE)
+            df['date'] = pd.to_datetime(df['date'])
+        stage_rows.inc(len(df),stage='parse_body')
+        return df
+
+    def get_bulk_dataset(raw_data):
+        """
+        Converts a raw JSON request body straight into a validated transactions DataFrame.
+        The body is parsed once with orjson and validated with the vectorized FrameValidator, so a batch
+        never goes through one Pydantic model per row. Two payload shapes are accepted:
+            - Rows: {"transactions": [{"id": ..., "description": ..., "amount": ..., "currency": ..., "date": ...}, ...]}
+            - Columns: {"id": [...], "description": [...], "amount": [...], "currency": [...], "date": [...]},
+              optionally wrapped in {"transactions": {...}}.
         Args:
-            df (pd.DataFrame): Transactions DataFrame containing a 'date' column 
-            with string values in the format '%Y-%m-%d'.
+            raw_data (bytes): The JSON request body.
         Returns:
-            pd.DataFrame: The modified transactions DataFrame with the 'date' column 
-            converted to datetime. Invalid parsing will result in NaT (Not a Time).
+            pandas.DataFrame: Transactions DataFrame with the same columns and types as `get_json_dataset`.
+        Raises:
+            ValueError: If the body is not valid JSON, has neither payload shape, has columns of different
+                        lengths, or any transaction does not conform to the TransactionModel schema.
         """
-        new_df=df.copy()
-        new_df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
-        return new_df
-        
\ No newline at end of file
+
+        with timed_stage('parse_body'):
+            try:
+                data=orjson.loads(raw_data)
+            except orjson.JSONDecodeError as e:
+                raise ValueError(f"Request body is not valid JSON: {e}")
+            if isinstance(data,dict) and 'transactions' in data:
+                data=data['transactions']
+            if isinstance(data,list) and all(isinstance(record,dict) for record in data):
+                df=pd.DataFrame.from_records(data)
+            elif isinstance(data,dict) and all(isinstance(column,list) for column in data.values()):
+                if len({len(column) for column in data.values()})>1:
+                    raise ValueError("All transaction columns must have the same length")
+                df=pd.DataFrame(data)
+            else:
+                raise ValueError("Request body must hold a list of transactions or a mapping of transaction columns")
+        stage_rows.inc(len(df),stage='parse_body')
+        if len(df)==0:
+            return df
+        with timed_stage('validate',len(df)):
+            invalid_rows=FrameValidator.invalid_rows(df)
+        if len(invalid_rows)>0:
+            try:
+                TransactionModel.model_validate(df.loc[invalid_rows[0]].to_dict())
+                error=''
+            except ValidationError as e:
+                error=str(e)
+            raise ValueError(f"Transaction(s) at position(s) {', '.join(str(row) for row in invalid_rows[:10])}"
+                             f"{' ...' if len(invalid_rows)>10 else ''} failed validation: {error}")
+        df=df[list(FrameValidator.columns)]
+        df['id'] = pd.to_numeric(df['id']).astype("int64")
+        df['description'] = df['description'].astype("string")
+        df['amount'] = pd.to_numeric(df['amount']).astype("float64")
+        df['currency'] = df['currency'].astype(CURRENCY_DTYPE)
+        df['date'] = FrameValidator.parse_dates(df)
+        return df
@@ -0,0 +1,296 @@
+import base64
+import numpy as np
+import pandas as pd
+from controller.term_index import TrigramIndex,TrigramSegment
+from model.currency_registry import CURRENCY_CODES,currency_id,encode_currencies
+
+# Array attributes of a DatasetIndex, besides the arrays of its term index segments.
+INDEX_ARRAYS=('id_order','sorted_ids','date_order','sorted_dates','amount_order','sorted_amounts','currency_order','currency_starts')
+
+def encode_cursor(id,position):
+    """
+    Encodes the keyset of the last row of a page as an opaque pagination cursor.
+    Args:
+        id (int): The transaction id of the row.
+        position (int): The row position within the dataset file, which orders rows sharing an id.
+    Returns:
+        str: The URL safe cursor.
+    """
+
+    return base64.urlsafe_b64encode(f'{id}:{position}'.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decodes a pagination cursor returned by `encode_cursor`.
+    Args:
+        cursor (str): The cursor.
+    Returns:
+        tuple: The (id, position) keyset of the last row of the previous page.
+    Raises:
+        ValueError: If the cursor was not returned by `encode_cursor`.
+    """
+
+    try:
+        id,position=base64.urlsafe_b64decode(cursor+'='*(-len(cursor)%4)).decode().split(':')
+        return int(id),int(position)
+    except ValueError:
+        raise ValueError('Invalid pagination cursor')
+
+class DatasetIndex():
+    """
+    DatasetIndex holds prebuilt lookup structures over a transactions DataFrame so searches
+    resolve to row positions without scanning the frame. Every structure but the descriptions is a
+    plain NumPy array, so the index can be written to disk and memory-mapped by `from_arrays`.
+    Attributes:
+        size (int): Number of rows in the indexed DataFrame.
+        ids (numpy.ndarray): The 'id' column, by row position.
+        id_order (numpy.ndarray): Row positions sorted by 'id'.
+        sorted_ids (numpy.ndarray): The 'id' column sorted ascending.
+        date_order (numpy.ndarray): Row positions sorted by 'date'.
+        sorted_dates (numpy.ndarray): The 'date' column sorted ascending (datetime64[ns]).
+        amount_order (numpy.ndarray): Row positions sorted by 'amount'.
+        sorted_amounts (numpy.ndarray): The 'amount' column sorted ascending.
+        currency_order (numpy.ndarray): Row positions sorted by currency registry id, then by position.
+        currency_starts (numpy.ndarray): Start of the positions of each currency registry id in
+            `currency_order`, followed by the number of rows.
+        descriptions (pandas.Series): The 'description' column, used to verify term matches.
+        term_index (TrigramIndex): Inverted trigram index over the lowercase 'description' column.
+    """
+
+    def __init__(self,df,previous=None):
+        """
+        Builds the index of a transactions DataFrame.
+        Args:
+            df (pandas.DataFrame): The transactions DataFrame to index.
+            previous (DatasetIndex, optional): The index of an earlier version of the dataset. When the
+                new rows were only appended to that version, its term index is extended instead of rebuilt.
+                Descriptions are compared as strings, since the version mapped from a DatasetStore holds
+                them as a Categorical.
+        """
+
+        self.size=len(df)
+        self.ids=df['id'].to_numpy(dtype='int64')
+        self.id_order=np.argsort(self.ids,kind='stable')
+        self.sorted_ids=self.ids[self.id_order]
+        dates=df['date'].to_numpy(dtype='datetime64[ns]')
+        self.date_order=np.argsort(dates,kind='stable')
+        self.sorted_dates=dates[self.date_order]
+        amounts=df['amount'].to_numpy(dtype='float64')
+        self.amount_order=np.argsort(amounts,kind='stable')
+        self.sorted_amounts=amounts[self.amount_order]
+        currency_ids=encode_currencies(df['currency'])
+        self.currency_order=np.argsort(currency_ids,kind='stable')
+        self.currency_starts=np.searchsorted(currency_ids[self.currency_order],np.arange(len(CURRENCY_CODES)+1))
+        self.descriptions=df['description'].reset_index(drop=True)
+        descriptions=self.descriptions.to_numpy(dtype=object)
+        if previous is not None and previous.size<=self.size and self.descriptions.iloc[:previous.size].astype('string').equals(previous.descriptions.astype('string')):
+            self.term_index=previous.term_index.extend(descriptions)
+        else:
+            self.term_index=TrigramIndex(descriptions)
+
+    def arrays(self):
+        """
+        Returns the arrays of the index, to be written to disk.
+        Returns:
+            dict: Maps the name of every array attribute, and of every array of the term index segments
+                  ('term_<segment>_<array>'), to its NumPy array.
+        """
+
+        arrays={name:getattr(self,name) for name in INDEX_ARRAYS}
+        for number,segment in enumerate(self.term_index.segments):
+            for name,array in segment.arrays().items():
+                arrays[f'term_{number}_{name}']=array
+        return arrays
+
+    @classmethod
+    def from_arrays(cls,df,arrays):
+        """
+        Rebuilds an index from the arrays returned by `arrays`, without copying them, so an index
+        memory-mapped from disk is shared by every process that maps it.
+        Args:
+            df (pandas.DataFrame): The indexed transactions DataFrame.
+            arrays (dict): The arrays of the index, by name.
+        Returns:
+            DatasetIndex: The index.
+        """
+
+        index=cls.__new__(cls)
+        index.size=len(df)
+        index.ids=df['id'].to_numpy(dtype='int64')
+        for name in INDEX_ARRAYS:
+            setattr(index,name,arrays[name])
+        index.descriptions=df['description'].reset_index(drop=True)
+        segments=[]
+        while f'term_{len(segments)}_codes' in arrays:
+            prefix=f'term_{len(segments)}_'
+            segments.append(TrigramSegment.from_arrays({name[len(prefix):]:array for name,array in arrays.items() if name.startswith(prefix)}))
+        index.term_index=TrigramIndex(None,segments)
+        return index
+
+    def positions_by_id(self,id):
+        """
+        Returns the row positions holding a transaction id.
+        Args:
+            id (int): The transaction id to look up.
+        Returns:
+            numpy.ndarray: Sorted row positions whose 'id' equals the given id.
+        """
+
+        start=np.searchsorted(self.sorted_ids,id,side='left')
+        end=np.searchsorted(self.sorted_ids,id,side='right')
+        return np.sort(self.id_order[start:end])
+
+    def positions_by_ids(self,ids):
+        """
+        Returns the row positions holding any of many transaction ids, bisecting the sorted ids once for all of them.
+        Args:
+            ids (sequence of int): The transaction ids to look up.
+        Returns:
+            numpy.ndarray: The row positions of every id, grouped by id in the order of `ids`, sorted within an id.
+        """
+
+        ids=np.asarray(ids,dtype='int64')
+        starts=np.searchsorted(self.sorted_ids,ids,side='left')
+        counts=np.searchsorted(self.sorted_ids,ids,side='right')-starts
+        offsets=np.repeat(starts-np.cumsum(counts)+counts,counts)+np.arange(counts.sum())
+        return self.id_order[offsets]
+
+    def id_rank(self,id,position):
+        """
+        Returns the number of rows preceding a keyset in (id, position) order, the order of `id_order`.
+        Args:
+            id (int): The transaction id of the keyset.
+            position (int): The row position of the keyset.
+        Returns:
+            int: The offset in `id_order` of the first row after the keyset.
+        """
+
+        start=np.searchsorted(self.sorted_ids,id,side='left')
+        end=np.searchsorted(self.sorted_ids,id,side='right')
+        return int(start+np.searchsorted(self.id_order[start:end],position,side='right'))
+
+    def page(self,limit,cursor=None,positions=None):
+        """
+        Returns one page of row positions in (id, position) order, the keyset order of paginated responses.
+        Without candidate positions the page is a slice of `id_order` found by bisection, so fetching any
+        page costs O(log n + limit). Candidate positions of a search are narrowed to the keysets after the
+        cursor and only the `limit` smallest ones are sorted.
+        Args:
+            limit (int): The maximum number of rows of the page.
+            cursor (tuple, optional): The (id, position) keyset of the last row of the previous page.
+                Defaults to the first page.
+            positions (numpy.ndarray, optional): Sorted candidate row positions, as returned by `search`.
+                Defaults to every row.
+        Returns:
+            tuple: The row positions of the page, and True if more candidate rows follow the page.
+        """
+
+        if positions is None:
+            start=0 if cursor is None else self.id_rank(*cursor)
+            return self.id_order[start:start+limit],start+limit<self.size
+        ids=self.ids[positions]
+        if cursor is not None:
+            after=(ids>cursor[0])|((ids==cursor[0])&(positions>cursor[1]))
+            positions,ids=positions[after],ids[after]
+        selected=np.arange(len(positions))
+        if len(positions)>limit:
+            boundary=np.partition(ids,limit-1)[limit-1]
+            kept=ids<boundary
+            kept[np.flatnonzero(ids==boundary)[:limit-np.count_nonzero(kept)]]=True
+            selected=np.flatnonzero(kept)
+        selected=selected[np.argsort(ids[selected],kind='stable')]
+        return positions[selected],len(positions)>limit
+
+    def positions_by_date(self,after=None,before=None):
+        """
+        Returns the row positions whose 'date' falls strictly between after and before.
+        Args:
+            after (datetime-like, optional): The exclusive lower bound.
+            before (datetime-like, optional): The exclusive upper bound.
+        Returns:
+            numpy.ndarray: Sorted row positions within the date interval.
+        """
+
+        start=0 if after is None else np.searchsorted(self.sorted_dates,np.datetime64(pd.Timestamp(after),'ns'),side='right')
+        end=self.size if before is None else np.searchsorted(self.sorted_dates,np.datetime64(pd.Timestamp(before),'ns'),side='left')
+        return np.sort(self.date_order[start:max(start,end)])
+
+    def positions_by_amount(self,exceed=None,below=None):
+        """
+        Returns the row positions whose 'amount' falls strictly between exceed and below.
+        Args:
+            exceed (float, optional): The exclusive lower bound.
+            below (float, optional): The exclusive upper bound.
+        Returns:
+            numpy.ndarray: Sorted row positions within the amount interval.
+        """
+
+        start=0 if exceed is None else np.searchsorted(self.sorted_amounts,exceed,side='right')
+        end=self.size if below is None else np.searchsorted(self.sorted_amounts,below,side='left')
+        return np.sort(self.amount_order[start:max(start,end)])
+
+    def positions_by_currency(self,currency):
+        """
+        Returns the row positions of a currency.
+        Args:
+            currency (str): The currency code, matched case-insensitively.
+        Returns:
+            numpy.ndarray: Sorted row positions whose 'currency' equals the given code.
+        """
+
+        code=currency_id(currency.lower())
+        if code<0:
+            return np.empty(0,dtype='int64')
+        return self.currency_order[self.currency_starts[code]:self.currency_starts[code+1]]
+
+    def filter_by_term(self,positions,search_term):
+        """
+        Keeps the row positions whose 'description' contains the search term, ignoring case.
+        The term index narrows the positions to candidates first, so the `str.contains` check
+        only runs on rows that hold every trigram of the term.
+        Args:
+            positions (numpy.ndarray): The candidate row positions.
+            search_term (str): The term to search for within the 'description' column.
+        Returns:
+            numpy.ndarray: The candidate positions whose description matches the search term.
+        """
+
+        candidates=self.term_index.candidates(search_term)
+        if candidates is not None:
+            positions=np.intersect1d(positions,candidates,assume_unique=True)
+        matches=self.descriptions.iloc[positions].str.contains(search_term,case=False).to_numpy(dtype=bool)
+        return positions[matches]
+
+    def search(self,after=None,before=None,exceed=None,below=None,matching=None,currency=None):
+        """
+        Resolves all search criteria to one intersection of row positions.
+        Range and currency criteria are answered from the sorted arrays and the currency map and
+        intersected starting from the smallest candidate set; the term filter only runs on the survivors.
+        Args:
+            after (datetime-like, optional): Keep rows dated after this date.
+            before (datetime-like, optional): Keep rows dated before this date.
+            exceed (float, optional): Keep rows with an amount greater than this value.
+            below (float, optional): Keep rows with an amount less than this value.
+            matching (str, optional): Keep rows whose description contains this term, ignoring case.
+            currency (str, optional): Keep rows with this currency.
+        Returns:
+            numpy.ndarray: Sorted row positions matching every given criterion.
+        """
+
+        candidates=[]
+        if after is not None or before is not None:
+            candidates.append(self.positions_by_date(after,before))
+        if exceed is not None or below is not None:
+            candidates.append(self.positions_by_amount(exceed,below))
+        if currency is not None:
+            candidates.append(self.positions_by_currency(currency))
+        if len(candidates)==0:
+            positions=np.arange(self.size)
+        else:
+            candidates.sort(key=len)
+            positions=candidates[0]
+            for candidate in candidates[1:]:
+                positions=np.intersect1d(positions,candidate,assume_unique=True)
+        if matching is not None:
+            positions=self.filter_by_term(positions,matching)
+        return positions
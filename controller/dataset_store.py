@@ -0,0 +1,157 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from controller.dataset_index import DatasetIndex
+from controller.single_flight import FileSingleFlight
+from model.currency_registry import CURRENCY_DTYPE
+
+# Prefix of the version directories and lock files of the store, so the store directory can be shared with other spools.
+VERSION_PREFIX='dataset-'
+
+def dataset_frame(columns,descriptions):
+    """
+    Builds a transactions DataFrame over column arrays without copying them.
+    Args:
+        columns (dict): The 'id', 'amount' and 'date' arrays, the 'currency' registry ids and the 'description' codes.
+        descriptions (pandas.Index): The distinct descriptions the 'description' codes point to.
+    Returns:
+        pandas.DataFrame: The transactions DataFrame, with categorical 'description' and 'currency' columns.
+    """
+
+    description_dtype=pd.CategoricalDtype(categories=pd.Index(descriptions,dtype='string'))
+    return pd.DataFrame({'id':columns['id'],
+                         'description':pd.Categorical.from_codes(columns['description'],dtype=description_dtype,validate=False),
+                         'amount':columns['amount'],
+                         'currency':pd.Categorical.from_codes(columns['currency'],dtype=CURRENCY_DTYPE,validate=False),
+                         'date':columns['date']},copy=False)
+
+def dataset_columns(df):
+    """
+    Returns the column arrays of a normalized transactions DataFrame, in the layout of `dataset_frame`.
+    Args:
+        df (pandas.DataFrame): The normalized transactions DataFrame.
+    Returns:
+        tuple: The dict of column arrays and the pandas.Index of the distinct descriptions.
+    """
+
+    descriptions=pd.Categorical(df['description'])
+    columns={'id':df['id'].to_numpy(dtype='int64'),
+             'amount':df['amount'].to_numpy(dtype='float64'),
+             'date':df['date'].to_numpy(dtype='datetime64[ns]'),
+             'currency':df['currency'].cat.codes.to_numpy(),
+             'description':descriptions.codes}
+    return columns,descriptions.categories
+
+def write_dataset_store(path,df,index):
+    """
+    Writes a validated transactions DataFrame and its DatasetIndex as memory-mappable column files.
+    Every column and index array is one '.npy' file. The 'currency' column is stored as currency registry
+    ids and the 'description' column is dictionary encoded: its codes are a column file and its distinct
+    values are listed in 'manifest.json'. Files are written to a temporary directory that is moved into
+    place once complete, so readers never map a partial version.
+    Args:
+        path (str): The directory of the version to write.
+        df (pandas.DataFrame): The normalized transactions DataFrame.
+        index (DatasetIndex): The index built over the DataFrame.
+    """
+
+    temporary_path=f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(temporary_path,ignore_errors=True)
+    os.makedirs(temporary_path)
+    columns,descriptions=dataset_columns(df)
+    arrays={f'column_{name}':column for name,column in columns.items()}
+    arrays.update({f'index_{name}':array for name,array in index.arrays().items()})
+    for name,array in arrays.items():
+        np.save(os.path.join(temporary_path,f'{name}.npy'),np.ascontiguousarray(array))
+    with open(os.path.join(temporary_path,'manifest.json'),'w') as manifest_file:
+        json.dump({'rows':len(df),'arrays':sorted(arrays),'descriptions':descriptions.tolist()},manifest_file)
+    os.replace(temporary_path,path)
+
+def read_dataset_store(path):
+    """
+    Maps a version written by `write_dataset_store` read only.
+    The numeric columns, the code columns and every index array are views of the mapped files, so
+    every process mapping the same version shares their pages; only the distinct descriptions are
+    held per process.
+    Args:
+        path (str): The directory of the version.
+    Returns:
+        tuple: The transactions DataFrame and its DatasetIndex.
+    """
+
+    with open(os.path.join(path,'manifest.json')) as manifest_file:
+        manifest=json.load(manifest_file)
+    arrays={name:np.load(os.path.join(path,f'{name}.npy'),mmap_mode='r') for name in manifest['arrays']}
+    df=dataset_frame({name[len('column_'):]:array for name,array in arrays.items() if name.startswith('column_')},manifest['descriptions'])
+    index_arrays={name[len('index_'):]:array for name,array in arrays.items() if name.startswith('index_')}
+    return df,DatasetIndex.from_arrays(df,index_arrays)
+
+class DatasetStore():
+    """
+    DatasetStore shares the default dataset and its index between worker processes through memory-mapped files.
+    Every version of the dataset file, identified by its signature, is written once to its own directory
+    of column files by the first worker that needs it, while the other workers wait on its lock file and
+    then map the same files. Mapped pages are shared by all workers, so adding workers does not add
+    copies of the dataset. When a new version is written, versions older than the one it replaces are
+    deleted; the replaced version is kept for the workers still opening it, and workers mapping a
+    deleted version keep their pages until they move to the new one. Lock and spool files are never
+    deleted, so waiting workers always lock the same file, and only entries named with
+    `VERSION_PREFIX` are touched, so the directory can be shared with other spools.
+    Lock files rely on fcntl, so the store is only available on POSIX systems.
+    Attributes:
+        directory (str): The store directory, shared by the workers.
+    """
+
+    def __init__(self,directory):
+        self.directory=directory
+        self._flight=FileSingleFlight(directory)
+
+    def version_path(self,signature):
+        """
+        Returns the directory of a dataset version.
+        Args:
+            signature (tuple): The version signature of the dataset file.
+        Returns:
+            str: The directory holding the column files of the version.
+        """
+
+        return os.path.join(self.directory,VERSION_PREFIX+'-'.join(str(part) for part in signature))
+
+    def open(self,signature,build):
+        """
+        Maps a dataset version, writing it first if no worker wrote it yet.
+        Args:
+            signature (tuple): The version signature of the dataset file.
+            build (callable): Returns the validated DataFrame and its DatasetIndex, called only by the worker writing the version.
+        Returns:
+            tuple: The memory-mapped transactions DataFrame and its DatasetIndex.
+        Raises:
+            ValidationError: If `build` finds that the dataset does not conform to the TransactionModel schema.
+        """
+
+        path=self.version_path(signature)
+        name=os.path.basename(path)
+        def write():
+            if not os.path.exists(os.path.join(path,'manifest.json')):
+                write_dataset_store(path,*build())
+            self.prune(name)
+            return path
+        self._flight.do(name,write,lambda written: float('inf') if os.path.exists(os.path.join(written,'manifest.json')) else 0)
+        return read_dataset_store(path)
+
+    def prune(self,current):
+        """
+        Deletes the version directories older than the current one and the version it replaces.
+        Args:
+            current (str): The directory name of the current version.
+        """
+
+        versions=[]
+        for entry in os.listdir(self.directory):
+            entry_path=os.path.join(self.directory,entry)
+            if entry!=current and entry.startswith(VERSION_PREFIX) and not entry.endswith('.tmp') and os.path.isdir(entry_path):
+                versions.append((os.path.getmtime(entry_path),entry_path))
+        for _,entry_path in sorted(versions,reverse=True)[1:]:
+            shutil.rmtree(entry_path,ignore_errors=True)
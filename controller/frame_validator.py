@@ -0,0 +1,117 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from model.model import TransactionModel
+from model.currency_registry import CURRENCIES
+
+class FrameValidator():
+    """
+    FrameValidator validates a transactions DataFrame against the TransactionModel rules column by column.
+    Each rule is one vectorized check over a whole column, so validation costs columns x rows array
+    operations instead of one Pydantic model per row. Rows whose date is not written as YYYY-MM-DD, or
+    whose columns do not have the expected dtypes, are handed to TransactionModel itself so the accept
+    and reject decisions stay identical to the model.
+    """
+
+    currencies=CURRENCIES
+    columns=('id','description','amount','currency','date')
+    earliest_invalid_date=pd.Timestamp(date(2024,3,31))
+
+    def model_rejects(df,rows):
+        """
+        Validates rows one by one with TransactionModel.
+        Args:
+            df (pandas.DataFrame): The transactions DataFrame.
+            rows (pandas.Index): Labels of the rows to validate.
+        Returns:
+            pandas.Index: Labels of the rows TransactionModel rejects.
+        """
+
+        rejected=[]
+        for row,record in df.loc[rows].to_dict('index').items():
+            try:
+                TransactionModel.model_validate(record)
+            except ValueError:
+                rejected.append(row)
+        return pd.Index(rejected,dtype=df.index.dtype)
+
+    def invalid_rows(df):
+        """
+        Returns the labels of the rows that do not conform to the TransactionModel schema.
+        Checks performed per column:
+            - 'id': Integer dtype.
+            - 'description': String values that are not missing.
+            - 'amount': Float or integer dtype.
+            - 'currency': Membership in the supported currency codes through `isin`.
+            - 'date': YYYY-MM-DD strings parsed at once and compared with the 2024-03-31 bound in one array comparison.
+        Args:
+            df (pandas.DataFrame): The transactions DataFrame to validate, as read from CSV.
+        Returns:
+            pandas.Index: Labels of the failing rows, in frame order.
+        """
+
+        if any(column not in df.columns for column in FrameValidator.columns):
+            return df.index
+        valid=np.ones(len(df),dtype=bool)
+        undecided=np.zeros(len(df),dtype=bool)
+        if not pd.api.types.is_integer_dtype(df['id']):
+            undecided[:]=True
+        if not (pd.api.types.is_float_dtype(df['amount']) or pd.api.types.is_integer_dtype(df['amount'])):
+            undecided[:]=True
+        description=df['description']
+        if pd.api.types.is_string_dtype(description):
+            valid&=description.notna().to_numpy()
+        else:
+            undecided[:]=True
+        currency=df['currency']
+        valid&=currency.isin(FrameValidator.currencies).to_numpy(dtype=bool,na_value=False)
+        dates=df['date'].astype('string')
+        canonical=dates.str.fullmatch(r'\d{4}-\d{2}-\d{2}').to_numpy(dtype=bool,na_value=False)
+        parsed=pd.to_datetime(dates.where(canonical),format='%Y-%m-%d',errors='coerce')
+        parsed_ok=parsed.notna().to_numpy()
+        undecided|=~parsed_ok&dates.notna().to_numpy()
+        valid&=(parsed>FrameValidator.earliest_invalid_date).to_numpy(dtype=bool)|undecided
+        invalid=df.index[~valid]
+        to_model=df.index[undecided&valid]
+        if len(to_model)>0:
+            invalid=invalid.append(FrameValidator.model_rejects(df,to_model))
+            invalid=df.index[df.index.isin(invalid)]
+        return invalid
+
+    def parse_dates(df):
+        """
+        Converts the 'date' column of a validated transactions DataFrame to datetime.
+        YYYY-MM-DD strings are parsed at once; any other representation accepted by TransactionModel
+        is parsed by the model so the resulting date is the one the model would produce.
+        Args:
+            df (pandas.DataFrame): A transactions DataFrame that passed validation.
+        Returns:
+            pandas.Series: The 'date' column as datetime64[ns].
+        """
+
+        dates=df['date'].astype('string')
+        canonical=dates.str.fullmatch(r'\d{4}-\d{2}-\d{2}').to_numpy(dtype=bool,na_value=False)
+        parsed=pd.to_datetime(dates.where(canonical),format='%Y-%m-%d',errors='coerce')
+        for row,record in df.loc[parsed.isna()].to_dict('index').items():
+            parsed[row]=pd.Timestamp(TransactionModel.model_validate(record).date)
+        return parsed
+
+    def validate(df,errors="raise"):
+        """
+        Validates a transactions DataFrame against the TransactionModel schema.
+        Args:
+            df (pandas.DataFrame): The transactions DataFrame to validate.
+            errors (str, optional): "raise" to raise on the first failing row, or "skip" to drop failing rows.
+                Defaults to "raise".
+        Returns:
+            pandas.DataFrame: The DataFrame, without the failing rows if errors is "skip".
+        Raises:
+            ValidationError: The TransactionModel error of the first failing row, if errors is "raise".
+        """
+
+        invalid=FrameValidator.invalid_rows(df)
+        if len(invalid)==0:
+            return df
+        if errors=="raise":
+            TransactionModel.model_validate(df.loc[invalid[0]].to_dict())
+        return df.drop(index=invalid)
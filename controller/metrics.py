@@ -0,0 +1,259 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets.
+LATENCY_BUCKETS=(0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5,5.0,10.0,30.0)
+
+def escape_label_value(value):
+    """
+    Escapes a label value for the Prometheus text format.
+    Args:
+        value (Any): The label value.
+    Returns:
+        str: The value with backslashes, double quotes and line feeds escaped.
+    """
+
+    return str(value).replace('\\','\\\\').replace('"','\\"').replace('\n','\\n')
+
+def format_labels(labels):
+    """
+    Formats label pairs in the Prometheus text format.
+    Args:
+        labels (iterable of tuple): The (name, value) label pairs.
+    Returns:
+        str: The labels as '{name="value",...}', or an empty string without labels.
+    """
+
+    pairs=[f'{name}="{escape_label_value(value)}"' for name,value in labels]
+    return '{'+','.join(pairs)+'}' if len(pairs)>0 else ''
+
+def format_value(value):
+    """
+    Formats a sample value in the Prometheus text format.
+    Args:
+        value (float): The sample value.
+    Returns:
+        str: The value, integers without a decimal part.
+    """
+
+    if value==float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter():
+    """
+    Counter is a monotonically increasing count, one per combination of label values.
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text of the metric.
+        labelnames (tuple of str): The label names, in order.
+    """
+
+    def __init__(self,name,documentation,labelnames=()):
+        self.name=name
+        self.documentation=documentation
+        self.labelnames=tuple(labelnames)
+        self._values={}
+        self._lock=threading.Lock()
+
+    def inc(self,amount=1,**labels):
+        """
+        Increments the count of a combination of label values.
+        Args:
+            amount (float, optional): The increment. Defaults to 1.
+            **labels: The value of every label.
+        """
+
+        key=tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key]=self._values.get(key,0)+amount
+
+    def render(self):
+        """
+        Renders the counter in the Prometheus text format.
+        Returns:
+            list of str: The HELP, TYPE and sample lines.
+        """
+
+        with self._lock:
+            values=sorted(self._values.items())
+        lines=[f'# HELP {self.name} {self.documentation}',f'# TYPE {self.name} counter']
+        for key,value in values:
+            lines.append(f'{self.name}{format_labels(zip(self.labelnames,key))} {format_value(value)}')
+        return lines
+
+class Histogram():
+    """
+    Histogram counts observations in cumulative buckets, one set of buckets per combination of label values.
+    Observing a value costs a bisection over the bucket bounds under a lock, so histograms can wrap
+    every stage of every request.
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text of the metric.
+        labelnames (tuple of str): The label names, in order.
+        buckets (tuple of float): The upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(self,name,documentation,labelnames=(),buckets=LATENCY_BUCKETS):
+        self.name=name
+        self.documentation=documentation
+        self.labelnames=tuple(labelnames)
+        self.buckets=tuple(buckets)
+        self._values={}
+        self._lock=threading.Lock()
+
+    def observe(self,value,**labels):
+        """
+        Records an observation.
+        Args:
+            value (float): The observed value.
+            **labels: The value of every label.
+        """
+
+        key=tuple(labels[name] for name in self.labelnames)
+        position=bisect.bisect_left(self.buckets,value)
+        with self._lock:
+            counts=self._values.get(key)
+            if counts is None:
+                counts=self._values[key]=[[0]*(len(self.buckets)+1),0.0,0]
+            counts[0][position]+=1
+            counts[1]+=value
+            counts[2]+=1
+
+    @contextmanager
+    def time(self,**labels):
+        """
+        Observes the number of seconds spent in a `with` block, also when it raises.
+        Args:
+            **labels: The value of every label.
+        """
+
+        start=time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter()-start,**labels)
+
+    def render(self):
+        """
+        Renders the histogram in the Prometheus text format.
+        Returns:
+            list of str: The HELP, TYPE, bucket, sum and count lines.
+        """
+
+        with self._lock:
+            values=sorted((key,(list(counts[0]),counts[1],counts[2])) for key,counts in self._values.items())
+        lines=[f'# HELP {self.name} {self.documentation}',f'# TYPE {self.name} histogram']
+        for key,(bucket_counts,total,count) in values:
+            labels=list(zip(self.labelnames,key))
+            cumulative=0
+            for bound,bucket_count in zip(self.buckets+(float('inf'),),bucket_counts):
+                cumulative+=bucket_count
+                lines.append(f"{self.name}_bucket{format_labels(labels+[('le',format_value(bound))])} {cumulative}")
+            lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(total)}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {count}')
+        return lines
+
+class MetricsRegistry():
+    """
+    MetricsRegistry holds the metrics of the process and renders them for the `/metrics` endpoint.
+    Besides counters and histograms, collectors report values read from other components (cache,
+    circuit breaker and fetch coalescing counters) when the metrics are rendered, so those components
+    do not need to know about the registry.
+    """
+
+    def __init__(self):
+        self._metrics=[]
+        self._collectors=[]
+        self._lock=threading.Lock()
+
+    def counter(self,name,documentation,labelnames=()):
+        """
+        Creates and registers a counter.
+        Args:
+            name (str): The metric name, ending with '_total'.
+            documentation (str): The help text of the metric.
+            labelnames (sequence of str, optional): The label names. Defaults to no label.
+        Returns:
+            Counter: The registered counter.
+        """
+
+        counter=Counter(name,documentation,labelnames)
+        with self._lock:
+            self._metrics.append(counter)
+        return counter
+
+    def histogram(self,name,documentation,labelnames=(),buckets=LATENCY_BUCKETS):
+        """
+        Creates and registers a histogram.
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text of the metric.
+            labelnames (sequence of str, optional): The label names. Defaults to no label.
+            buckets (sequence of float, optional): The bucket upper bounds. Defaults to LATENCY_BUCKETS.
+        Returns:
+            Histogram: The registered histogram.
+        """
+
+        histogram=Histogram(name,documentation,labelnames,buckets)
+        with self._lock:
+            self._metrics.append(histogram)
+        return histogram
+
+    def register_collector(self,collector):
+        """
+        Registers a collector called every time the metrics are rendered.
+        Args:
+            collector (callable): Returns a list of (name, type, documentation, samples) tuples, where type is
+                'gauge' or 'counter' and samples is a list of (labels dict, value) pairs.
+        """
+
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """
+        Renders every metric and collected value in the Prometheus text exposition format (version 0.0.4).
+        Returns:
+            str: The metrics, one sample per line.
+        """
+
+        with self._lock:
+            metrics=list(self._metrics)
+            collectors=list(self._collectors)
+        lines=[]
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name,metric_type,documentation,samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels,value in samples:
+                    lines.append(f'{name}{format_labels(labels.items())} {format_value(value)}')
+        return '\n'.join(lines)+'\n'
+
+registry=MetricsRegistry()
+stage_seconds=registry.histogram('conversion_pipeline_stage_seconds','Seconds spent in each stage of the transactions pipeline.',('stage',))
+stage_rows=registry.counter('conversion_pipeline_rows_total','Rows processed by each stage of the transactions pipeline.',('stage',))
+rate_fetch_seconds=registry.histogram('rate_fetch_seconds','Seconds per currency API request, by outcome.',('outcome',))
+rate_fetches=registry.counter('rate_fetches_total','Currency API requests, by outcome.',('outcome',))
+request_seconds=registry.histogram('http_request_seconds','Seconds spent handling requests, by route and status code.',('route','method','status'))
+
+@contextmanager
+def timed_stage(stage,rows=None):
+    """
+    Observes the seconds spent in a `with` block in the stage histogram, and counts the rows it processed.
+    Args:
+        stage (str): The name of the pipeline stage.
+        rows (int, optional): The number of rows processed by the stage, when known before it runs.
+    """
+
+    start=time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter()-start,stage=stage)
+        if rows is not None:
+            stage_rows.inc(rows,stage=stage)
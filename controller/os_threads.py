@@ -0,0 +1,44 @@
+import importlib
+
+def original(module_name,attribute):
+    """
+    Returns a module attribute as it was before gevent monkey patching.
+    In the gevent serving mode the threading primitives are patched to work on greenlets; code that
+    must hold per OS thread state, or run on a real OS thread, uses the original ones instead.
+    Args:
+        module_name (str): The name of the module (e.g., '_thread').
+        attribute (str): The name of the attribute.
+    Returns:
+        Any: The unpatched attribute, or the attribute as is when gevent is not installed or did not patch it.
+    """
+
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module_name),attribute)
+    return monkey.get_original(module_name,attribute)
+
+def os_thread_id():
+    """
+    Returns the identifier of the current OS thread, which is the key of `sys._current_frames()`.
+    Returns:
+        int: The OS thread identifier, shared by every greenlet of the thread in the gevent serving mode.
+    """
+
+    return original('_thread','get_ident')()
+
+def current_greenlet():
+    """
+    Returns the current greenlet when gevent patched the threading module.
+    Returns:
+        greenlet.greenlet or None: The current greenlet, or None outside the gevent serving mode.
+    """
+
+    try:
+        from gevent import monkey
+    except ImportError:
+        return None
+    if not monkey.is_module_patched('threading'):
+        return None
+    import greenlet
+    return greenlet.getcurrent()
@@ -0,0 +1,108 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from controller.rollup_store import rollup_table,read_rollup
+
+# Statements creating the tables of the posted transactions and of their rollup.
+POSTED_SCHEMA=('CREATE TABLE IF NOT EXISTS posted_transactions (id INTEGER PRIMARY KEY, date INTEGER NOT NULL, currency TEXT NOT NULL, amount REAL NOT NULL, amount_bhd REAL NOT NULL, stale INTEGER NOT NULL)',
+               'CREATE INDEX IF NOT EXISTS posted_transactions_group ON posted_transactions (date,currency)',
+               'CREATE INDEX IF NOT EXISTS posted_transactions_stale ON posted_transactions (stale) WHERE stale=1',
+               rollup_table('posted_rollup'),
+               'CREATE TEMP TABLE IF NOT EXISTS posted_incoming (id INTEGER PRIMARY KEY, date INTEGER NOT NULL, currency TEXT NOT NULL, amount REAL NOT NULL, amount_bhd REAL NOT NULL, stale INTEGER NOT NULL)')
+
+class PostedTransactionStore():
+    """
+    PostedTransactionStore keeps the transactions posted to the API with their converted-to-BHD amounts
+    in a database shared by every worker process, keyed by transaction id so posting a transaction again
+    replaces it instead of counting it twice. The `posted_rollup` table holds their daily aggregates, one
+    row per (date, currency), and is updated in the same transaction as the transactions, so summaries
+    read the rollup instead of aggregating the transactions.
+    Transactions converted with a stale or `@latest` fallback rate table are flagged, and converted again
+    by `refresh` until a fresh rate table is available, like the groups of the dataset `RollupStore`.
+    Attributes:
+        database (SQLiteDatabase): The database holding the transactions and their rollup.
+        refresh_interval (float): Minimum seconds between two refreshes of this process.
+    """
+
+    def __init__(self,database,refresh_interval):
+        self.database=database
+        self.refresh_interval=refresh_interval
+        self._refreshed_at=None
+        self._lock=threading.Lock()
+
+    def add(self,converted):
+        """
+        Stores converted transactions and folds them into the rollup, replacing the transactions posted
+        before with the same ids. The replaced transactions are subtracted from their groups first; the
+        minimum and maximum of a group are recomputed from its transactions only when a replaced
+        transaction held one of them.
+        Args:
+            converted (pandas.DataFrame): Transactions with 'id', 'date', 'currency', 'amount', 'converted_to_bhd',
+                'stale_rate' and 'latest_rate' columns, as returned by `dataframe_convert_currency` with `flag_latest`.
+        """
+
+        if len(converted)==0:
+            return
+        converted=converted.drop_duplicates('id',keep='last')
+        rows=list(zip(converted['id'].to_numpy(dtype='int64').tolist(),
+                      converted['date'].to_numpy(dtype='datetime64[ns]').view('int64').tolist(),
+                      converted['currency'].astype('string').str.lower().tolist(),
+                      converted['amount'].to_numpy(dtype='float64').tolist(),
+                      converted['converted_to_bhd'].to_numpy(dtype='float64').tolist(),
+                      (converted['stale_rate'].to_numpy()|converted['latest_rate'].to_numpy()).astype('int64').tolist()))
+        with self.database.transaction() as connection:
+            connection.execute('DELETE FROM posted_incoming')
+            connection.executemany('INSERT INTO posted_incoming (id,date,currency,amount,amount_bhd,stale) VALUES (?,?,?,?,?,?)',rows)
+            removed=connection.execute('SELECT p.date,p.currency,COUNT(*),SUM(p.amount_bhd),MIN(p.amount_bhd),MAX(p.amount_bhd),SUM(p.stale),r.min_bhd,r.max_bhd '
+                                       'FROM posted_transactions p JOIN posted_incoming i ON i.id=p.id '
+                                       'JOIN posted_rollup r ON r.date=p.date AND r.currency=p.currency GROUP BY p.date,p.currency').fetchall()
+            connection.executemany('UPDATE posted_rollup SET count=count-?,total_bhd=total_bhd-?,stale=stale-? WHERE date=? AND currency=?',
+                                   [(count,total,stale,date,currency) for date,currency,count,total,_,_,stale,_,_ in removed])
+            connection.execute('INSERT OR REPLACE INTO posted_transactions (id,date,currency,amount,amount_bhd,stale) SELECT id,date,currency,amount,amount_bhd,stale FROM posted_incoming')
+            added=connection.execute('SELECT date,currency,COUNT(*),SUM(amount_bhd),MIN(amount_bhd),MAX(amount_bhd),SUM(stale) FROM posted_incoming GROUP BY date,currency').fetchall()
+            connection.executemany('INSERT INTO posted_rollup (date,currency,count,total_bhd,min_bhd,max_bhd,stale) VALUES (?,?,?,?,?,?,?) '
+                                   'ON CONFLICT (date,currency) DO UPDATE SET count=count+excluded.count,total_bhd=total_bhd+excluded.total_bhd,'
+                                   'min_bhd=MIN(min_bhd,excluded.min_bhd),max_bhd=MAX(max_bhd,excluded.max_bhd),stale=stale+excluded.stale',added)
+            connection.execute('DELETE FROM posted_rollup WHERE count<=0')
+            bounds=[(date,currency) for date,currency,_,_,minimum,maximum,_,group_minimum,group_maximum in removed
+                    if minimum<=group_minimum or maximum>=group_maximum]
+            connection.executemany('UPDATE posted_rollup SET min_bhd=(SELECT MIN(amount_bhd) FROM posted_transactions WHERE date=?1 AND currency=?2),'
+                                   'max_bhd=(SELECT MAX(amount_bhd) FROM posted_transactions WHERE date=?1 AND currency=?2) WHERE date=?1 AND currency=?2',bounds)
+            connection.execute('DELETE FROM posted_incoming')
+
+    def refresh(self,convert):
+        """
+        Converts the transactions flagged stale again and stores the new amounts.
+        Runs at most once every `refresh_interval` seconds in a process.
+        Args:
+            convert (callable): Converts a transactions DataFrame to BHD like `dataframe_convert_currency`,
+                called with `flag_latest`.
+        Raises:
+            requests.exceptions.HTTPError: If fetching a rate table fails.
+            KeyError: If a currency is missing from the rate table of its date.
+        """
+
+        with self._lock:
+            now=time.monotonic()
+            if self._refreshed_at is not None and now-self._refreshed_at<self.refresh_interval:
+                return
+            self._refreshed_at=now
+        with self.database.connection() as connection:
+            rows=connection.execute('SELECT id,date,currency,amount FROM posted_transactions WHERE stale=1').fetchall()
+        if len(rows)==0:
+            return
+        ids,dates,currencies,amounts=zip(*rows)
+        stale=pd.DataFrame({'id':np.array(ids,dtype='int64'),'date':np.array(dates,dtype='int64').view('datetime64[ns]'),
+                            'currency':pd.array(currencies,dtype='string'),'amount':np.array(amounts,dtype='float64')})
+        self.add(convert(stale,flag_latest=True))
+
+    def rollup(self):
+        """
+        Reads the rollup of the posted transactions.
+        Returns:
+            pandas.DataFrame: The aggregates indexed by ('date', 'currency'), in the layout of `empty_rollup`.
+        """
+
+        with self.database.connection() as connection:
+            return read_rollup(connection,'posted_rollup')
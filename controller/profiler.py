@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from controller.os_threads import original
+
+def frame_name(frame):
+    """
+    Names a stack frame for collapsed stacks.
+    Args:
+        frame (frame): The stack frame.
+    Returns:
+        str: 'function (file:first line)', without the ';' that separates frames in collapsed stacks.
+    """
+
+    code=frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';',':')
+
+class SamplingProfiler():
+    """
+    SamplingProfiler samples the call stack of one thread at a fixed interval from a background thread.
+    The profiled thread runs unchanged, no trace function is installed. The cost is one stack walk per
+    interval, so requests can be profiled in production. Samples are aggregated as collapsed stacks, the
+    'root;caller;callee count' lines read by flamegraph.pl and speedscope.
+    The sampler always runs on a real OS thread with the unpatched sleep, so it keeps sampling in the
+    gevent serving mode while the profiled greenlet computes without yielding. In that mode a greenlet
+    is profiled too: its stack is read from the OS thread while it runs, and from the greenlet while
+    it waits, so the profile holds its wall clock time like in the sync mode.
+    Attributes:
+        thread_id (int): The identifier of the OS thread running the profiled code.
+        interval (float): Seconds between two samples.
+        greenlet (greenlet.greenlet or None): The profiled greenlet in the gevent serving mode.
+        samples (collections.Counter): Number of samples per collapsed stack.
+    """
+
+    def __init__(self,thread_id,interval,greenlet=None):
+        self.thread_id=thread_id
+        self.interval=interval
+        self.greenlet=greenlet
+        self.samples=Counter()
+        self._stopped=False
+        self._finished=original('_thread','allocate_lock')()
+
+    def current_frame(self):
+        """
+        Returns the innermost frame of the profiled code.
+        Returns:
+            frame or None: The frame the profiled greenlet is suspended in, otherwise the frame running
+                           in the profiled OS thread, or None if the thread finished.
+        """
+
+        if self.greenlet is not None:
+            frame=self.greenlet.gr_frame
+            if frame is not None:
+                return frame
+        return sys._current_frames().get(self.thread_id)
+
+    def sample(self):
+        """
+        Records the current stack of the profiled code, if it is still running.
+        """
+
+        frame=self.current_frame()
+        stack=[]
+        while frame is not None:
+            stack.append(frame_name(frame))
+            frame=frame.f_back
+        if len(stack)>0:
+            self.samples[';'.join(reversed(stack))]+=1
+
+    def run(self):
+        """
+        Samples the profiled code every `interval` seconds until `stop` is called.
+        """
+
+        sleep=original('time','sleep')
+        try:
+            while True:
+                sleep(self.interval)
+                if self._stopped:
+                    return
+                self.sample()
+        finally:
+            self._finished.release()
+
+    def start(self):
+        """
+        Starts sampling in a new OS thread.
+        """
+
+        self._finished.acquire()
+        original('_thread','start_new_thread')(self.run,())
+
+    def stop(self):
+        """
+        Stops sampling and waits for the sampling thread to finish, at most one interval.
+        """
+
+        self._stopped=True
+        self._finished.acquire()
+        self._finished.release()
+
+    def collapsed(self):
+        """
+        Returns the samples as collapsed stacks.
+        Returns:
+            str: One 'frame;frame;... count' line per distinct stack, most sampled first.
+        """
+
+        return ''.join(f'{stack} {count}\n' for stack,count in self.samples.most_common())
+
+    def write(self,directory,name):
+        """
+        Writes the collapsed stacks to a file of a directory.
+        Args:
+            directory (str): The directory of the profiles, created if missing.
+            name (str): The name of the profiled operation, used in the file name.
+        Returns:
+            str: The path of the written '.folded' file.
+        """
+
+        os.makedirs(directory,exist_ok=True)
+        safe_name=''.join(character if character.isalnum() else '_' for character in name)
+        path=os.path.join(directory,f"{time.strftime('%Y%m%dT%H%M%S')}-{safe_name}-{os.getpid()}-{threading.get_ident()}.folded")
+        with open(path,'w') as profile_file:
+            profile_file.write(self.collapsed())
+        return path
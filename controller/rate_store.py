@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+# Seconds between two checks of the store files of a base currency for a new version.
+STORE_CHECK_INTERVAL=1.0
+
+def read_axes(directory,base_currency):
+    """
+    Reads the axes file of a base currency, which names the matrix file of the published version.
+    Args:
+        directory (str): The store directory.
+        base_currency (str): The base currency code (e.g., 'bhd').
+    Returns:
+        dict or None: The 'dates', 'currencies' and 'matrix' file name of the version, or None if the
+                      store has no axes file for the base currency.
+    """
+
+    try:
+        with open(os.path.join(directory,f'{base_currency}.json')) as axes_file:
+            axes=json.load(axes_file)
+    except FileNotFoundError:
+        return None
+    axes.setdefault('matrix',f'{base_currency}.npy')
+    return axes
+
+class RateStore():
+    """
+    RateStore is a read only offline store of historical exchange rate tables.
+    Every base currency is kept as two files in the store directory:
+        - '<base>.<version>.npy': A float64 matrix indexed [date_idx, currency_idx] holding the number of
+          units of each currency equal to one unit of the base currency (NaN when the API had no rate).
+        - '<base>.json': The sorted 'dates' (YYYY-MM-DD) and 'currencies' labelling the matrix axes, and
+          the name of the 'matrix' file they label.
+    A new version is published by replacing the axes file, so readers see either the old or the new
+    matrix and axes, never a mix of both. Matrices are memory-mapped read only, so every worker
+    process shares the same pages. Each worker checks the axes file at most every
+    `STORE_CHECK_INTERVAL` seconds and maps a new version when it changed, so stores written by the
+    prefetch-rates command are picked up without restarting workers.
+    Attributes:
+        directory (str): The directory holding the store files.
+    """
+
+    def __init__(self,directory):
+        self.directory=directory
+        self._bases={}
+        self._lock=threading.Lock()
+
+    def signature(self,base_currency):
+        """
+        Returns the version signature of the axes file of a base currency.
+        Args:
+            base_currency (str): The base currency code (e.g., 'bhd').
+        Returns:
+            tuple or None: The inode, modification time and size of the axes file, or None if it does not exist.
+        """
+
+        try:
+            stat=os.stat(os.path.join(self.directory,f'{base_currency}.json'))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino,stat.st_mtime_ns,stat.st_size
+
+    def _load(self,base_currency):
+        """
+        Returns the memory-mapped matrix and axis indexes of a base currency, mapping them again when
+        the axes file changed. Misses are checked again after `STORE_CHECK_INTERVAL` seconds.
+        Args:
+            base_currency (str): The base currency code (e.g., 'bhd').
+        Returns:
+            tuple or None: (matrix, date index, currency index), or None if the store has no
+                           usable files for the base currency.
+        """
+
+        entry=self._bases.get(base_currency)
+        if entry is not None and time.monotonic()-entry[2]<STORE_CHECK_INTERVAL:
+            return entry[1]
+        with self._lock:
+            entry=self._bases.get(base_currency)
+            now=time.monotonic()
+            if entry is not None and now-entry[2]<STORE_CHECK_INTERVAL:
+                return entry[1]
+            signature=self.signature(base_currency)
+            loaded=entry[1] if entry is not None and entry[0]==signature and entry[1] is not None else self._read(base_currency)
+            self._bases[base_currency]=(signature,loaded,now)
+            return loaded
+
+    def _read(self,base_currency):
+        for _ in range(3):
+            axes=read_axes(self.directory,base_currency)
+            if axes is None:
+                return None
+            try:
+                matrix=np.load(os.path.join(self.directory,axes['matrix']),mmap_mode='r')
+                break
+            except FileNotFoundError:
+                # The version was pruned by later writes between reading its axes and mapping it.
+                continue
+        else:
+            return None
+        if matrix.shape!=(len(axes['dates']),len(axes['currencies'])):
+            return None
+        date_index={rate_date:position for position,rate_date in enumerate(axes['dates'])}
+        currency_index={currency:position for position,currency in enumerate(axes['currencies'])}
+        return matrix,date_index,currency_index
+
+    def reload(self):
+        """
+        Drops every mapped matrix so the next lookup maps the files currently on disk.
+        """
+
+        with self._lock:
+            self._bases={}
+
+    def get_rate(self,base_currency,rate_date,currency):
+        """
+        Looks up a single exchange rate.
+        Args:
+            base_currency (str): The base currency code (e.g., 'bhd').
+            rate_date (str): The date of the exchange rate in YYYY-MM-DD format.
+            currency (str): The quoted currency code.
+        Returns:
+            float or None: The exchange rate, or None if the store does not hold it.
+        """
+
+        loaded=self._load(base_currency)
+        if loaded is None:
+            return None
+        matrix,date_index,currency_index=loaded
+        date_position=date_index.get(rate_date)
+        currency_position=currency_index.get(currency)
+        if date_position is None or currency_position is None:
+            return None
+        rate=matrix[date_position,currency_position]
+        return None if np.isnan(rate) else float(rate)
+
+    def get_rate_table(self,base_currency,rate_date):
+        """
+        Returns the whole rate table of a base currency for one date.
+        Args:
+            base_currency (str): The base currency code (e.g., 'bhd').
+            rate_date (str): The date of the rate table in YYYY-MM-DD format.
+        Returns:
+            dict or None: A dictionary mapping currency codes to exchange rates, or None if the
+                          store does not hold the date.
+        """
+
+        loaded=self._load(base_currency)
+        if loaded is None or rate_date not in loaded[1]:
+            return None
+        matrix,date_index,currency_index=loaded
+        row=matrix[date_index[rate_date]]
+        return {currency:float(row[position]) for currency,position in currency_index.items() if not np.isnan(row[position])}
+
+    def get_rates_frame(self,base_currency,dates):
+        """
+        Builds a long-form exchange rates DataFrame for the dates held by the store.
+        Args:
+            base_currency (str): The base currency code (e.g., 'bhd').
+            dates (list of pandas.Timestamp): The dates to look up.
+        Returns:
+            tuple: A tuple containing:
+                - pandas.DataFrame: 'date', 'currency' and 'rate' columns for the dates found in the store.
+                - list of pandas.Timestamp: The dates the store does not hold.
+        """
+
+        loaded=self._load(base_currency)
+        if loaded is None:
+            return None,list(dates)
+        matrix,date_index,currency_index=loaded
+        found=[rate_date for rate_date in dates if rate_date.strftime('%Y-%m-%d') in date_index]
+        missing=[rate_date for rate_date in dates if rate_date.strftime('%Y-%m-%d') not in date_index]
+        if len(found)==0:
+            return None,missing
+        rows=matrix[[date_index[rate_date.strftime('%Y-%m-%d')] for rate_date in found]]
+        currencies=np.array(list(currency_index.keys()),dtype=object)
+        rates=pd.DataFrame({'date':np.repeat(np.array(found,dtype='datetime64[ns]'),len(currencies)),
+                            'currency':np.tile(currencies,len(found)),
+                            'rate':rows.ravel()})
+        rates=rates[rates['rate'].notna()].reset_index(drop=True)
+        rates['currency']=rates['currency'].astype('string')
+        return rates,missing
+
+def write_rate_store(directory,base_currency,rate_tables):
+    """
+    Writes rate tables of a base currency into the store, merged with the tables it already holds.
+    The matrix is written to a new version file, then the axes file naming it is replaced in one
+    atomic step, so readers never map a partial file or a matrix with the axes of another version.
+    The previous version is kept for readers that read its axes just before the replacement; older
+    ones are deleted.
+    Args:
+        directory (str): The store directory.
+        base_currency (str): The base currency code (e.g., 'bhd').
+        rate_tables (dict): A dictionary mapping dates in YYYY-MM-DD format to rate tables.
+    Returns:
+        int: The number of dates held by the store after the write.
+    """
+
+    os.makedirs(directory,exist_ok=True)
+    previous=read_axes(directory,base_currency)
+    existing=RateStore(directory)._read(base_currency)
+    merged={}
+    if existing is not None:
+        matrix,date_index,currency_index=existing
+        for rate_date,date_position in date_index.items():
+            row=matrix[date_position]
+            merged[rate_date]={currency:float(row[position]) for currency,position in currency_index.items() if not np.isnan(row[position])}
+    merged.update(rate_tables)
+    dates=sorted(merged)
+    currencies=sorted({currency for rate_table in merged.values() for currency in rate_table})
+    currency_index={currency:position for position,currency in enumerate(currencies)}
+    matrix=np.full((len(dates),len(currencies)),np.nan,dtype='float64')
+    for date_position,rate_date in enumerate(dates):
+        for currency,rate in merged[rate_date].items():
+            matrix[date_position,currency_index[currency]]=rate
+    matrix_name=f'{base_currency}.{time.time_ns()}-{os.getpid()}.npy'
+    with open(os.path.join(directory,matrix_name),'wb') as matrix_file:
+        np.save(matrix_file,matrix)
+    axes_path=os.path.join(directory,f'{base_currency}.json')
+    with open(f'{axes_path}.tmp','w') as axes_file:
+        json.dump({'dates':dates,'currencies':currencies,'matrix':matrix_name},axes_file)
+    os.replace(f'{axes_path}.tmp',axes_path)
+    kept={matrix_name,None if previous is None else previous['matrix']}
+    for entry in os.listdir(directory):
+        if entry.startswith(f'{base_currency}.') and entry.endswith('.npy') and entry not in kept:
+            os.remove(os.path.join(directory,entry))
+    return len(dates)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+class RateTableCache():
+    """
+    RateTableCache is a thread safe in-process cache of exchange rate tables keyed by
+    (date, base currency). Each entry carries its own time to live, and once the cache
+    holds max_entries tables the least recently used one is evicted.
+    Attributes:
+        max_entries (int): The maximum number of rate tables kept in the cache.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that found no entry or an expired entry.
+        evictions (int): Number of entries dropped to make room for new ones.
+        expirations (int): Number of entries dropped because their time to live elapsed.
+    """
+
+    def __init__(self,max_entries):
+        self.max_entries=max_entries
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self.expirations=0
+        self._entries=OrderedDict()
+        self._lock=threading.Lock()
+
+    def get(self,key):
+        """
+        Returns the rate table stored under the given key and marks it as most recently used.
+        Args:
+            key (tuple): The (date, base currency) key of the rate table.
+        Returns:
+            dict or None: The cached rate table, or None if it is missing or expired.
+        """
+
+        with self._lock:
+            entry=self._entries.get(key)
+            if entry is None:
+                self.misses+=1
+                return None
+            expires_at,table=entry
+            if expires_at<=time.monotonic():
+                del self._entries[key]
+                self.expirations+=1
+                self.misses+=1
+                return None
+            self._entries.move_to_end(key)
+            self.hits+=1
+            return table
+
+    def put(self,key,table,ttl):
+        """
+        Stores a rate table under the given key, evicting the least recently used entries if the cache is full.
+        Args:
+            key (tuple): The (date, base currency) key of the rate table.
+            table (dict): The rate table mapping currency codes to exchange rates.
+            ttl (float): Number of seconds the entry stays valid.
+        """
+
+        with self._lock:
+            self._entries[key]=(time.monotonic()+ttl,table)
+            self._entries.move_to_end(key)
+            while len(self._entries)>self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions+=1
+
+    def clear(self):
+        """
+        Removes every entry from the cache and resets its counters.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits=0
+            self.misses=0
+            self.evictions=0
+            self.expirations=0
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters, used to size the cache.
+        Returns:
+            dict: A dictionary containing size, max_entries, hits, misses, evictions and expirations.
+        """
+
+        with self._lock:
+            return {"size":len(self._entries),"max_entries":self.max_entries,"hits":self.hits,
+                    "misses":self.misses,"evictions":self.evictions,"expirations":self.expirations}
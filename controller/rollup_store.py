@@ -0,0 +1,293 @@
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+from controller.convert_currency_controller import dataframe_convert_currency
+
+# Columns of a rollup, stored in the same order in the rollup tables after 'date' and 'currency'.
+ROLLUP_COLUMNS=('count','total_bhd','min_bhd','max_bhd','stale')
+
+def rollup_table(name):
+    """
+    Returns the statement creating a rollup table.
+    Args:
+        name (str): The name of the table.
+    Returns:
+        str: The CREATE TABLE statement, with dates stored as nanoseconds since the epoch.
+    """
+
+    return (f'CREATE TABLE IF NOT EXISTS {name} (date INTEGER NOT NULL, currency TEXT NOT NULL, count INTEGER NOT NULL, '
+            'total_bhd REAL NOT NULL, min_bhd REAL NOT NULL, max_bhd REAL NOT NULL, stale INTEGER NOT NULL, PRIMARY KEY (date,currency))')
+
+# Statements creating the tables of the rollup of the default dataset.
+ROLLUP_SCHEMA=(rollup_table('dataset_rollup'),
+               'CREATE TABLE IF NOT EXISTS dataset_rollup_state (id INTEGER PRIMARY KEY CHECK (id=0), signature TEXT NOT NULL, size INTEGER NOT NULL, digest TEXT NOT NULL)')
+
+def empty_rollup():
+    """
+    Returns an empty rollup.
+    Returns:
+        pandas.DataFrame: A rollup with no (date, currency) row.
+    """
+
+    index=pd.MultiIndex.from_arrays([pd.Series(dtype='datetime64[ns]'),pd.Series(dtype='string')],names=['date','currency'])
+    return pd.DataFrame({'count':pd.Series(dtype='int64'),'total_bhd':pd.Series(dtype='float64'),
+                         'min_bhd':pd.Series(dtype='float64'),'max_bhd':pd.Series(dtype='float64'),
+                         'stale':pd.Series(dtype='int64')},index=index)
+
+def aggregate_transactions(df):
+    """
+    Converts transactions to BHD and aggregates them per (date, currency).
+    Args:
+        df (pandas.DataFrame): Transactions with 'date', 'currency' and 'amount' columns.
+    Returns:
+        pandas.DataFrame: The rollup of the transactions, whose 'stale' column counts the transactions
+            converted with a stale last good rate table or the rate table of the `@latest` fallback.
+    Raises:
+        requests.exceptions.HTTPError: If fetching a rate table fails.
+        KeyError: If a currency is missing from the rate table of its date.
+    """
+
+    if len(df)==0:
+        return empty_rollup()
+    converted=dataframe_convert_currency(df,flag_latest=True)
+    converted=pd.DataFrame({'date':df['date'].to_numpy(dtype='datetime64[ns]'),
+                            'currency':df['currency'].astype('string').str.lower().to_numpy(),
+                            'amount':converted['converted_to_bhd'].to_numpy(),
+                            'stale':(converted['stale_rate'].to_numpy()|converted['latest_rate'].to_numpy()).astype('int64')})
+    return converted.groupby(['date','currency']).agg(count=('amount','size'),total_bhd=('amount','sum'),
+                                                      min_bhd=('amount','min'),max_bhd=('amount','max'),
+                                                      stale=('stale','sum'))
+
+def read_rollup(connection,table):
+    """
+    Reads a rollup table.
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table (str): The name of the rollup table.
+    Returns:
+        pandas.DataFrame: The rollup, in the layout of `empty_rollup`.
+    """
+
+    rows=connection.execute(f"SELECT date,currency,{','.join(ROLLUP_COLUMNS)} FROM {table}").fetchall()
+    if len(rows)==0:
+        return empty_rollup()
+    dates,currencies,counts,totals,minimums,maximums,stale=zip(*rows)
+    index=pd.MultiIndex.from_arrays([pd.Series(np.array(dates,dtype='int64').view('datetime64[ns]')),pd.Series(currencies,dtype='string')],names=['date','currency'])
+    return pd.DataFrame({'count':np.array(counts,dtype='int64'),'total_bhd':np.array(totals,dtype='float64'),
+                         'min_bhd':np.array(minimums,dtype='float64'),'max_bhd':np.array(maximums,dtype='float64'),
+                         'stale':np.array(stale,dtype='int64')},index=index)
+
+def fold_rollup(connection,table,rollup):
+    """
+    Folds a rollup into a rollup table, adding counts and totals and keeping the extreme minimums and maximums.
+    Args:
+        connection (sqlite3.Connection): The connection to the database, inside a transaction.
+        table (str): The name of the rollup table.
+        rollup (pandas.DataFrame): The rollup to fold.
+    """
+
+    rows=zip(rollup.index.get_level_values('date').to_numpy(dtype='datetime64[ns]').view('int64').tolist(),
+             rollup.index.get_level_values('currency').astype('string').tolist(),
+             *(rollup[column].tolist() for column in ROLLUP_COLUMNS))
+    connection.executemany(f"INSERT INTO {table} (date,currency,{','.join(ROLLUP_COLUMNS)}) VALUES (?,?,?,?,?,?,?) "
+                           'ON CONFLICT (date,currency) DO UPDATE SET count=count+excluded.count,total_bhd=total_bhd+excluded.total_bhd,'
+                           'min_bhd=MIN(min_bhd,excluded.min_bhd),max_bhd=MAX(max_bhd,excluded.max_bhd),stale=stale+excluded.stale',rows)
+
+def merge_rollups(rollup,other):
+    """
+    Merges two rollups, adding counts and totals and keeping the extreme minimums and maximums.
+    Args:
+        rollup (pandas.DataFrame): A rollup.
+        other (pandas.DataFrame): Another rollup.
+    Returns:
+        pandas.DataFrame: The merged rollup, sorted by ('date', 'currency').
+    """
+
+    if len(other)==0:
+        return rollup
+    merged=pd.concat([rollup,other]).groupby(level=['date','currency'])
+    return merged.agg({'count':'sum','total_bhd':'sum','min_bhd':'min','max_bhd':'max','stale':'sum'})
+
+def fingerprint_transactions(digest,df):
+    """
+    Feeds the aggregated columns of transactions into a running hash, row by row.
+    Args:
+        digest (hashlib.blake2b): The running hash.
+        df (pandas.DataFrame): Transactions with 'date', 'currency' and 'amount' columns.
+    """
+
+    keys=pd.DataFrame({'date':df['date'].to_numpy(dtype='datetime64[ns]'),
+                       'currency':df['currency'].astype('string').to_numpy(),
+                       'amount':df['amount'].to_numpy(dtype='float64')})
+    digest.update(pd.util.hash_pandas_object(keys,index=False).to_numpy().tobytes())
+
+def summarize_rollup(rollup,group_by=('date','currency'),after=None,before=None,currency=None):
+    """
+    Aggregates a rollup over the requested groups.
+    Args:
+        rollup (pandas.DataFrame): The rollup to summarize.
+        group_by (sequence of str, optional): The grouping columns, 'date' and/or 'currency'.
+            Defaults to ('date', 'currency').
+        after (datetime-like, optional): Keep days after this date.
+        before (datetime-like, optional): Keep days before this date.
+        currency (str, optional): Keep this currency, matched case-insensitively.
+    Returns:
+        pandas.DataFrame: One row per group with the group columns followed by 'count',
+            'total_bhd', 'min_bhd' and 'max_bhd', totals rounded to three decimal places.
+    """
+
+    dates=rollup.index.get_level_values('date')
+    mask=np.ones(len(rollup),dtype=bool)
+    if after is not None:
+        mask&=dates>pd.Timestamp(after)
+    if before is not None:
+        mask&=dates<pd.Timestamp(before)
+    if currency is not None:
+        mask&=(rollup.index.get_level_values('currency')==currency.lower())
+    grouped=rollup[mask].groupby(level=list(group_by))
+    summary=grouped.agg({'count':'sum','total_bhd':'sum','min_bhd':'min','max_bhd':'max'}).reset_index()
+    summary['total_bhd']=summary['total_bhd'].round(3)
+    return summary
+
+def read_state(connection):
+    """
+    Reads what the rollup of the default dataset was last updated for.
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+    Returns:
+        tuple: The version signature of the dataset file (None before the first update), the number of
+            transactions folded and the hash of the folded transactions.
+    """
+
+    row=connection.execute('SELECT signature,size,digest FROM dataset_rollup_state WHERE id=0').fetchone()
+    if row is None:
+        return None,0,hashlib.blake2b().hexdigest()
+    return tuple(json.loads(row[0])),row[1],row[2]
+
+class RollupStore():
+    """
+    RollupStore keeps daily aggregates of the converted-to-BHD amounts of a dataset file, one row per
+    (date, currency), in the `dataset_rollup` table of a database shared by the worker processes, so the
+    rollup is built once for all of them and survives restarts. Transactions are folded into the rollup
+    once, when the file gains them, so summaries are answered from the rollup without converting or
+    scanning the transactions again. Groups holding transactions converted with a stale or `@latest`
+    fallback rate table are folded again from the file by `refresh`.
+    Attributes:
+        database (SQLiteDatabase): The database holding the rollup.
+        refresh_interval (float): Minimum seconds between two refreshes of the groups of this process.
+    """
+
+    def __init__(self,database,refresh_interval):
+        self.database=database
+        self.refresh_interval=refresh_interval
+        self._refreshed_at=None
+        self._lock=threading.Lock()
+
+    def update(self,signature,read_chunks):
+        """
+        Brings the rollup up to date with a dataset file.
+        Nothing is read while the file signature is unchanged. When the file changed, the rows already
+        folded into the rollup are hashed and compared with the hash recorded when they were folded: if
+        they are unchanged only the appended rows are converted and folded, otherwise the rollup is rebuilt.
+        The rows are converted outside of any transaction; the result is only written if no other worker
+        updated the rollup in the meantime.
+        Args:
+            signature (tuple): The version signature of the dataset file.
+            read_chunks (callable): Returns a new iterable over the validated transactions chunks of the file.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
+            requests.exceptions.HTTPError: If fetching a rate table fails.
+            KeyError: If a currency is missing from the rate table of its date.
+        """
+
+        with self._lock:
+            with self.database.connection() as connection:
+                state=read_state(connection)
+            folded_signature,folded_size,folded_digest=state
+            if folded_signature==tuple(signature):
+                return
+            digest=hashlib.blake2b()
+            read=0
+            for chunk in (read_chunks() if folded_size>0 else []):
+                if read>=folded_size:
+                    break
+                fingerprint_transactions(digest,chunk.iloc[:folded_size-read])
+                read+=min(len(chunk),folded_size-read)
+            appended=read==folded_size and digest.hexdigest()==folded_digest
+            size=folded_size if appended else 0
+            rollup=empty_rollup()
+            digest=hashlib.blake2b()
+            read=0
+            for chunk in read_chunks():
+                fingerprint_transactions(digest,chunk)
+                if read+len(chunk)>size:
+                    rollup=merge_rollups(rollup,aggregate_transactions(chunk.iloc[max(size-read,0):]))
+                read+=len(chunk)
+            with self.database.transaction() as connection:
+                if read_state(connection)!=state:
+                    return
+                if not appended:
+                    connection.execute('DELETE FROM dataset_rollup')
+                fold_rollup(connection,'dataset_rollup',rollup)
+                connection.execute('INSERT OR REPLACE INTO dataset_rollup_state (id,signature,size,digest) VALUES (0,?,?,?)',
+                                   (json.dumps(list(signature)),read,digest.hexdigest()))
+
+    def refresh(self,read_chunks):
+        """
+        Converts the transactions of the groups holding stale conversions again and replaces the groups.
+        Runs at most once every `refresh_interval` seconds in a process, since the file is read for it.
+        Groups whose transactions are still converted with a stale or latest fallback rate table stay flagged.
+        Args:
+            read_chunks (callable): Returns a new iterable over the validated transactions chunks of the file.
+        Raises:
+            ValueError: If a chunk does not conform to the TransactionModel schema.
+            requests.exceptions.HTTPError: If fetching a rate table fails.
+            KeyError: If a currency is missing from the rate table of its date.
+        """
+
+        with self._lock:
+            now=time.monotonic()
+            if self._refreshed_at is not None and now-self._refreshed_at<self.refresh_interval:
+                return
+            self._refreshed_at=now
+            with self.database.connection() as connection:
+                state=read_state(connection)
+                groups=connection.execute('SELECT date,currency FROM dataset_rollup WHERE stale>0').fetchall()
+            if len(groups)==0:
+                return
+            dates,currencies=zip(*groups)
+            keys=pd.MultiIndex.from_arrays([np.array(dates,dtype='int64').view('datetime64[ns]'),pd.array(currencies,dtype='string')])
+            rollup=empty_rollup()
+            for chunk in read_chunks():
+                chunk_keys=pd.MultiIndex.from_arrays([chunk['date'].to_numpy(dtype='datetime64[ns]'),chunk['currency'].astype('string').str.lower().to_numpy()])
+                rollup=merge_rollups(rollup,aggregate_transactions(chunk[chunk_keys.isin(keys)]))
+            with self.database.transaction() as connection:
+                if read_state(connection)!=state:
+                    return
+                connection.executemany('DELETE FROM dataset_rollup WHERE date=? AND currency=?',groups)
+                fold_rollup(connection,'dataset_rollup',rollup)
+
+    def rollup(self):
+        """
+        Reads the rollup.
+        Returns:
+            pandas.DataFrame: The aggregates indexed by ('date', 'currency'), with the 'count', 'total_bhd',
+                'min_bhd', 'max_bhd' and 'stale' columns.
+        """
+
+        with self.database.connection() as connection:
+            return read_rollup(connection,'dataset_rollup')
+
+    def summarize(self,group_by=('date','currency'),after=None,before=None,currency=None):
+        """
+        Aggregates the rollup over the requested groups through `summarize_rollup`.
+        Args:
+            group_by, after, before, currency: The arguments of `summarize_rollup`.
+        Returns:
+            pandas.DataFrame: One row per group with the 'count', 'total_bhd', 'min_bhd' and 'max_bhd' columns.
+        """
+
+        return summarize_rollup(self.rollup(),group_by,after,before,currency)
@@ -51,3 +51,57 @@ class ServiceResponse():
         if len(data)==0:
             return {"response status":ServiceResponse.response_status(204,"No content","No data found"),"data":data}
         return {"response status":ServiceResponse.response_status(202,"Accepted",f"{len(data)} RECORD(S) FOUND"),"data":data}
+
+    def response_page(data,next_cursor):
+        """
+        Generates the response of one page of a paginated request.
+        Args:
+            data (list): The records of the page.
+            next_cursor (str or None): The cursor of the next page, None after the last page.
+        Returns:
+            dict: The `response_process_data` response of the page, with the "next cursor" key.
+        """
+
+        return {**ServiceResponse.response_process_data(data),"next cursor":next_cursor}
+
+    def response_lookup(results):
+        """
+        Generates the response of a batch lookup of transaction ids.
+        Args:
+            results (list of dict): One result per looked up id, with its 'found' marker.
+        Returns:
+            dict: A dictionary containing the "response status" and the results as "data". The status is
+                  "202 Accepted" with the number of found ids, or "204 No Content" if no id was found.
+        """
+
+        found=sum(result['found'] for result in results)
+        if found==0:
+            return {"response status":ServiceResponse.response_status(204,"No content","No data found"),"data":results}
+        return {"response status":ServiceResponse.response_status(202,"Accepted",f"{found} OF {len(results)} ID(S) FOUND"),"data":results}
+
+    def stream_header(count):
+        """
+        Generates the header record of a streamed NDJSON response.
+        Args:
+            count (int or None): The number of records that will be streamed, or None if it is
+                only reported by the trailer record.
+        Returns:
+            dict: A dictionary containing the "response status" of the streamed response.
+        """
+
+        if count is None:
+            return {"response status":ServiceResponse.response_status(202,"Accepted","STREAMING RECORD(S)")}
+        return {"response status":ServiceResponse.response_status(202,"Accepted",f"{count} RECORD(S) FOUND")}
+
+    def stream_trailer(code,status,message):
+        """
+        Generates the trailer record of a streamed NDJSON response, reporting how the stream ended.
+        Args:
+            code (int): The status code of the outcome (200 if every record was streamed).
+            status (str): The status of the outcome (e.g., "Complete", "ERROR").
+            message (str): A descriptive message providing details about the outcome.
+        Returns:
+            dict: A dictionary containing the "response status" of the stream outcome.
+        """
+
+        return {"response status":ServiceResponse.response_status(code,status,message)}
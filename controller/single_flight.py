@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import Future
+try:
+    import fcntl
+except ImportError:
+    fcntl=None
+
+# Seconds between two attempts to take the lock file of a key held by another process.
+LOCK_POLL_INTERVAL=0.01
+
+class SingleFlight():
+    """
+    SingleFlight coalesces concurrent calls for the same key within a process.
+    The first caller of a key runs the call, callers arriving while it is in flight wait for
+    its result (or its exception) instead of running the call again.
+    Attributes:
+        calls (int): Number of calls that were run.
+        shared (int): Number of callers served with the result of a call already in flight.
+    """
+
+    def __init__(self):
+        self.calls=0
+        self.shared=0
+        self._in_flight={}
+        self._lock=threading.Lock()
+
+    def do(self,key,function):
+        """
+        Runs a call unless a call for the same key is already in flight, in which case its result is awaited.
+        Args:
+            key (hashable): The key of the call.
+            function (callable): The call, taking no argument.
+        Returns:
+            Any: The result of the call.
+        Raises:
+            Exception: The exception raised by the call.
+        """
+
+        with self._lock:
+            future=self._in_flight.get(key)
+            leader=future is None
+            if leader:
+                future=Future()
+                self._in_flight[key]=future
+                self.calls+=1
+            else:
+                self.shared+=1
+        if not leader:
+            return future.result()
+        try:
+            result=function()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+class FileSingleFlight():
+    """
+    FileSingleFlight coalesces calls for the same key across processes, such as gunicorn workers.
+    Every key has an fcntl lock file in a shared spool directory: the process holding the lock runs the
+    call and spools its JSON result next to the lock file, processes waiting on the lock then read the
+    spooled result as long as it is fresh instead of running the call again.
+    With a lock_timeout, a process waits at most lock_timeout seconds for the lock and then runs the call
+    itself, so a hung holder in another process delays its followers instead of blocking them forever.
+    Lock files rely on fcntl, so cross-process coalescing is only available on POSIX systems.
+    Attributes:
+        directory (str): The shared spool directory.
+        lock_timeout (float or None): Seconds to wait for the lock of a key held by another process,
+            None to wait until it is released.
+        shared (int): Number of calls of this process answered from a spooled result.
+        lock_timeouts (int): Number of calls of this process run without the lock after waiting lock_timeout.
+    """
+
+    def __init__(self,directory,lock_timeout=None):
+        if fcntl is None:
+            raise OSError('FileSingleFlight requires fcntl lock files, which this platform does not provide')
+        self.directory=directory
+        self.lock_timeout=lock_timeout
+        self.shared=0
+        self.lock_timeouts=0
+
+    def read(self,spool_path,max_age):
+        """
+        Reads a spooled result if it is fresh enough.
+        Args:
+            spool_path (str): The path of the spool file.
+            max_age (callable): Returns the number of seconds a result can be reused.
+        Returns:
+            Any: The spooled result, or None if it is missing, unreadable or too old.
+        """
+
+        try:
+            with open(spool_path) as spool_file:
+                spooled=json.load(spool_file)
+        except (OSError,ValueError):
+            return None
+        if time.time()-spooled['written_at']>=max_age(spooled['result']):
+            return None
+        return spooled['result']
+
+    def acquire(self,lock_file):
+        """
+        Takes the exclusive lock of a lock file, polling a non blocking lock so waiting
+        yields to other threads and greenlets instead of blocking the whole process.
+        Args:
+            lock_file (file): The open lock file.
+        Returns:
+            bool: True if the lock was taken, False if it was still held by another process after lock_timeout seconds.
+        """
+
+        deadline=None if self.lock_timeout is None else time.monotonic()+self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(),fcntl.LOCK_EX|fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if deadline is not None and time.monotonic()>=deadline:
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def do(self,name,function,max_age):
+        """
+        Runs a call while holding the lock of its key, unless a fresh result was spooled by another process.
+        When the lock cannot be taken within lock_timeout seconds the call is run without it.
+        Args:
+            name (str): The key of the call, used as file name in the spool directory.
+            function (callable): The call, taking no argument and returning a JSON serializable result.
+            max_age (callable): Returns the number of seconds a result can be reused, given the result.
+        Returns:
+            Any: The result of the call, or the spooled result as decoded from JSON.
+        Raises:
+            Exception: The exception raised by the call.
+        """
+
+        os.makedirs(self.directory,exist_ok=True)
+        spool_path=os.path.join(self.directory,f'{name}.json')
+        with open(f'{spool_path}.lock','a') as lock_file:
+            locked=self.acquire(lock_file)
+            try:
+                result=self.read(spool_path,max_age)
+                if result is not None:
+                    self.shared+=1
+                    return result
+                if not locked:
+                    self.lock_timeouts+=1
+                result=function()
+                temporary_path=f'{spool_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(temporary_path,'w') as spool_file:
+                    json.dump({'written_at':time.time(),'result':result},spool_file)
+                os.replace(temporary_path,spool_path)
+                return result
+            finally:
+                if locked:
+                    fcntl.flock(lock_file.fileno(),fcntl.LOCK_UN)
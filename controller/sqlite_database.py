@@ -0,0 +1,140 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from controller.os_threads import original
+
+# Seconds between two attempts at a statement while another connection holds the write lock.
+LOCK_POLL_INTERVAL=0.01
+
+def is_locked(error):
+    """
+    Tells whether a SQLite error means the database was locked by another connection.
+    Args:
+        error (sqlite3.OperationalError): The error raised by a statement.
+    Returns:
+        bool: True if the statement gave up waiting for a lock.
+    """
+
+    return (getattr(error,'sqlite_errorcode',0)&0xff) in (sqlite3.SQLITE_BUSY,sqlite3.SQLITE_LOCKED) or 'locked' in str(error)
+
+class SQLiteDatabase():
+    """
+    SQLiteDatabase hands out connections to a SQLite database shared by the worker processes.
+    The database runs in WAL mode and every OS thread uses its own connection; in the gevent serving
+    mode the greenlets of a thread share it, none of them holding a transaction across a yield. With an
+    empty path the database is kept in the memory of the process instead, behind a single connection
+    that the threads take in turn.
+    Connections run in autocommit mode, `transaction` opens the write transactions.
+    A statement blocks its OS thread, and every greenlet of it, while SQLite waits for a lock, so the
+    busy timeout is kept short; a write transaction that must not be skipped retries for up to
+    lock_wait seconds with sleeps that yield to the other greenlets instead.
+    Attributes:
+        path (str): The path of the SQLite database file, empty for an in-memory database.
+        schema (sequence of str): The statements creating the tables, run on every new connection.
+        timeout (float): Seconds a statement blocks waiting for a lock held by another connection.
+        lock_wait (float): Seconds `transaction` keeps retrying to take the write lock.
+    """
+
+    def __init__(self,path,schema,timeout,lock_wait=0):
+        self.path=path
+        self.schema=schema
+        self.timeout=timeout
+        self.lock_wait=lock_wait
+        self._local=original('threading','local')()
+        self._memory_connection=None
+        self._memory_lock=threading.Lock()
+
+    def execute_waiting(self,connection,statement,lock_wait):
+        """
+        Executes a statement, retrying it while the database is locked by another connection.
+        Args:
+            connection (sqlite3.Connection): The connection to the database.
+            statement (str): The statement to execute.
+            lock_wait (float): Seconds to keep retrying.
+        Returns:
+            sqlite3.Cursor: The cursor of the statement.
+        Raises:
+            sqlite3.OperationalError: If the database is still locked after lock_wait seconds.
+        """
+
+        deadline=time.monotonic()+lock_wait
+        while True:
+            try:
+                return connection.execute(statement)
+            except sqlite3.OperationalError as e:
+                if not is_locked(e) or time.monotonic()>=deadline:
+                    raise
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    def open(self):
+        """
+        Opens a new connection and creates the tables of the schema, waiting for the write lock
+        up to lock_wait seconds when they do not exist yet.
+        Returns:
+            sqlite3.Connection: The connection to the database.
+        Raises:
+            sqlite3.OperationalError: If the database is still locked after lock_wait seconds.
+        """
+
+        if self.path=='':
+            connection=sqlite3.connect(':memory:',isolation_level=None,check_same_thread=False)
+        else:
+            directory=os.path.dirname(self.path)
+            if directory!='':
+                os.makedirs(directory,exist_ok=True)
+            connection=sqlite3.connect(self.path,timeout=self.timeout,isolation_level=None)
+        try:
+            if self.path!='':
+                self.execute_waiting(connection,'PRAGMA journal_mode=WAL',self.lock_wait)
+                connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in self.schema:
+                self.execute_waiting(connection,statement,self.lock_wait)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Yields the connection of the current OS thread, or the in-memory connection while holding its lock.
+        Yields:
+            sqlite3.Connection: The connection to the database.
+        """
+
+        if self.path=='':
+            with self._memory_lock:
+                if self._memory_connection is None:
+                    self._memory_connection=self.open()
+                yield self._memory_connection
+            return
+        connection=getattr(self._local,'connection',None)
+        if connection is None:
+            connection=self.open()
+            self._local.connection=connection
+        yield connection
+
+    @contextlib.contextmanager
+    def transaction(self,lock_wait=None):
+        """
+        Yields a connection inside a write transaction, committed on exit and rolled back on any exception.
+        The write lock is taken when the transaction begins, so reads made in it see the committed state
+        other processes cannot change before the commit.
+        Args:
+            lock_wait (float, optional): Seconds to keep retrying to take the write lock. Defaults to `lock_wait`.
+        Yields:
+            sqlite3.Connection: The connection to the database.
+        Raises:
+            sqlite3.OperationalError: If the write lock is still held by another connection after lock_wait seconds.
+        """
+
+        with self.connection() as connection:
+            self.execute_waiting(connection,'BEGIN IMMEDIATE',self.lock_wait if lock_wait is None else lock_wait)
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
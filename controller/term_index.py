@@ -0,0 +1,166 @@
+import numpy as np
+
+# Terms containing any of these characters are regular expressions for str.contains and cannot be answered by trigrams.
+REGEX_SPECIAL_CHARACTERS=frozenset('.^$*+?{}[]\\|()')
+# Number of appended segments kept before they are merged back into one.
+MAX_SEGMENTS=8
+
+def trigram_codes(data):
+    """
+    Encodes every three consecutive bytes of a buffer as one integer.
+    Args:
+        data (numpy.ndarray): A uint8 array.
+    Returns:
+        numpy.ndarray: int64 codes of the trigrams starting at each byte but the last two.
+    """
+
+    data=data.astype('int64')
+    return (data[:-2]<<16)|(data[1:-1]<<8)|data[2:]
+
+class TrigramSegment():
+    """
+    TrigramSegment is an inverted trigram index over a contiguous range of description rows.
+    Postings are stored in compressed sparse row form: `codes` holds the sorted distinct trigram codes
+    and `rows[starts[i]:starts[i+1]]` the sorted row positions containing `codes[i]`.
+    Descriptions that are not plain ASCII are not indexed; they are kept in `unindexed` and always
+    returned as candidates, because case-insensitive regex matching on them does not follow str.lower.
+    Attributes:
+        offset (int): Row position of the first description of the segment.
+        size (int): Number of descriptions in the segment.
+        codes (numpy.ndarray): Sorted distinct trigram codes.
+        starts (numpy.ndarray): Start of the postings of each code in `rows`, followed by len(rows).
+        rows (numpy.ndarray): Concatenated postings (int32 row positions).
+        unindexed (numpy.ndarray): Row positions of descriptions that are not plain ASCII.
+    """
+
+    def __init__(self,descriptions,offset):
+        self.offset=offset
+        self.size=len(descriptions)
+        lowered=[description.lower() if isinstance(description,str) else '' for description in descriptions]
+        is_ascii=np.fromiter((description.isascii() for description in lowered),dtype=bool,count=self.size)
+        positions=np.arange(offset,offset+self.size,dtype='int64')
+        self.unindexed=positions[~is_ascii].astype('int32')
+        texts=[description for description,ascii_only in zip(lowered,is_ascii) if ascii_only]
+        data=np.frombuffer('\n'.join(texts).encode('ascii'),dtype='uint8')
+        lengths=np.fromiter((len(text)+1 for text in texts),dtype='int64',count=len(texts))
+        row_of_byte=np.repeat(positions[is_ascii],lengths)[:len(data)]
+        if len(data)<3:
+            self.codes=np.empty(0,dtype='int64')
+            self.starts=np.zeros(1,dtype='int64')
+            self.rows=np.empty(0,dtype='int32')
+            return
+        within_row=row_of_byte[:-2]==row_of_byte[2:]
+        keys=np.unique((trigram_codes(data)[within_row]<<32)|row_of_byte[:-2][within_row])
+        all_codes=keys>>32
+        self.codes,starts=np.unique(all_codes,return_index=True)
+        self.starts=np.append(starts,len(keys)).astype('int64')
+        self.rows=(keys&0xFFFFFFFF).astype('int32')
+
+    def arrays(self):
+        """
+        Returns the arrays of the segment, to be written to disk.
+        Returns:
+            dict: The 'bounds' ([offset, size]), 'codes', 'starts', 'rows' and 'unindexed' arrays.
+        """
+
+        return {'bounds':np.array([self.offset,self.size],dtype='int64'),'codes':self.codes,'starts':self.starts,
+                'rows':self.rows,'unindexed':self.unindexed}
+
+    @classmethod
+    def from_arrays(cls,arrays):
+        """
+        Rebuilds a segment from the arrays returned by `arrays`, without copying them.
+        Args:
+            arrays (dict): The arrays of the segment, by name.
+        Returns:
+            TrigramSegment: The segment.
+        """
+
+        segment=cls.__new__(cls)
+        segment.offset,segment.size=(int(value) for value in arrays['bounds'])
+        segment.codes=arrays['codes']
+        segment.starts=arrays['starts']
+        segment.rows=arrays['rows']
+        segment.unindexed=arrays['unindexed']
+        return segment
+
+    def postings(self,code):
+        """
+        Returns the row positions whose description contains a trigram.
+        Args:
+            code (int): The trigram code.
+        Returns:
+            numpy.ndarray: Sorted int32 row positions.
+        """
+
+        position=np.searchsorted(self.codes,code)
+        if position==len(self.codes) or self.codes[position]!=code:
+            return self.rows[:0]
+        return self.rows[self.starts[position]:self.starts[position+1]]
+
+    def candidates(self,codes):
+        """
+        Returns the row positions that may contain every trigram of a term.
+        Args:
+            codes (numpy.ndarray): The distinct trigram codes of the term.
+        Returns:
+            numpy.ndarray: Sorted row positions, including every unindexed row.
+        """
+
+        postings=sorted((self.postings(code) for code in codes),key=len)
+        rows=postings[0]
+        for posting in postings[1:]:
+            if len(rows)==0:
+                break
+            rows=np.intersect1d(rows,posting,assume_unique=True)
+        return np.union1d(rows,self.unindexed)
+
+class TrigramIndex():
+    """
+    TrigramIndex narrows case-insensitive description searches to candidate rows through trigram posting lists.
+    The index is made of segments so rows appended to the dataset are indexed without rebuilding the
+    existing ones. Candidates are a superset of the matches; callers still verify them with the original
+    predicate so results stay identical to `str.contains(term, case=False)`.
+    Attributes:
+        segments (list of TrigramSegment): The segments, ordered by row position.
+        size (int): Number of descriptions covered by the index.
+    """
+
+    def __init__(self,descriptions,segments=None):
+        self.segments=[TrigramSegment(descriptions,0)] if segments is None else segments
+        self.size=sum(segment.size for segment in self.segments)
+
+    def extend(self,descriptions):
+        """
+        Returns an index covering the given descriptions, reusing the segments of this index.
+        Only the descriptions past `size` are indexed, in a new segment; once there are more than
+        `MAX_SEGMENTS` segments they are merged back into one.
+        Args:
+            descriptions (sequence of str): All descriptions, whose first `size` entries are the ones already indexed.
+        Returns:
+            TrigramIndex: The extended index.
+        """
+
+        if len(descriptions)==self.size:
+            return self
+        if len(self.segments)>=MAX_SEGMENTS:
+            return TrigramIndex(descriptions)
+        segment=TrigramSegment(descriptions[self.size:],self.size)
+        return TrigramIndex(descriptions,self.segments+[segment])
+
+    def candidates(self,search_term):
+        """
+        Returns the row positions that may contain a search term, ignoring case.
+        Args:
+            search_term (str): The term to search for.
+        Returns:
+            numpy.ndarray or None: Sorted candidate row positions, or None if the term is shorter than
+                                   three characters, not plain ASCII or a regular expression, in which
+                                   case every row is a candidate.
+        """
+
+        lowered=search_term.lower()
+        if len(lowered)<3 or not lowered.isascii() or any(character in REGEX_SPECIAL_CHARACTERS for character in lowered):
+            return None
+        codes=np.unique(trigram_codes(np.frombuffer(lowered.encode('ascii'),dtype='uint8')))
+        return np.concatenate([segment.candidates(codes) for segment in self.segments]).astype('int64')
@@ -0,0 +1,10 @@
+import config as app_config
+
+# gunicorn reads this file from the working directory, so `gunicorn app:app` picks the serving mode from config.py.
+# In gevent mode the worker monkey-patches the standard library before the application is imported, which makes
+# the currency API requests, the rate fetch thread pools and their waits cooperative within each worker.
+if app_config.SERVING_MODE not in ('sync','gevent'):
+    raise ValueError(f"SERVING_MODE should be sync or gevent, not {app_config.SERVING_MODE}")
+worker_class=app_config.SERVING_MODE
+workers=app_config.WORKERS
+worker_connections=app_config.WORKER_CONNECTIONS
@@ -0,0 +1,68 @@
+import pandas as pd
+from typing import Literal
+
+# Supported currency codes of the currency API, in sorted order. The position of a code is its stable integer id.
+CURRENCY_CODES=(
+    "1inch", "aave", "ada", "aed", "afn", "agix", "akt", "algo", "all", "amd", "amp", "ang", "aoa", "ape", "apt", "ar",
+    "arb", "ars", "atom", "ats", "aud", "avax", "awg", "axs", "azm", "azn", "bake", "bam", "bat", "bbd", "bch", "bdt",
+    "bef", "bgn", "bhd", "bif", "bmd", "bnb", "bnd", "bob", "brl", "bsd", "bsv", "bsw", "btc", "btcb", "btg", "btn",
+    "btt", "busd", "bwp", "byn", "byr", "bzd", "cad", "cake", "cdf", "celo", "cfx", "chf", "chz", "clp", "cnh", "cny",
+    "comp", "cop", "crc", "cro", "crv", "cspr", "cuc", "cup", "cve", "cvx", "cyp", "czk", "dai", "dash", "dcr", "dem",
+    "dfi", "djf", "dkk", "doge", "dop", "dot", "dydx", "dzd", "eek", "egld", "egp", "enj", "eos", "ern", "esp", "etb",
+    "etc", "eth", "eur", "fei", "fil", "fim", "fjd", "fkp", "flow", "flr", "frax", "frf", "ftt", "fxs", "gala", "gbp",
+    "gel", "ggp", "ghc", "ghs", "gip", "gmd", "gmx", "gnf", "gno", "grd", "grt", "gt", "gtq", "gusd", "gyd", "hbar",
+    "hkd", "hnl", "hnt", "hot", "hrk", "ht", "htg", "huf", "icp", "idr", "iep", "ils", "imp", "imx", "inj", "inr",
+    "iqd", "irr", "isk", "itl", "jep", "jmd", "jod", "jpy", "kas", "kava", "kcs", "kda", "kes", "kgs", "khr", "klay",
+    "kmf", "knc", "kpw", "krw", "ksm", "kwd", "kyd", "kzt", "lak", "lbp", "ldo", "leo", "link", "lkr", "lrc", "lrd",
+    "lsl", "ltc", "ltl", "luf", "luna", "lunc", "lvl", "lyd", "mad", "mana", "mbx", "mdl", "mga", "mgf", "mina",
+    "mkd", "mkr", "mmk", "mnt", "mop", "mro", "mru", "mtl", "mur", "mvr", "mwk", "mxn", "mxv", "myr", "mzm", "mzn",
+    "nad", "near", "neo", "nexo", "nft", "ngn", "nio", "nlg", "nok", "npr", "nzd", "okb", "omr", "one", "op", "ordi",
+    "pab", "paxg", "pen", "pepe", "pgk", "php", "pkr", "pln", "pte", "pyg", "qar", "qnt", "qtum", "rol", "ron", "rpl",
+    "rsd", "rub", "rune", "rvn", "rwf", "sand", "sar", "sbd", "scr", "sdd", "sdg", "sek", "sgd", "shib", "shp", "sit",
+    "skk", "sle", "sll", "snx", "sol", "sos", "spl", "srd", "srg", "std", "stn", "stx", "sui", "svc", "syp", "szl",
+    "thb", "theta", "tjs", "tmm", "tmt", "tnd", "ton", "top", "trl", "trx", "try", "ttd", "tusd", "tvd", "twd", "twt",
+    "tzs", "uah", "ugx", "uni", "usd", "usdc", "usdd", "usdp", "usdt", "uyu", "uzs", "val", "veb", "ved", "vef", "ves",
+    "vet", "vnd", "vuv", "waves", "wemix", "woo", "wst", "xaf", "xag", "xau", "xaut", "xbt", "xcd", "xcg", "xch", "xdc",
+    "xdr", "xec", "xem", "xlm", "xmr", "xof", "xpd", "xpf", "xpt", "xrp", "xtz", "yer", "zar", "zec", "zil", "zmk", "zmw",
+    "zwd", "zwg", "zwl")
+
+CURRENCIES=frozenset(CURRENCY_CODES)
+CURRENCY_INDEX={code:position for position,code in enumerate(CURRENCY_CODES)}
+CurrencyCode=Literal[CURRENCY_CODES]
+CURRENCY_DTYPE=pd.CategoricalDtype(categories=CURRENCY_CODES)
+
+def is_supported_currency(currency):
+    """
+    Checks in constant time whether a currency code is supported.
+    Args:
+        currency (str): The currency code, in small letters.
+    Returns:
+        bool: True if the currency code is one of `CURRENCY_CODES`.
+    """
+
+    return currency in CURRENCIES
+
+def currency_id(currency):
+    """
+    Returns the stable integer id of a currency code.
+    Args:
+        currency (str): The currency code, in small letters.
+    Returns:
+        int: The position of the code in `CURRENCY_CODES`, or -1 if it is not supported.
+    """
+
+    return CURRENCY_INDEX.get(currency,-1)
+
+def encode_currencies(currencies):
+    """
+    Converts a column of currency codes to their integer ids.
+    Args:
+        currencies (pandas.Series or array-like): Currency codes, either a Categorical with `CURRENCY_DTYPE`
+            or strings matched case-insensitively.
+    Returns:
+        numpy.ndarray: int16 currency ids, -1 for unsupported or missing codes.
+    """
+
+    if isinstance(currencies,pd.Series) and currencies.dtype==CURRENCY_DTYPE:
+        return currencies.cat.codes.to_numpy()
+    return pd.Categorical(pd.Series(currencies,dtype='string').str.lower(),dtype=CURRENCY_DTYPE).codes
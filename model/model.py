@@ -1,7 +1,10 @@
 from datetime import date,datetime
-from pydantic import BaseModel,field_validator,PositiveInt,Field, model_validator
-from typing import Optional,List,Literal,Any
+import config
+from pydantic import BaseModel,ConfigDict,field_validator,PositiveInt,Field, model_validator
+from typing import Optional,List,Literal,Any,Dict
 from controller import convert_currency_controller as ccc
+from controller.dataset_index import decode_cursor
+from model.currency_registry import CurrencyCode,is_supported_currency
 
 class TransactionModel(BaseModel):
     """
@@ -11,8 +14,8 @@ class TransactionModel(BaseModel):
         id (int): A unique identifier for the transaction.
         description (str): A brief description of the transaction.
         amount (float): The monetary value of the transaction.
-        currency (Literal): The currency code for the transaction, 
-            which must be one of the predefined values (e.g., "usd", "eur", "btc").
+        currency (CurrencyCode): The currency code for the transaction, 
+            which must be one of the codes of the currency registry (e.g., "usd", "eur", "btc").
         date (date): The date of the transaction. Must be greater than 2024-04-01.
     Methods:
         validate_date(cls, value): Validates that the date is greater than 2024-04-01.
@@ -23,29 +26,7 @@ class TransactionModel(BaseModel):
     id: int
     description: str
     amount: float
-    currency: Literal[
-          "1inch", "aave", "ada", "aed", "afn", "agix", "akt", "algo", "all", "amd", "amp", "ang", "aoa", "ape", "apt", "ar", 
-          "arb", "ars", "atom", "ats", "aud", "avax", "awg", "axs", "azm", "azn", "bake", "bam", "bat", "bbd", "bch", "bdt",
-          "bef", "bgn", "bhd", "bif", "bmd", "bnb", "bnd", "bob", "brl", "bsd", "bsv", "bsw", "btc", "btcb", "btg", "btn", 
-          "btt", "busd", "bwp", "byn", "byr", "bzd", "cad", "cake", "cdf", "celo", "cfx", "chf", "chz", "clp", "cnh", "cny", 
-          "comp", "cop", "crc", "cro", "crv", "cspr", "cuc", "cup", "cve", "cvx", "cyp", "czk", "dai", "dash", "dcr", "dem", 
-          "dfi", "djf", "dkk", "doge", "dop", "dot", "dydx", "dzd", "eek", "egld", "egp", "enj", "eos", "ern", "esp", "etb", 
-          "etc", "eth", "eur", "fei", "fil", "fim", "fjd", "fkp", "flow", "flr", "frax", "frf", "ftt", "fxs", "gala", "gbp", 
-          "gel", "ggp", "ghc", "ghs", "gip", "gmd", "gmx", "gnf", "gno", "grd", "grt", "gt", "gtq", "gusd", "gyd", "hbar", 
-          "hkd", "hnl", "hnt", "hot", "hrk", "ht", "htg", "huf", "icp", "idr", "iep", "ils", "imp", "imx", "inj", "inr", 
-          "iqd", "irr", "isk", "itl", "jep", "jmd", "jod", "jpy", "kas", "kava", "kcs", "kda", "kes", "kgs", "khr", "klay",
-          "kmf", "knc", "kpw", "krw", "ksm", "kwd", "kyd", "kzt", "lak", "lbp", "ldo", "leo", "link", "lkr", "lrc", "lrd",
-          "lsl", "ltc", "ltl", "luf", "luna", "lunc", "lvl", "lyd", "mad", "mana", "mbx", "mdl", "mga", "mgf", "mina",
-          "mkd", "mkr", "mmk", "mnt", "mop", "mro", "mru", "mtl", "mur", "mvr", "mwk", "mxn", "mxv", "myr", "mzm", "mzn", 
-          "nad", "near", "neo", "nexo", "nft", "ngn", "nio", "nlg", "nok", "npr", "nzd", "okb", "omr", "one", "op", "ordi",
-          "pab", "paxg", "pen", "pepe", "pgk", "php", "pkr", "pln", "pte", "pyg", "qar", "qnt", "qtum", "rol", "ron", "rpl",
-          "rsd", "rub", "rune", "rvn", "rwf", "sand", "sar", "sbd", "scr", "sdd", "sdg", "sek", "sgd", "shib", "shp", "sit",
-          "skk", "sle", "sll", "snx", "sol", "sos", "spl", "srd", "srg", "std", "stn", "stx", "sui", "svc", "syp", "szl",
-          "thb", "theta", "tjs", "tmm", "tmt", "tnd", "ton", "top", "trl", "trx", "try", "ttd", "tusd", "tvd", "twd", "twt",
-          "tzs", "uah", "ugx", "uni", "usd", "usdc", "usdd", "usdp", "usdt", "uyu", "uzs", "val", "veb", "ved", "vef", "ves",
-          "vet", "vnd", "vuv", "waves", "wemix", "woo", "wst", "xaf", "xag", "xau", "xaut", "xbt", "xcd", "xcg", "xch", "xdc", 
-          "xdr", "xec", "xem", "xlm", "xmr", "xof", "xpd", "xpf", "xpt", "xrp", "xtz", "yer", "zar", "zec", "zil", "zmk", "zmw", 
-          "zwd", "zwg", "zwl"]
+    currency: CurrencyCode
     date: date
 
     @field_validator('date')
@@ -64,16 +45,115 @@ class TransactionModel(BaseModel):
             raise ValueError("Date must be greater than 2024-04-01")
         return value
 
-class SearchQueryModel(BaseModel):
+class ConversionQueryModel(BaseModel):
+    """
+    ConversionQueryModel represents the query parameters selecting the target currencies of a conversion.
+    Attributes:
+        to (Optional[str]): Comma separated target currency codes (e.g., "bhd,usd,eur"), each one
+            converted into a `converted_to_<code>` field. Defaults to BHD only.
+    Validators:
+        - validate_to: Ensures every target is a currency code of the currency registry.
+    """
+
+    to: Optional[str] = Field(None, description='comma separated target currency codes, defaults to bhd')
+
+    @field_validator('to')
+    def validate_to(cls, value):
+        """
+        Normalizes the target currency codes to lowercase and drops duplicates, keeping their order.
+        Args:
+            value (str): The comma separated target currency codes.
+        Returns:
+            str: The normalized comma separated target currency codes.
+        Raises:
+            ValueError: If no code is given or a code is not in the currency registry.
+        """
+
+        if value is None:
+            return value
+        codes=[code.strip().lower() for code in value.split(',') if code.strip()!='']
+        if len(codes)==0:
+            raise ValueError("At least one target currency must be provided")
+        unsupported=[code for code in codes if not is_supported_currency(code)]
+        if len(unsupported)>0:
+            raise ValueError(f"Unsupported target currency: {', '.join(unsupported)}")
+        return ','.join(dict.fromkeys(codes))
+
+    def targets(self):
+        """
+        Returns the target currency codes of the conversion.
+        Returns:
+            tuple of str: The lowercase target currency codes, ('bhd',) if none was given.
+        """
+
+        return ('bhd',) if self.to is None else tuple(self.to.split(','))
+
+class PageQueryModel(ConversionQueryModel):
+    """
+    PageQueryModel represents the optional keyset pagination of a list of converted transactions.
+    Pages are ordered by transaction id; without `limit` every row is returned in file order.
+    Attributes:
+        limit (Optional[PositiveInt]): The maximum number of transactions of the page.
+        after_id (Optional[str]): The opaque cursor returned as "next cursor" by the previous page.
+    Validators:
+        - validate_after_id: Ensures the cursor was returned by a previous page.
+        - check_cursor_has_limit: Ensures that 'after_id' is only given with 'limit'.
+    """
+
+    limit: Optional[PositiveInt] = Field(None, description='maximum number of transactions per page, pages are ordered by id')
+    after_id: Optional[str] = Field(None, description='opaque cursor of the next page, returned as "next cursor" by the previous page')
+
+    @field_validator('after_id')
+    def validate_after_id(cls, value):
+        """
+        Validates that the cursor can be decoded.
+        Args:
+            value (str): The cursor.
+        Returns:
+            str: The cursor, unchanged.
+        Raises:
+            ValueError: If the cursor was not returned by a previous page.
+        """
+
+        if value is not None:
+            decode_cursor(value)
+        return value
+
+    @model_validator(mode='after')
+    def check_cursor_has_limit(self):
+        """
+        Validates that a cursor is only given together with a page size.
+        Returns:
+            PageQueryModel: The validated model.
+        Raises:
+            ValueError: If 'after_id' is given without 'limit'.
+        """
+
+        if self.after_id is not None and self.limit is None:
+            raise ValueError("after_id requires limit")
+        return self
+
+    def cursor(self):
+        """
+        Returns the keyset the page starts after.
+        Returns:
+            tuple or None: The (id, position) keyset decoded from 'after_id', None for the first page.
+        """
+
+        return None if self.after_id is None else decode_cursor(self.after_id)
+
+class SearchQueryModel(PageQueryModel):
     """
     SearchQueryModel is a Pydantic model that represents a search query with various optional filters.
+    It inherits the `to` target currencies of ConversionQueryModel and the `limit` and `after_id`
+    pagination of PageQueryModel, which are not search criteria.
     Attributes:
         before (Optional[date]): A date filter to specify the upper limit of a date range.
         after (Optional[date]): A date filter to specify the lower limit of a date range.
         below (Optional[float]): A numeric filter to specify the upper limit of a value range.
         exceed (Optional[float]): A numeric filter to specify the lower limit of a value range.
         matching (Optional[str]): A string filter for matching specific text.
-        currency (Literal): A literal type representing a list of supported currency codes.
+        currency (CurrencyCode): A literal type representing the supported currency codes of the currency registry.
     Validators:
         - check_amount_between_inputs: Ensures that the 'exceed' value is less than the 'below' value.
         - check_date_between_inputs: Ensures that the 'after' date is less than the 'before' date.
@@ -85,29 +165,7 @@ class SearchQueryModel(BaseModel):
     below: Optional[float] = None
     exceed: Optional[float] = None
     matching: Optional[str] = None
-    currency: Literal[
-        "1inch", "aave", "ada", "aed", "afn", "agix", "akt", "algo", "all", "amd", "amp", "ang", "aoa", "ape", "apt", "ar",
-        "arb", "ars", "atom", "ats", "aud", "avax", "awg", "axs", "azm", "azn", "bake", "bam", "bat", "bbd", "bch", "bdt",
-        "bef", "bgn", "bhd", "bif", "bmd", "bnb", "bnd", "bob", "brl", "bsd", "bsv", "bsw", "btc", "btcb", "btg", "btn",
-        "btt", "busd", "bwp", "byn", "byr", "bzd", "cad", "cake", "cdf", "celo", "cfx", "chf", "chz", "clp", "cnh", "cny",
-        "comp", "cop", "crc", "cro", "crv", "cspr", "cuc", "cup", "cve", "cvx", "cyp", "czk", "dai", "dash", "dcr", "dem",
-        "dfi", "djf", "dkk", "doge", "dop", "dot", "dydx", "dzd", "eek", "egld", "egp", "enj", "eos", "ern", "esp", "etb",
-        "etc", "eth", "eur", "fei", "fil", "fim", "fjd", "fkp", "flow", "flr", "frax", "frf", "ftt", "fxs", "gala", "gbp",
-        "gel", "ggp", "ghc", "ghs", "gip", "gmd", "gmx", "gnf", "gno", "grd", "grt", "gt", "gtq", "gusd", "gyd", "hbar",
-        "hkd", "hnl", "hnt", "hot", "hrk", "ht", "htg", "huf", "icp", "idr", "iep", "ils", "imp", "imx", "inj", "inr",
-        "iqd", "irr", "isk", "itl", "jep", "jmd", "jod", "jpy", "kas", "kava", "kcs", "kda", "kes", "kgs", "khr", "klay",
-        "kmf", "knc", "kpw", "krw", "ksm", "kwd", "kyd", "kzt", "lak", "lbp", "ldo", "leo", "link", "lkr", "lrc", "lrd",
-        "lsl", "ltc", "ltl", "luf", "luna", "lunc", "lvl", "lyd", "mad", "mana", "mbx", "mdl", "mga", "mgf", "mina",
-        "mkd", "mkr", "mmk", "mnt", "mop", "mro", "mru", "mtl", "mur", "mvr", "mwk", "mxn", "mxv", "myr", "mzm", "mzn",
-        "nad", "near", "neo", "nexo", "nft", "ngn", "nio", "nlg", "nok", "npr", "nzd", "okb", "omr", "one", "op", "ordi",
-        "pab", "paxg", "pen", "pepe", "pgk", "php", "pkr", "pln", "pte", "pyg", "qar", "qnt", "qtum", "rol", "ron", "rpl",
-        "rsd", "rub", "rune", "rvn", "rwf", "sand", "sar", "sbd", "scr", "sdd", "sdg", "sek", "sgd", "shib", "shp", "sit",
-        "skk", "sle", "sll", "snx", "sol", "sos", "spl", "srd", "srg", "std", "stn", "stx", "sui", "svc", "syp", "szl",
-        "thb", "theta", "tjs", "tmm", "tmt", "tnd", "ton", "top", "trl", "trx", "try", "ttd", "tusd", "tvd", "twd", "twt",
-        "tzs", "uah", "ugx", "uni", "usd", "usdc", "usdd", "usdp", "usdt", "uyu", "uzs", "val", "veb", "ved", "vef", "ves",
-        "vet", "vnd", "vuv", "waves", "wemix", "woo", "wst", "xaf", "xag", "xau", "xaut", "xbt", "xcd", "xcg", "xch", "xdc",
-        "xdr", "xec", "xem", "xlm", "xmr", "xof", "xpd", "xpf", "xpt", "xrp", "xtz", "yer", "zar", "zec", "zil", "zmk", "zmw",
-        "zwd", "zwg", "zwl"] = None
+    currency: CurrencyCode = None
 
     @model_validator(mode='before')
     @classmethod
@@ -173,6 +231,69 @@ class SearchQueryModel(BaseModel):
                 raise ValueError("At least one the predefined fields must be provided")
         return data
 
+class SummaryQueryModel(BaseModel):
+    """
+    SummaryQueryModel represents the query of the daily aggregates of converted transactions.
+    The date and currency filters follow the semantics of SearchQueryModel.
+    Attributes:
+        group_by (str): Comma separated grouping columns, "date" and/or "currency". Defaults to "date,currency".
+        before (Optional[date]): Keep days before this date.
+        after (Optional[date]): Keep days after this date.
+        currency (CurrencyCode): Keep this currency of the currency registry.
+        source (Literal): "dataset" for the CSV transactions, "posted" for the transactions posted
+            to the API, stored in the `CONVERSION_CACHE_PATH` database, or "all" for both. Defaults to "dataset".
+    Validators:
+        - validate_group_by: Ensures that every grouping column is "date" or "currency".
+        - check_date_between_inputs: Ensures that the 'after' date is less than the 'before' date.
+    """
+
+    group_by: str = Field('date,currency', description='comma separated grouping columns, date and/or currency')
+    before: Optional[date] = None
+    after: Optional[date] = None
+    currency: CurrencyCode = None
+    source: Literal['dataset','posted','all'] = 'dataset'
+
+    @field_validator('group_by')
+    def validate_group_by(cls, value):
+        """
+        Normalizes the grouping columns to lowercase and drops duplicates, keeping their order.
+        Args:
+            value (str): The comma separated grouping columns.
+        Returns:
+            str: The normalized comma separated grouping columns.
+        Raises:
+            ValueError: If no column is given or a column is neither "date" nor "currency".
+        """
+
+        columns=[column.strip().lower() for column in value.split(',') if column.strip()!='']
+        if len(columns)==0 or any(column not in ('date','currency') for column in columns):
+            raise ValueError("group_by should be date, currency or date,currency")
+        return ','.join(dict.fromkeys(columns))
+
+    @model_validator(mode='before')
+    @classmethod
+    def check_date_between_inputs(cls, data: Any) -> Any:
+        """
+        Validates that the 'after' date is strictly less than the 'before' date, as SearchQueryModel does.
+        Args:
+            data (Any): The input data, expected to be a dictionary containing 'before' and 'after' keys.
+        Returns:
+            Any: The original input data if validation passes.
+        Raises:
+            ValueError: If the 'after' date is greater than or equal to the 'before' date.
+        """
+
+        return SearchQueryModel.check_date_between_inputs(data)
+
+    def group_columns(self):
+        """
+        Returns the grouping columns of the summary.
+        Returns:
+            tuple of str: The grouping columns.
+        """
+
+        return tuple(self.group_by.split(','))
+
 class TransactionPath(BaseModel):
     """
     TransactionPath is a model representing the path of a transaction which represents the id
@@ -187,11 +308,21 @@ class ConvertedTransaction(TransactionModel):
     """
     ConvertedTransaction is a subclass of TransactionModel that represents a transaction
     with an additional field for the amount converted to Bahraini Dinar (BHD).
+    Requests with a `to` query get one `converted_to_<code>` field per target currency instead,
+    so the model allows extra float fields and its schema describes them as additional properties.
     Attributes:
-        converted_to_bhd (float): The amount of the transaction converted to Bahraini Dinar.
+        converted_to_bhd (Optional[float]): The amount of the transaction converted to Bahraini Dinar,
+            absent when the `to` query does not include bhd.
+        stale_rate (bool): True if the amount was converted with a stale last good rate table,
+            served while the currency API was failing or being revalidated.
     """
 
-    converted_to_bhd:float
+    model_config=ConfigDict(extra='allow',json_schema_extra={'additionalProperties':{'type':'number',
+        'description':'converted_to_<code> fields, the amount converted to each currency <code> of the to query'}})
+    __pydantic_extra__:Dict[str,float]
+
+    converted_to_bhd:Optional[float]=Field(None,description='the amount converted to bhd, absent when the to query does not include bhd')
+    stale_rate:bool
 
 class ConvertedTransactionResponse(BaseModel):
     """
@@ -203,12 +334,86 @@ class ConvertedTransactionResponse(BaseModel):
         message (str): A descriptive message providing additional information about the response.
         data (List[ConvertedTransaction]): A list of converted transaction objects containing
             detailed information about the transactions.
+        next_cursor (Optional[str]): Returned as "next cursor" by paginated requests, the `after_id`
+            of the next page or null after the last page.
     """
     
     code: int
     status: str
     message: str
     data: List[ConvertedTransaction]
+    next_cursor: Optional[str] = Field(None, alias='next cursor')
+
+class TransactionLookup(BaseModel):
+    """
+    TransactionLookup represents the result of one transaction id of a batch lookup.
+    Attributes:
+        id (int): The looked up transaction id.
+        found (bool): False if no transaction of the dataset has this id.
+        transactions (List[ConvertedTransaction]): The converted transactions with this id, empty if not found.
+    """
+
+    id: int
+    found: bool
+    transactions: List[ConvertedTransaction]
+
+class TransactionLookupResponse(BaseModel):
+    """
+    TransactionLookupResponse represents the response structure of a batch lookup.
+    Attributes:
+        code (int): The status code of the response.
+        status (str): The status of the response.
+        message (str): A descriptive message providing additional information about the response.
+        data (List[TransactionLookup]): One result per distinct looked up id, in request order.
+    """
+
+    code: int
+    status: str
+    message: str
+    data: List[TransactionLookup]
+
+class TransactionSummary(BaseModel):
+    """
+    TransactionSummary represents the aggregates of one group of converted transactions.
+    Attributes:
+        date (Optional[date]): The day of the group, when grouped by date.
+        currency (Optional[str]): The currency of the group, when grouped by currency.
+        count (int): The number of transactions.
+        total_bhd (float): The sum of the amounts converted to BHD.
+        min_bhd (float): The smallest amount converted to BHD.
+        max_bhd (float): The largest amount converted to BHD.
+    """
+
+    date: Optional[date] = None
+    currency: Optional[str] = None
+    count: int
+    total_bhd: float
+    min_bhd: float
+    max_bhd: float
+
+class TransactionSummaryResponse(BaseModel):
+    """
+    TransactionSummaryResponse represents the response structure of the transactions summary.
+    Attributes:
+        code (int): The status code of the response.
+        status (str): The status of the response.
+        message (str): A descriptive message providing additional information about the response.
+        data (List[TransactionSummary]): One summary per group.
+    """
+
+    code: int
+    status: str
+    message: str
+    data: List[TransactionSummary]
+
+class LookupBodyModel(BaseModel):
+    """
+    LookupBodyModel represents the request body of a batch lookup of transaction ids.
+    Attributes:
+        ids (List[int]): The transaction ids to look up, at most `LOOKUP_MAX_IDS`. Repeated ids are looked up once.
+    """
+
+    ids: List[int] = Field(min_length=1, max_length=config.LOOKUP_MAX_IDS, description='transaction ids to look up')
 
 class TransactionsBodyModel(BaseModel):
     """
@@ -0,0 +1,138 @@
+"""
+Shared fixtures of the test suite.
+
+The configuration is read from the environment when `config` is imported, so this module points it
+at a temporary directory and at local currency API stubs before the application is imported:
+    - `CURRENCY_API_URL` is a stub of `benchmarks/stub_currency_api.py` that always answers.
+    - `FAILING_CURRENCY_API_URL` is a stub answering every request with 503, for the fallback tests.
+    - the rate store, the conversion cache and the rollup database live in the temporary directory.
+"""
+
+import os
+import sys
+import socket
+import shutil
+import tempfile
+import subprocess
+import pytest
+
+ROOT_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_PATH=os.path.join(ROOT_DIR,'benchmarks','stub_currency_api.py')
+TEST_DIR=tempfile.mkdtemp(prefix='currency-converter-tests-')
+
+def free_port():
+    """
+    Finds a free TCP port on 127.0.0.1.
+    Returns:
+        int: The port.
+    """
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1',0))
+        return probe.getsockname()[1]
+
+def stub_url(port):
+    """
+    Returns the currency API URL of a stub.
+    Args:
+        port (int): The port of the stub.
+    Returns:
+        str: The URL to use as `CURRENCY_API_URL`.
+    """
+
+    return f'http://127.0.0.1:{port}/npm/@fawazahmed0/currency-api'
+
+STUB_PORT=free_port()
+FAILING_STUB_PORT=free_port()
+FAILING_CURRENCY_API_URL=stub_url(FAILING_STUB_PORT)
+
+os.environ.update({'CURRENCY_API_URL':stub_url(STUB_PORT),
+                   'DEFAULT_DATASET_PATH':os.path.join(TEST_DIR,'transactions.csv'),
+                   'DATASET_STORE_DIR':'',
+                   'RATE_STORE_DIR':os.path.join(TEST_DIR,'rates'),
+                   'RATE_FETCH_SPOOL_DIR':'',
+                   'CONVERSION_CACHE_PATH':os.path.join(TEST_DIR,'conversion_cache.sqlite3'),
+                   'RATE_FETCH_RETRIES':'0',
+                   'RATE_REVALIDATE_DEADLINE':'1',
+                   'ROLLUP_REFRESH_INTERVAL':'0',
+                   'PROFILING_ENABLED':'0'})
+sys.path.insert(0,ROOT_DIR)
+
+from benchmarks.generate_dataset import generate_dataset
+
+def start_stub(port,*arguments):
+    """
+    Starts a currency API stub and waits until it listens.
+    Args:
+        port (int): The port to listen on.
+        *arguments (str): Extra command line arguments of the stub.
+    Returns:
+        subprocess.Popen: The stub process.
+    """
+
+    process=subprocess.Popen([sys.executable,STUB_PATH,'--port',str(port),*arguments],stdout=subprocess.PIPE,text=True)
+    process.stdout.readline()
+    return process
+
+@pytest.fixture(scope='session',autouse=True)
+def currency_api():
+    """
+    Runs the currency API stubs for the whole session and removes the temporary directory afterwards.
+    Yields:
+        str: The URL of the stub that always answers.
+    """
+
+    stubs=[start_stub(STUB_PORT),start_stub(FAILING_STUB_PORT,'--error-rate','1')]
+    yield os.environ['CURRENCY_API_URL']
+    for stub in stubs:
+        stub.terminate()
+        stub.wait()
+    shutil.rmtree(TEST_DIR,ignore_errors=True)
+
+@pytest.fixture(scope='session')
+def client():
+    """
+    Returns a test client of the application.
+    Returns:
+        flask.testing.FlaskClient: The test client.
+    """
+
+    import app
+    return app.app.test_client()
+
+@pytest.fixture
+def dataset(tmp_path,monkeypatch):
+    """
+    Writes a default dataset of its own for a test and forgets the cached snapshot afterwards.
+    Args:
+        tmp_path (pathlib.Path): The temporary directory of the test.
+        monkeypatch (pytest.MonkeyPatch): Patches `DEFAULT_DATASET_PATH` for the test.
+    Yields:
+        callable: Writes the dataset, taking the number of rows and optional `days` and `seed`,
+            and returns its path.
+    """
+
+    import config
+    from controller.dataset_controller import DatasetController
+    path=str(tmp_path/'transactions.csv')
+    monkeypatch.setattr(config,'DEFAULT_DATASET_PATH',path)
+    def write(rows,days=30,seed=0):
+        generate_dataset(path,rows,days,seed)
+        return path
+    yield write
+    DatasetController._default_dataset_signature=None
+    DatasetController._default_dataset=None
+    DatasetController._default_index=None
+
+def response_data(response):
+    """
+    Checks that a response succeeded and returns its records.
+    Args:
+        response (flask.Response): A JSON response of the application.
+    Returns:
+        list: The "data" records of the response.
+    """
+
+    body=response.get_json()
+    assert body['response status']['code']==202,body['response status']
+    return body['data']
@@ -0,0 +1,27 @@
+import pytest
+import config
+
+REQUESTS=[('get','/transactions',{},None),
+          ('get','/transactions',{'to':'usd,eur'},None),
+          ('get','/transactions',{'limit':45},None),
+          ('get','/transactions/search',{'currency':'usd','exceed':100},None),
+          ('get','/transactions/search',{'after':'2024-04-05','before':'2024-04-20','matching':'global','to':'bhd,jpy'},None),
+          ('get','/transactions/search',{'currency':'eur','limit':10},None),
+          ('get','/transactions/17',{},None),
+          ('get','/transactions/17',{'to':'gbp'},None),
+          ('post','/transactions/lookup',{},{'ids':[3,99999,150,3,42]})]
+
+def fetch(client,method,path,query,body):
+    response=getattr(client,method)(path,query_string=query,json=body)
+    assert response.status_code==200
+    return response.get_json()
+
+@pytest.mark.parametrize('method,path,query,body',REQUESTS)
+def test_chunked_responses_match_the_in_memory_responses(client,dataset,monkeypatch,method,path,query,body):
+    dataset(300,days=25,seed=7)
+    in_memory=fetch(client,method,path,query,body)
+    monkeypatch.setattr(config,'DATASET_CHUNKED_THRESHOLD_BYTES',0)
+    monkeypatch.setattr(config,'INGEST_CHUNK_SIZE',64)
+    chunked=fetch(client,method,path,query,body)
+    assert in_memory['response status']['code']==202
+    assert chunked==in_memory
@@ -0,0 +1,70 @@
+import time
+import pytest
+from controller.circuit_breaker import CircuitBreaker,CircuitOpenError
+
+def fail():
+    raise ValueError('the dependency failed')
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker=CircuitBreaker(failure_threshold=2,reset_timeout=60)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state=='closed'
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state=='open'
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'refused')
+    assert breaker.stats()=={'state':'open','failures':2,'opens':1,'rejections':1}
+
+def test_success_resets_the_consecutive_failures():
+    breaker=CircuitBreaker(failure_threshold=2,reset_timeout=60)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.call(lambda: 'ok')=='ok'
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state=='closed'
+
+def test_half_open_breaker_lets_a_single_trial_through():
+    breaker=CircuitBreaker(failure_threshold=1,reset_timeout=0.05)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state=='half-open'
+    assert not breaker.allow()
+
+def test_successful_trial_closes_the_breaker():
+    breaker=CircuitBreaker(failure_threshold=1,reset_timeout=0.05)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    time.sleep(0.06)
+    assert breaker.call(lambda: 'ok')=='ok'
+    assert breaker.stats()=={'state':'closed','failures':0,'opens':1,'rejections':0}
+
+def test_failed_trial_reopens_the_breaker():
+    breaker=CircuitBreaker(failure_threshold=3,reset_timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(fail)
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state=='open'
+    assert breaker.opens==2
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'refused')
+
+def test_interrupted_trial_lets_the_next_call_be_the_trial():
+    breaker=CircuitBreaker(failure_threshold=1,reset_timeout=0.05)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    time.sleep(0.06)
+    def interrupted():
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupted)
+    assert breaker.state=='half-open'
+    assert breaker.call(lambda: 'ok')=='ok'
+    assert breaker.state=='closed'
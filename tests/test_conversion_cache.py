@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from controller.conversion_cache import ConversionCache,conversion_keys
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({'currency':['usd','EUR','usd'],
+                         'date':pd.to_datetime(['2024-05-01','2024-05-01','2024-05-02']),
+                         'amount':[10.0,20.0,10.0]})
+
+@pytest.fixture
+def cache(tmp_path):
+    return ConversionCache(str(tmp_path/'cache.sqlite3'),latest_ttl=60,timeout=0.05)
+
+def test_keys_depend_on_the_content_of_the_rows(transactions):
+    keys=conversion_keys(transactions,'bhd','1')
+    assert len(set(keys.tolist()))==3
+    np.testing.assert_array_equal(keys,conversion_keys(transactions.assign(currency=['USD','eur','USD']),'bhd','1'))
+    assert not np.array_equal(keys,conversion_keys(transactions,'usd','1'))
+    assert not np.array_equal(keys,conversion_keys(transactions,'bhd','2'))
+
+def test_lookup_misses_then_hits_after_store(cache,transactions):
+    keys=conversion_keys(transactions,'bhd','1')
+    values,is_latest=cache.get_many(keys)
+    assert np.isnan(values).all()
+    cache.put_many(keys[:2],np.array([3.77,8.2]),np.array([False,True]))
+    values,is_latest=cache.get_many(keys)
+    np.testing.assert_array_equal(values[:2],[3.77,8.2])
+    assert np.isnan(values[2])
+    np.testing.assert_array_equal(is_latest,[False,True,False])
+    assert cache.stats()=={'entries':2,'hits':2,'misses':4,'hit_ratio':1/3}
+
+def test_latest_entries_expire(tmp_path,transactions):
+    cache=ConversionCache(str(tmp_path/'cache.sqlite3'),latest_ttl=0,timeout=0.05)
+    keys=conversion_keys(transactions,'bhd','1')
+    cache.put_many(keys,np.array([1.0,2.0,3.0]),np.array([True,False,True]))
+    values,_=cache.get_many(keys)
+    assert np.isnan(values[0]) and values[1]==2.0 and np.isnan(values[2])
+    assert cache.purge(expired_only=True)==2
+    assert cache.stats()['entries']==1
+
+def test_store_is_skipped_while_another_connection_holds_the_write_lock(cache,transactions):
+    keys=conversion_keys(transactions,'bhd','1')
+    cache.put_many(keys[:1],np.array([1.0]),np.array([False]))
+    holder=ConversionCache(cache.database.path,latest_ttl=60,timeout=0.05)
+    with holder.database.transaction():
+        cache.put_many(keys[1:],np.array([2.0,3.0]),np.array([False,False]))
+        values,_=cache.get_many(keys)
+    assert values[0]==1.0 and np.isnan(values[1:]).all()
+
+def test_dataframe_conversion_reads_the_cache(monkeypatch,tmp_path,transactions):
+    from controller import convert_currency_controller as ccc
+    monkeypatch.setattr(ccc,'conversion_cache',ConversionCache(str(tmp_path/'cache.sqlite3'),latest_ttl=60,timeout=0.05))
+    converted=ccc.dataframe_convert_currency(transactions,('bhd','usd'))
+    assert ccc.conversion_cache.stats()['misses']==6
+    monkeypatch.setattr(ccc,'get_rate_entries',None)
+    cached=ccc.dataframe_convert_currency(transactions,('bhd','usd'))
+    assert ccc.conversion_cache.stats()['hits']==6
+    pd.testing.assert_frame_equal(converted,cached)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+import config
+
+@pytest.fixture(params=['memory','chunked'])
+def mode(request,monkeypatch):
+    """
+    Serves the dataset from the in-memory snapshot or, with a zero threshold, in chunks from the file.
+    """
+
+    if request.param=='chunked':
+        monkeypatch.setattr(config,'DATASET_CHUNKED_THRESHOLD_BYTES',0)
+        monkeypatch.setattr(config,'INGEST_CHUNK_SIZE',70)
+    return request.param
+
+def get_page(client,limit,cursor=None):
+    query={'limit':limit} if cursor is None else {'limit':limit,'after_id':cursor}
+    body=client.get('/transactions',query_string=query).get_json()
+    assert body['response status']['code']==202,body['response status']
+    return [row['id'] for row in body['data']],body['next cursor']
+
+def write_rows(path,ids,mode='w'):
+    pd.DataFrame({'id':ids,'description':'paging test','amount':10.5,'currency':'usd','date':'2024-05-01'}).to_csv(path,mode=mode,header=mode=='w',index=False)
+
+def test_pages_cover_the_dataset_once(client,dataset,mode):
+    dataset(250)
+    seen=[]
+    ids,cursor=get_page(client,60)
+    seen+=ids
+    while cursor is not None:
+        ids,cursor=get_page(client,60,cursor)
+        seen+=ids
+    assert seen==list(range(1,251))
+
+def test_pages_stay_stable_while_rows_are_appended(client,dataset,mode):
+    path=config.DEFAULT_DATASET_PATH
+    write_rows(path,list(range(1,201,2)))
+    first,cursor=get_page(client,40)
+    second,cursor=get_page(client,40,cursor)
+    write_rows(path,list(range(2,201,2))+[205,203],mode='a')
+    seen=first+second
+    while cursor is not None:
+        ids,cursor=get_page(client,40,cursor)
+        seen+=ids
+    assert first==list(range(1,80,2))
+    assert second==list(range(81,160,2))
+    assert len(seen)==len(set(seen))
+    assert seen[80:]==sorted(set(range(160,201))|{203,205})
+
+def test_last_full_page_has_no_next_cursor(client,dataset,mode):
+    dataset(30)
+    ids,cursor=get_page(client,30)
+    assert ids==list(range(1,31)) and cursor is None
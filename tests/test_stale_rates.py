@@ -0,0 +1,56 @@
+import pytest
+from controller import convert_currency_controller as ccc
+from controller.circuit_breaker import CircuitBreaker
+from tests.conftest import FAILING_CURRENCY_API_URL,response_data
+
+def post_transactions(client,transactions):
+    return client.post('/transactions',json={'transactions':transactions})
+
+def transaction(id,amount,date):
+    return {'id':id,'description':'stale rates test','amount':amount,'currency':'usd','date':date}
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """
+    Gives the test a breaker of its own, opening after two failed fetches, and disables the conversion
+    result cache so every request needs its rate tables.
+    """
+
+    breaker=CircuitBreaker(failure_threshold=2,reset_timeout=60)
+    monkeypatch.setattr(ccc,'rate_fetch_breaker',breaker)
+    monkeypatch.setattr(ccc,'conversion_cache',None)
+    return breaker
+
+def test_last_good_table_is_served_while_the_api_fails(client,breaker,monkeypatch):
+    fresh=response_data(post_transactions(client,[transaction(1,100.0,'2025-03-03')]))
+    assert fresh[0]['stale_rate'] is False
+    ccc.rate_table_cache.clear()
+    monkeypatch.setattr(ccc,'CURRENCY_API_URL',FAILING_CURRENCY_API_URL)
+    stale=response_data(post_transactions(client,[transaction(1,100.0,'2025-03-03')]))
+    assert stale[0]['stale_rate'] is True
+    assert stale[0]['converted_to_bhd']==fresh[0]['converted_to_bhd']
+    assert breaker.stats()['failures']==1
+
+def test_open_breaker_serves_stale_tables_and_refuses_unknown_dates(client,breaker,monkeypatch):
+    response_data(post_transactions(client,[transaction(2,50.0,'2025-03-04')]))
+    ccc.rate_table_cache.clear()
+    monkeypatch.setattr(ccc,'CURRENCY_API_URL',FAILING_CURRENCY_API_URL)
+    for _ in range(2):
+        ccc.rate_table_cache.clear()
+        assert response_data(post_transactions(client,[transaction(2,50.0,'2025-03-04')]))[0]['stale_rate'] is True
+    assert breaker.state=='open'
+    ccc.rate_table_cache.clear()
+    assert response_data(post_transactions(client,[transaction(2,50.0,'2025-03-04')]))[0]['stale_rate'] is True
+    assert breaker.rejections>=1
+    refused=post_transactions(client,[transaction(3,50.0,'2025-03-05')]).get_json()
+    assert refused['response status']['code']==500
+
+def test_recovered_api_serves_fresh_tables_again(client,breaker,monkeypatch,currency_api):
+    response_data(post_transactions(client,[transaction(4,75.0,'2025-03-06')]))
+    ccc.rate_table_cache.clear()
+    monkeypatch.setattr(ccc,'CURRENCY_API_URL',FAILING_CURRENCY_API_URL)
+    assert response_data(post_transactions(client,[transaction(4,75.0,'2025-03-06')]))[0]['stale_rate'] is True
+    monkeypatch.setattr(ccc,'CURRENCY_API_URL',currency_api)
+    ccc.rate_table_cache.clear()
+    assert response_data(post_transactions(client,[transaction(4,75.0,'2025-03-06')]))[0]['stale_rate'] is False
+    assert breaker.state=='closed'
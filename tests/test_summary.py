@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+from tests.conftest import response_data
+
+def expected_summary(converted,group_by):
+    """
+    Aggregates converted transactions with a direct groupby, in the layout of the summary records.
+    """
+
+    converted=converted.assign(date=pd.to_datetime(converted['date']).dt.tz_localize(None))
+    summary=converted.groupby(list(group_by)).agg(count=('converted_to_bhd','size'),total_bhd=('converted_to_bhd','sum'),
+                                                   min_bhd=('converted_to_bhd','min'),max_bhd=('converted_to_bhd','max'))
+    return summary.sort_index()
+
+def summary_frame(records,group_by):
+    summary=pd.DataFrame(records)
+    if 'date' in group_by:
+        summary['date']=pd.to_datetime(summary['date'],format='%a, %d %b %Y %H:%M:%S GMT')
+    return summary.set_index(list(group_by)).sort_index()
+
+def assert_summary_matches(actual,expected):
+    assert actual.index.equals(expected.index)
+    assert (actual['count']==expected['count']).all()
+    for column in ('total_bhd','min_bhd','max_bhd'):
+        assert actual[column].tolist()==pytest.approx(expected[column].tolist(),abs=1e-6)
+
+@pytest.mark.parametrize('group_by',[('date','currency'),('date',),('currency',)])
+def test_dataset_summary_matches_a_groupby_of_the_converted_transactions(client,dataset,group_by):
+    dataset(400,days=20,seed=3)
+    converted=pd.DataFrame(response_data(client.get('/transactions')))
+    records=response_data(client.get('/transactions/summary',query_string={'group_by':','.join(group_by)}))
+    assert_summary_matches(summary_frame(records,group_by),expected_summary(converted,group_by))
+
+def test_dataset_summary_applies_the_filters(client,dataset):
+    dataset(400,days=20,seed=3)
+    converted=pd.DataFrame(response_data(client.get('/transactions/search',query_string={'currency':'usd','after':'2024-04-05','before':'2024-04-15'})))
+    records=response_data(client.get('/transactions/summary',query_string={'currency':'usd','after':'2024-04-05','before':'2024-04-15'}))
+    assert_summary_matches(summary_frame(records,('date','currency')),expected_summary(converted,('date','currency')))
+
+def test_summary_follows_rows_appended_to_the_dataset(client,dataset):
+    path=dataset(200,days=10,seed=5)
+    response_data(client.get('/transactions/summary'))
+    extra=pd.DataFrame({'id':range(201,261),'description':'appended','amount':12.5,'currency':'usd','date':'2024-04-03'})
+    extra.to_csv(path,mode='a',header=False,index=False)
+    converted=pd.DataFrame(response_data(client.get('/transactions')))
+    records=response_data(client.get('/transactions/summary'))
+    assert_summary_matches(summary_frame(records,('date','currency')),expected_summary(converted,('date','currency')))
+
+def test_posted_summary_replaces_reposted_transactions(client):
+    transactions=[{'id':10000+i,'description':'summary test','amount':10.0+i,'currency':['usd','eur','gbp'][i%3],'date':f'2025-07-{1+i%4:02d}'}
+                  for i in range(24)]
+    response_data(client.post('/transactions',json={'transactions':transactions}))
+    reposted=[dict(transaction,amount=transaction['amount']*3) for transaction in transactions[:8]]
+    response_data(client.post('/transactions',json={'transactions':reposted}))
+    posted=pd.DataFrame(response_data(client.post('/transactions',json={'transactions':reposted+transactions[8:]})))
+    query={'source':'posted','after':'2025-06-30','before':'2025-07-05'}
+    records=response_data(client.get('/transactions/summary',query_string=query))
+    assert_summary_matches(summary_frame(records,('date','currency')),expected_summary(posted,('date','currency')))